@@ -2,7 +2,15 @@
 Local CV JSON Manager (Flask) — for editing cross-language CV content and tags.
 
 Usage (from repo root):
-  python cvgen_webui.py
+  python cvgen_webui.py               # web UI
+  python cvgen_webui.py --watch       # web UI + auto-import of changed files in data/cvs
+  python cvgen_webui.py --watch-only  # only watch data/cvs and import changes (no server)
+  python cvgen_webui.py --prune-exports [--keep-days N] [--keep-last N] [--dry-run]
+                                      # apply retention to output/json and drop unreferenced blobs
+  python cvgen_webui.py --rewrite-urls [MAP.json] [--dry-run]
+                                      # rewrite old URLs in the stored entries (default map: data/assets/ramin_changing_url.json)
+  python cvgen_webui.py --benchmark-json [--repeat N]
+                                      # time the available JSON codecs on data/cvs/*.json
 
 Notes:
   - This runs locally only (127.0.0.1).
@@ -10,6 +18,9 @@ Notes:
 """
 from __future__ import annotations
 
+import argparse
+import logging
+import os
 import sys
 from pathlib import Path
 
@@ -19,10 +30,72 @@ if str(SRC) not in sys.path:
     sys.path.insert(0, str(SRC))
 
 from cv_generator.webui import create_app  # noqa: E402
+from cv_generator.webui.watch import CVDirectoryWatcher, start_cv_watcher  # noqa: E402
+from cv_generator.webui.export_store import ExportStore  # noqa: E402
+from cv_generator.webui.json_codec import benchmark_codecs, codec  # noqa: E402
+from cv_generator.webui.cv_io import rewrite_stored_urls  # noqa: E402
+from cv_generator.webui.models import db, upgrade_schema  # noqa: E402
+from cv_generator.webui.url_rewrite import get_url_rewriter  # noqa: E402
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Local CV JSON Manager")
+    parser.add_argument("--watch", action="store_true", help="auto-import changed files in data/cvs while serving")
+    parser.add_argument("--watch-only", action="store_true", help="watch data/cvs and import changes without the web UI")
+    parser.add_argument("--prune-exports", action="store_true", help="prune old exports in output/json and unreferenced blobs, then exit")
+    parser.add_argument("--keep-days", type=float, default=30, help="with --prune-exports: keep exports younger than this (default: 30)")
+    parser.add_argument("--keep-last", type=int, default=1, help="with --prune-exports: always keep the newest N exports per variant (default: 1)")
+    parser.add_argument("--rewrite-urls", nargs="?", const=str(ROOT / "data" / "assets" / "ramin_changing_url.json"), metavar="MAP",
+                        help="rewrite old URLs in the stored data with a {old: new} JSON map, then exit")
+    parser.add_argument("--dry-run", action="store_true", help="with --prune-exports / --rewrite-urls: only report what would change")
+    parser.add_argument("--benchmark-json", action="store_true", help="benchmark the available JSON codecs on data/cvs/*.json, then exit")
+    parser.add_argument("--repeat", type=int, default=20, help="with --benchmark-json: timing runs per measurement (best is reported)")
+    args = parser.parse_args()
+
+    if args.benchmark_json:
+        paths = sorted((ROOT / "data" / "cvs").glob("*.json"))
+        print(f"{len(paths)} file(s), {sum(p.stat().st_size for p in paths)} bytes; active codec: {codec.name}")
+        print(f"{'codec':<8} {'loads ms':>9} {'export dumps ms':>16} {'compact dumps ms':>17}  identical export")
+        for row in benchmark_codecs(paths, repeat=args.repeat):
+            print(f"{row['codec']:<8} {row['loads_ms']:>9.2f} {row['dumps_export_ms']:>16.2f} {row['dumps_compact_ms']:>17.2f}  {row['identical']}")
+        return
+
+    if args.prune_exports:
+        stats = ExportStore(ROOT / "output" / "json").prune(
+            keep_days=args.keep_days, keep_last=args.keep_last, dry_run=args.dry_run
+        )
+        prefix = "Would remove" if args.dry_run else "Removed"
+        print(f"{prefix} {stats['names_removed']} export(s) and {stats['blobs_removed']} blob(s), {stats['bytes_freed']} bytes; "
+              f"{stats['names_kept']} export(s) and {stats['blobs_kept']} blob(s) kept.")
+        return
+
     app = create_app(repo_root=ROOT)
+
+    if args.rewrite_urls:
+        with app.app_context():
+            db.create_all()
+            upgrade_schema()
+            rewriter = get_url_rewriter(Path(args.rewrite_urls))
+            result = rewrite_stored_urls(rewriter, dry_run=args.dry_run)
+        prefix = "Would update" if args.dry_run else "Updated"
+        print(f"{prefix} {result.entries_changed} entries and {result.configs_changed} configs of {result.persons_changed} person(s) "
+              f"({len(rewriter)} URL(s) in the map).")
+        for old, n in result.tally.counts.most_common():
+            print(f"  {n:>5}  {old} -> {rewriter.mapping[old]}")
+        return
+
+    if args.watch_only:
+        logging.basicConfig(level=logging.INFO)
+        try:
+            CVDirectoryWatcher(app, ROOT / "data" / "cvs").run_forever()
+        except KeyboardInterrupt:
+            pass
+        return
+
+    # With the debug reloader, only the serving child process should watch
+    if args.watch and os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_cv_watcher(app)
+
     app.run(host="127.0.0.1", port=5001, debug=True)
 
 
@@ -1,12 +1,14 @@
 from __future__ import annotations
 
 import json
+import time
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 from flask import (
     Flask,
+    Response,
     abort,
     flash,
     jsonify,
@@ -14,11 +16,12 @@ from flask import (
     render_template,
     request,
     session,
+    stream_with_context,
     url_for,
 )
 from flask_wtf.csrf import CSRFProtect, generate_csrf
 
-from .models import db, PersonEntity, CVVariant, Entry, Tag, TagTranslation, TagAlias, EntityTag, ImportHistory, ExportHistory
+from .models import db, upgrade_schema, PersonEntity, CVVariant, Entry, Tag, TagTranslation, TagAlias, ImportHistory, ExportHistory, ExportPreset, Job
 from .fields import (
     SUPPORTED_LANGUAGES,
     SECTION_ORDER,
@@ -30,8 +33,17 @@ from .fields import (
     default_entry_data,
     skills_group,
 )
-from .cv_io import import_cv_json_bytes, export_variant_to_json, write_export_file, cleanup_orphaned_entity_tags, export_variant_by_tags_to_json, write_export_file_by_tags, count_entries_with_tags
-from .tagging import resolve_or_create_tag, attach_tag, detach_tag, list_entity_tags, get_tag_table, delete_tag, merge_tags, delete_all_tags, import_tags_from_csv, get_all_tags_for_autocomplete
+from .cv_io import import_cv_files, import_totals, record_import_history, export_variant_to_json, write_export_file, export_variants_batch, run_export_presets, plan_preset_exports, cleanup_orphaned_entity_tags, invalidate_import_hashes, export_variant_by_tags_to_json, write_export_file_by_tags, count_entries_with_tags, stream_variant_export, selected_variants, iter_export_zip, rewrite_stored_urls
+from .export_cache import export_cache, bump_generation, bump_generation_for_tags
+from .export_store import StoredExport
+from .json_codec import codec
+from .tag_labels import tag_labels
+from .tag_search import tag_search
+from .tag_duplicates import tag_duplicates
+from .tag_query import And, TagExpr, TagFilter, TagQueryError, as_expr, parse_tag_query
+from .url_rewrite import UrlRewriter, UrlRewriteTally, get_url_rewriter
+from .jobs import JobRunner, fail_interrupted_jobs, ProgressFn
+from .tagging import resolve_or_create_tag, attach_tag, detach_tag, entity_tags_by_group, get_tag_table, TAG_TABLE_SORTS, delete_tag, merge_tags, delete_all_tags, import_tags_from_csv, get_all_tags_for_autocomplete
 
 
 def create_app(*, repo_root: Path) -> Flask:
@@ -45,11 +57,24 @@ def create_app(*, repo_root: Path) -> Flask:
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     app.config["REPO_ROOT"] = str(repo_root)
     app.config["SUPPORTED_LANGUAGES"] = SUPPORTED_LANGUAGES
+    # Worker processes used to parse multi-file imports (None = one per CPU)
+    app.config["IMPORT_WORKERS"] = None
+    # Batch export threads (None = ThreadPoolExecutor default)
+    app.config["EXPORT_WORKERS"] = None
+    # Background jobs: worker threads, and JOBS_INLINE=True to run jobs synchronously
+    app.config["JOB_WORKERS"] = 2
+    app.config["JOBS_INLINE"] = False
+    # URL migration map ({"old url": "new url"}) for export-time and bulk URL rewriting
+    app.config["URL_MAP_PATH"] = str(repo_root / "data" / "assets" / "ramin_changing_url.json")
+    # Whether exports rewrite URLs by default (the export page toggles it per session)
+    app.config["EXPORT_REWRITE_URLS"] = False
 
     # Extensions
     db.init_app(app)
     csrf = CSRFProtect(app)
     app.jinja_env.globals["csrf_token"] = generate_csrf
+    jobs = JobRunner(app, max_workers=app.config["JOB_WORKERS"])
+    app.extensions["cvgen_jobs"] = jobs
 
     # Template globals
     app.jinja_env.globals["supported_languages"] = SUPPORTED_LANGUAGES
@@ -63,8 +88,64 @@ def create_app(*, repo_root: Path) -> Flask:
             return
         with app.app_context():
             db.create_all()
+            upgrade_schema()
+            fail_interrupted_jobs()
             app._db_ready = True  # type: ignore[attr-defined]
 
+    def entry_changed(person_id: int, lang_code: str, section: str) -> None:
+        """Bookkeeping after an entry is edited outside of an import (call before commit)."""
+        invalidate_import_hashes(person_id, lang_code, section)
+        bump_generation([person_id])
+
+    def tag_filter_from(values, lang_code: str) -> Optional[TagFilter]:
+        """
+        Tag filter from request values: checked tag_ids (all required) and/or a tag_query expression,
+        combined with AND. None if neither is given. Raises TagQueryError for a bad query.
+        """
+        tag_ids = []
+        for tid in values.getlist("tag_ids"):
+            try:
+                tag_ids.append(int(tid))
+            except ValueError:
+                continue
+        text = (values.get("tag_query") or "").strip()
+        if not text:
+            return tag_ids or None
+        expr = parse_tag_query(text, lang_code)
+        return And([as_expr(tag_ids), expr]) if tag_ids else expr
+
+    def describe_tag_filter(tag_filter: TagFilter) -> str:
+        if isinstance(tag_filter, TagExpr):
+            return str(tag_filter)
+        return ", ".join(sorted(filter(None, (tag_labels.slug(tid) for tid in tag_filter))))
+
+    def export_message(stored: StoredExport) -> str:
+        if stored.reused:
+            return f"Unchanged since the last export: {stored.path}"
+        return f"Exported to {stored.path}"
+
+    def url_rewriter() -> Optional[UrlRewriter]:
+        """Compiled URL map from URL_MAP_PATH, or None if there is none (a broken map is logged)."""
+        path = Path(app.config.get("URL_MAP_PATH") or "")
+        if not path.is_file():
+            return None
+        try:
+            return get_url_rewriter(path)
+        except ValueError as ex:
+            app.logger.warning(str(ex))
+            return None
+
+    def rewrite_urls_enabled() -> bool:
+        return bool(session.get("rewrite_urls", app.config.get("EXPORT_REWRITE_URLS")))
+
+    def export_rewrite() -> Optional[UrlRewriteTally]:
+        """Rewrite stage for an export started by this request, if URL rewriting is on."""
+        rewriter = url_rewriter() if rewrite_urls_enabled() else None
+        return rewriter.tally() if rewriter else None
+
+    def rewrite_note(tally: Optional[UrlRewriteTally]) -> str:
+        return f" {tally.summary(limit=3)}" if tally is not None else ""
+
     def current_language() -> str:
         lang = session.get("current_language") or "en"
         if lang not in SUPPORTED_LANGUAGES:
@@ -136,8 +217,15 @@ def create_app(*, repo_root: Path) -> Flask:
             view_mode = "tile"
         session["person_view_mode"] = view_mode
         
-        # Get tag filter from query param
-        filter_tag_id = request.args.get("tag_filter", type=int)
+        # Get tag filter from query param (slug or exact label, else a tag id); slugs may be all digits
+        tag_filter = (request.args.get("tag_filter") or "").strip()
+        filter_tag_id = tag_search.find(tag_filter) if tag_filter else None
+        if filter_tag_id is None and tag_filter.isdigit():
+            filter_tag_id = int(tag_filter)
+        filter_tag = next(iter(tag_labels.labels_for([filter_tag_id], lang)), None) if filter_tag_id else None
+        if tag_filter and filter_tag is None:
+            flash(f"Unknown tag: {tag_filter}", "warning")
+            filter_tag_id = None
 
         # compute section counts
         section_cards = []
@@ -156,12 +244,14 @@ def create_app(*, repo_root: Path) -> Flask:
         # For list view, gather entries per section with tags
         section_entries = {}
         if view_mode == "list":
+            tags_by_group = entity_tags_by_group(p.id, lang)
             for sec in SECTION_ORDER:
                 entries = Entry.query.filter_by(person_id=p.id, lang_code=lang, section=sec).order_by(Entry.sort_order.asc(), Entry.id.asc()).all()
                 entries_with_tags = []
                 for e in entries:
-                    entry_tags = list_entity_tags(p.id, sec, e.stable_id, lang)
-                    entry_tag_ids = [link.tag_id for link in EntityTag.query.filter_by(person_id=p.id, section=sec, stable_id=e.stable_id).all()]
+                    linked = tags_by_group.get((sec, e.stable_id), [])
+                    entry_tags = [t["label"] for t in linked]
+                    entry_tag_ids = [t["id"] for t in linked]
                     
                     # If filtering by tag, check if this entry has the tag
                     if filter_tag_id:
@@ -179,9 +269,6 @@ def create_app(*, repo_root: Path) -> Flask:
                     })
                 section_entries[sec] = entries_with_tags
         
-        # Get all tags for dropdown
-        all_tags = get_all_tags_for_autocomplete(lang)
-
         return render_template(
             "person_dashboard.html",
             person=p,
@@ -189,8 +276,8 @@ def create_app(*, repo_root: Path) -> Flask:
             variants=variants,
             view_mode=view_mode,
             section_entries=section_entries,
-            all_tags=all_tags,
             filter_tag_id=filter_tag_id,
+            filter_tag=filter_tag,
         )
 
     @app.route("/person-entity/<int:person_entity_id>")
@@ -244,8 +331,9 @@ def create_app(*, repo_root: Path) -> Flask:
         entries = Entry.query.filter_by(person_id=p.id, lang_code=lang, section=section).order_by(Entry.sort_order.asc(), Entry.id.asc()).all()
 
         # decorate with tags (in UI language)
+        tags_by_group = entity_tags_by_group(p.id, lang, section)
         for e in entries:
-            e.tags = list_entity_tags(p.id, section, e.stable_id, lang)  # type: ignore[attr-defined]
+            e.tags = [t["label"] for t in tags_by_group.get((section, e.stable_id), [])]  # type: ignore[attr-defined]
 
         skills_by_category = None
         if section == "skills":
@@ -283,6 +371,7 @@ def create_app(*, repo_root: Path) -> Flask:
             needs_translation=True,
         )
         db.session.add(e)
+        entry_changed(p.id, lang, section)
         db.session.commit()
         flash("Entry created.", "success")
         return redirect(url_for("edit_entry_route", entry_id=e.id))
@@ -324,24 +413,14 @@ def create_app(*, repo_root: Path) -> Flask:
                     flash(f"Failed to remove tag: {ex}", "error")
                 return redirect(url_for("entry_detail", entry_id=entry_id))
 
-        tags = []
-        links = EntityTag.query.filter_by(person_id=p.id, section=e.section, stable_id=e.stable_id).all()
-        for link in links:
-            label = TagTranslation.query.filter_by(tag_id=link.tag_id, lang_code=lang).first()
-            slug = Tag.query.get(link.tag_id).slug if Tag.query.get(link.tag_id) else "tag"
-            tags.append({
-                "id": link.tag_id,
-                "label": label.label if label else slug,
-                "slug": slug,
-            })
-        tags = sorted(tags, key=lambda x: x["label"].lower())
+        tags = entity_tags_by_group(p.id, lang, e.section).get((e.section, e.stable_id), [])
 
         return render_template(
             "entry_detail.html",
             entry=e,
             person=p,
             tags=tags,
-            json_pretty=json.dumps(e.data, ensure_ascii=False, indent=2),
+            json_pretty=codec.dumps_text(e.data, indent=True, exact=True),
         )
 
     @app.route("/entry/<int:entry_id>/edit", methods=["GET", "POST"])
@@ -360,6 +439,7 @@ def create_app(*, repo_root: Path) -> Flask:
                     del parsed["type_key"]
                 e.data = parsed
                 e.summary = summarize_entry(e.section, e.data)
+                entry_changed(e.person_id, e.lang_code, e.section)
                 db.session.commit()
                 flash("Entry updated.", "success")
                 return redirect(url_for("entry_detail", entry_id=e.id))
@@ -371,7 +451,7 @@ def create_app(*, repo_root: Path) -> Flask:
             "entry_edit.html",
             entry=e,
             person=p,
-            raw_json=json.dumps(e.data, ensure_ascii=False, indent=2),
+            raw_json=codec.dumps_text(e.data, indent=True, exact=True),
         )
 
     @app.route("/entry/<int:entry_id>/delete", methods=["POST"])
@@ -385,12 +465,16 @@ def create_app(*, repo_root: Path) -> Flask:
         try:
             # Delete the entry
             db.session.delete(e)
+            entry_changed(p.id, e.lang_code, section)
             
             # Clean up orphaned EntityTag links if no entries with this stable_id remain
-            cleanup_orphaned_entity_tags(p.id, section, stable_id)
+            cleaned = cleanup_orphaned_entity_tags(p.id, section, stable_id)
             
             db.session.commit()
-            flash("Entry deleted successfully.", "success")
+            if cleaned:
+                flash(f"Entry deleted successfully ({cleaned} orphaned tag link(s) removed).", "success")
+            else:
+                flash("Entry deleted successfully.", "success")
         except Exception as ex:
             db.session.rollback()
             flash(f"Failed to delete entry: {ex}", "error")
@@ -442,6 +526,7 @@ def create_app(*, repo_root: Path) -> Flask:
                 le.summary = summarize_entry(le.section, le.data)
                 if request.form.get("mark_translated"):
                     le.needs_translation = False
+                entry_changed(p.id, lang, le.section)
 
             db.session.commit()
             flash("Saved cross-language changes.", "success")
@@ -523,6 +608,7 @@ def create_app(*, repo_root: Path) -> Flask:
         if v is None:
             v = CVVariant(person_id=p.id, resume_key=p.slug, lang_code=target_lang)
             db.session.add(v)
+        entry_changed(p.id, target_lang, base_entry.section)
         db.session.commit()
         flash(f"Created {target_lang.upper()} entry.", "success")
         return redirect(url_for("cross_language_editor", entry_id=base_entry.id))
@@ -530,50 +616,48 @@ def create_app(*, repo_root: Path) -> Flask:
     # -------------------------
     # Import
     # -------------------------
+    def run_import(sources: List[Tuple[str, Any]], *, import_mode: str, progress: Optional[ProgressFn] = None) -> Tuple[int, int, str]:
+        """
+        Import (filename, bytes-or-path) sources and record an ImportHistory row.
+        Returns (success, errors, entry stats note for the job message).
+        """
+        results = import_cv_files(
+            sources, import_mode=import_mode, max_workers=app.config.get("IMPORT_WORKERS"), progress=progress
+        )
+        h = record_import_history(results, overwrite=(import_mode == "overwrite"))
+        t = import_totals(results)
+        note = (
+            f" Entries: {t['inserted']} inserted, {t['updated']} updated, {t['unchanged']} unchanged, "
+            f"{t['deleted']} deleted; {t['skipped_files']} file(s) unchanged and skipped."
+        )
+        return h.success_count, h.error_count, note
+
     @app.route("/import")
     def import_page():
         persons = PersonEntity.query.order_by(PersonEntity.slug.asc()).all()
         history = ImportHistory.query.order_by(ImportHistory.timestamp.desc()).limit(10).all()
-        return render_template("import.html", existing_persons=persons, import_history=history)
+        recent_jobs = Job.query.filter_by(kind="import").order_by(Job.id.desc()).limit(5).all()
+        return render_template("import.html", existing_persons=persons, import_history=history, recent_jobs=recent_jobs)
 
     @app.route("/import/upload", methods=["POST"])
     def import_upload():
         files = request.files.getlist("files")
         mode = request.form.get("import_mode") or "merge"
-        overwrite = (mode == "overwrite")
 
         if not files:
             flash("No files selected.", "error")
             return redirect(url_for("import_page"))
 
-        success = 0
-        errors = 0
-        logs: List[str] = []
-        for f in files:
-            try:
-                resume_key, lang, count, warnings = import_cv_json_bytes(f.read(), f.filename, import_mode=mode)
-                success += 1
-                logs.append(f"Imported {f.filename} as {resume_key} [{lang}] ({count} entries).")
-                for w in warnings:
-                    logs.append(f"  WARN: {w}")
-            except Exception as ex:
-                errors += 1
-                logs.append(f"ERROR importing {f.filename}: {ex}")
-
-        h = ImportHistory(
-            files_count=len(files),
-            overwrite=overwrite,
-            success_count=success,
-            error_count=errors,
-            log="\n".join(logs),
-        )
-        db.session.add(h)
-        db.session.commit()
+        sources = [(f.filename, f.read()) for f in files]
 
-        if errors == 0:
-            flash(f"Imported {success} file(s) successfully.", "success")
-        else:
-            flash(f"Imported {success} file(s), {errors} failed. See history.", "warning")
+        def job(progress: ProgressFn) -> str:
+            success, errors, note = run_import(sources, import_mode=mode, progress=progress)
+            if errors == 0:
+                return f"Imported {success} file(s) successfully." + note
+            return f"Imported {success} file(s), {errors} failed. See history." + note
+
+        job_id = jobs.submit("import", job, total=len(sources))
+        flash(f"Import of {len(sources)} file(s) started (job #{job_id}).", "success")
         return redirect(url_for("import_page"))
 
     @app.route("/import/from-disk", methods=["POST"])
@@ -589,32 +673,12 @@ def create_app(*, repo_root: Path) -> Flask:
             flash("No JSON files found in data/cvs.", "warning")
             return redirect(url_for("import_page"))
 
-        success = 0
-        errors = 0
-        logs: List[str] = []
-        for p in json_files:
-            try:
-                b = p.read_bytes()
-                resume_key, lang, count, warnings = import_cv_json_bytes(b, p.name, import_mode="merge")
-                success += 1
-                logs.append(f"Imported {p.name} as {resume_key} [{lang}] ({count} entries).")
-                for w in warnings:
-                    logs.append(f"  WARN: {w}")
-            except Exception as ex:
-                errors += 1
-                logs.append(f"ERROR importing {p.name}: {ex}")
-
-        h = ImportHistory(
-            files_count=len(json_files),
-            overwrite=False,
-            success_count=success,
-            error_count=errors,
-            log="\n".join(logs),
-        )
-        db.session.add(h)
-        db.session.commit()
+        def job(progress: ProgressFn) -> str:
+            success, errors, note = run_import([(p.name, p) for p in json_files], import_mode="merge", progress=progress)
+            return f"Imported from disk: {success} succeeded, {errors} failed." + note
 
-        flash(f"Imported from disk: {success} succeeded, {errors} failed.", "success" if errors == 0 else "warning")
+        job_id = jobs.submit("import", job, total=len(json_files))
+        flash(f"Import of {len(json_files)} file(s) from disk started (job #{job_id}).", "success")
         return redirect(url_for("import_page"))
 
     # -------------------------
@@ -636,6 +700,7 @@ def create_app(*, repo_root: Path) -> Flask:
         # Get all tags for the tag filter dropdown
         lang = current_language()
         all_tags = get_all_tags_for_autocomplete(lang)
+        recent_jobs = Job.query.filter_by(kind="export").order_by(Job.id.desc()).limit(5).all()
 
         return render_template(
             "export.html",
@@ -644,6 +709,11 @@ def create_app(*, repo_root: Path) -> Flask:
             available_variants=available_variants,
             current_language=current_language(),
             all_tags=all_tags,
+            recent_jobs=recent_jobs,
+            presets=ExportPreset.query.order_by(ExportPreset.name.asc()).all(),
+            url_map_path=app.config.get("URL_MAP_PATH"),
+            url_rewriter=url_rewriter(),
+            rewrite_urls=rewrite_urls_enabled(),
         )
 
     @app.route("/export/preview", methods=["POST"])
@@ -664,6 +734,9 @@ def create_app(*, repo_root: Path) -> Flask:
         # Here, 'person' is resume_key/slug, and we preview exporting tags in export_language.
         try:
             json_payload = export_variant_to_json(person, export_language, export_language)
+            rewrite = export_rewrite()
+            if rewrite is not None:
+                json_payload = rewrite(json_payload)
         except Exception as ex:
             flash(f"Preview failed: {ex}", "error")
             return redirect(url_for("export_page"))
@@ -678,11 +751,34 @@ def create_app(*, repo_root: Path) -> Flask:
             "preview.html",
             person=person,
             export_language=export_language,
-            json_preview=json.dumps(json_payload, ensure_ascii=False, indent=2),
+            json_preview=codec.dumps_text(json_payload, indent=True, exact=True),
             cv_data=cv_data,
             supported_languages=SUPPORTED_LANGUAGES,
         )
 
+    @app.route("/export/download/<person>")
+    def export_download(person: str):
+        """Stream one variant as a JSON download (?language=, optional repeated ?tag_ids= and/or ?tag_query=)."""
+        lang_code = request.args.get("language") or current_language()
+        if lang_code not in SUPPORTED_LANGUAGES:
+            lang_code = "en"
+        try:
+            tag_ids = tag_filter_from(request.args, lang_code)
+        except TagQueryError as ex:
+            abort(400, description=str(ex))
+
+        try:
+            chunks = stream_variant_export(person, lang_code, lang_code, tag_ids, rewrite=export_rewrite())
+        except ValueError:
+            abort(404)
+
+        suffix = "tags_export" if tag_ids else f"export_{lang_code}"
+        return Response(
+            stream_with_context(chunks),
+            mimetype="application/json",
+            headers={"Content-Disposition": f'attachment; filename="{person}_{lang_code}_{suffix}.json"'},
+        )
+
     @app.route("/export/person/<person>", methods=["POST"])
     def export_person(person: str):
         export_language = request.form.get("language") or current_language()
@@ -690,22 +786,24 @@ def create_app(*, repo_root: Path) -> Flask:
             export_language = "en"
         repo_root = Path(app.config["REPO_ROOT"])
 
+        rewrite = export_rewrite()
         try:
-            out_path = write_export_file(repo_root, person, export_language, export_language)
+            stored = write_export_file(repo_root, person, export_language, export_language, rewrite=rewrite)
             h = ExportHistory(
                 batch=False,
                 resume_key=person,
                 persons_count=1,
                 language=export_language,
-                output_dir=str(out_path.parent),
-                output_path=str(out_path),
+                output_dir=str(stored.path.parent),
+                output_path=str(stored.path),
+                content_hash=stored.content_hash,
                 success=True,
                 success_count=1,
                 failed_count=0,
             )
             db.session.add(h)
             db.session.commit()
-            flash(f"Exported to {out_path}", "success")
+            flash(export_message(stored) + rewrite_note(rewrite), "success")
         except Exception as ex:
             db.session.rollback()
             flash(f"Export failed: {ex}", "error")
@@ -723,22 +821,24 @@ def create_app(*, repo_root: Path) -> Flask:
             lang_code = "en"
 
         repo_root = Path(app.config["REPO_ROOT"])
+        rewrite = export_rewrite()
         try:
-            out_path = write_export_file(repo_root, resume_key, lang_code, lang_code)
+            stored = write_export_file(repo_root, resume_key, lang_code, lang_code, rewrite=rewrite)
             h = ExportHistory(
                 batch=False,
                 resume_key=resume_key,
                 persons_count=1,
                 language=lang_code,
-                output_dir=str(out_path.parent),
-                output_path=str(out_path),
+                output_dir=str(stored.path.parent),
+                output_path=str(stored.path),
+                content_hash=stored.content_hash,
                 success=True,
                 success_count=1,
                 failed_count=0,
             )
             db.session.add(h)
             db.session.commit()
-            flash(f"Exported to {out_path}", "success")
+            flash(export_message(stored) + rewrite_note(rewrite), "success")
         except Exception as ex:
             db.session.rollback()
             flash(f"Export failed: {ex}", "error")
@@ -750,38 +850,228 @@ def create_app(*, repo_root: Path) -> Flask:
         if not persons:
             flash("Select at least one person.", "warning")
             return redirect(url_for("export_page"))
+        languages = [l for l in request.form.getlist("languages") if l in SUPPORTED_LANGUAGES] or list(SUPPORTED_LANGUAGES)
 
         repo_root = Path(app.config["REPO_ROOT"])
-        success = 0
-        failed = 0
-        for resume_key in persons:
-            for lang in SUPPORTED_LANGUAGES:
-                v = PersonEntity.query.filter_by(slug=resume_key).first()
-                if not v:
-                    continue
-                if CVVariant.query.filter_by(person_id=v.id, lang_code=lang).first() is None:
-                    continue
-                try:
-                    write_export_file(repo_root, resume_key, lang, lang)
-                    success += 1
-                except Exception:
-                    failed += 1
-
-        h = ExportHistory(
-            batch=True,
-            resume_key=None,
-            persons_count=len(persons),
-            language=None,
-            output_dir=str((repo_root / "output" / "json")),
-            output_path=None,
-            success=(failed == 0),
-            success_count=success,
-            failed_count=failed,
+        rewrite = export_rewrite()
+
+        def job(progress: ProgressFn) -> str:
+            started = time.perf_counter()
+            results = export_variants_batch(
+                repo_root, persons, languages, max_workers=app.config.get("EXPORT_WORKERS"), progress=progress,
+                rewrite=rewrite,
+            )
+            success = sum(1 for r in results if r.error is None)
+            failed = len(results) - success
+            unchanged = sum(1 for r in results if r.reused)
+
+            h = ExportHistory(
+                batch=True,
+                resume_key=None,
+                persons_count=len(persons),
+                language=None,
+                output_dir=str((repo_root / "output" / "json")),
+                output_path=None,
+                success=(failed == 0),
+                success_count=success,
+                failed_count=failed,
+            )
+            db.session.add(h)
+            db.session.commit()
+            message = f"Batch export done: {success} succeeded ({unchanged} unchanged), {failed} failed in {time.perf_counter() - started:.1f}s."
+            if results:
+                slowest = max(results, key=lambda r: r.seconds)
+                message += f" Slowest: {slowest.resume_key} [{slowest.lang_code}] {slowest.seconds * 1000:.0f} ms."
+            return message + rewrite_note(rewrite)
+
+        job_id = jobs.submit("export", job, total=len(persons) * len(languages))
+        flash(f"Batch export started (job #{job_id}).", "success")
+        return redirect(url_for("export_page"))
+
+    @app.route("/export/batch.zip")
+    def export_batch_zip():
+        """
+        Stream a ZIP of exports built on the fly (nothing is written to output/json).
+        Query args (all repeatable): persons (default: all), languages (default: all), tag_ids / tag_query (optional filter).
+        """
+        persons = request.args.getlist("persons") or [p.slug for p in PersonEntity.query.order_by(PersonEntity.slug.asc()).all()]
+        languages = [l for l in request.args.getlist("languages") if l in SUPPORTED_LANGUAGES] or list(SUPPORTED_LANGUAGES)
+        try:
+            tag_ids = tag_filter_from(request.args, current_language())
+        except TagQueryError as ex:
+            flash(f"Invalid tag query: {ex}", "error")
+            return redirect(url_for("export_page"))
+
+        variants = [(r.slug, r.lang_code) for r in selected_variants(persons, languages)]
+        if not variants:
+            flash("No variants match the selection.", "warning")
+            return redirect(url_for("export_page"))
+
+        ts = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+        return Response(
+            stream_with_context(iter_export_zip(variants, tag_ids, export_rewrite())),
+            mimetype="application/zip",
+            headers={"Content-Disposition": f'attachment; filename="cv_export_{ts}.zip"'},
         )
-        db.session.add(h)
-        db.session.commit()
 
-        flash(f"Batch export done: {success} succeeded, {failed} failed.", "success" if failed == 0 else "warning")
+    # -------------------------
+    # Export presets
+    # -------------------------
+    @app.route("/export/presets", methods=["POST"])
+    def export_presets():
+        action = request.form.get("action")
+        if action == "create":
+            name = (request.form.get("name") or "").strip()
+            if not name:
+                flash("Preset name is required.", "warning")
+                return redirect(url_for("export_page"))
+            if ExportPreset.query.filter_by(name=name).first():
+                flash(f"A preset named '{name}' already exists.", "warning")
+                return redirect(url_for("export_page"))
+
+            tag_query = (request.form.get("tag_query") or "").strip()
+            if tag_query:
+                try:
+                    # store the canonical (slug) form so the preset does not depend on the UI language
+                    tag_query = str(parse_tag_query(tag_query, current_language()))
+                except TagQueryError as ex:
+                    flash(f"Invalid tag query: {ex}", "error")
+                    return redirect(url_for("export_page"))
+
+            languages = [l for l in request.form.getlist("languages") if l in SUPPORTED_LANGUAGES]
+            db.session.add(ExportPreset(
+                name=name,
+                tag_query=tag_query or None,
+                languages=languages or None,
+                filename_pattern=(request.form.get("filename_pattern") or "").strip() or "{person}_{lang}_{preset}",
+            ))
+            db.session.commit()
+            flash(f"Preset '{name}' created.", "success")
+        elif action == "delete":
+            preset = ExportPreset.query.get_or_404(request.form.get("preset_id", type=int))
+            db.session.delete(preset)
+            db.session.commit()
+            flash(f"Preset '{preset.name}' deleted.", "success")
+        return redirect(url_for("export_page"))
+
+    @app.route("/export/presets/run", methods=["POST"])
+    def export_presets_run():
+        """Run the selected presets (default: all) for one person as a background job."""
+        resume_key = request.form.get("person") or ""
+        if not resume_key:
+            flash("Select a person first.", "warning")
+            return redirect(url_for("export_page"))
+        preset_ids = request.form.getlist("preset_ids", type=int)
+        q = ExportPreset.query
+        if preset_ids:
+            q = q.filter(ExportPreset.id.in_(preset_ids))
+        presets = q.order_by(ExportPreset.name.asc()).all()
+        if not presets:
+            flash("No export presets to run.", "warning")
+            return redirect(url_for("export_page"))
+
+        repo_root = Path(app.config["REPO_ROOT"])
+        preset_ids = [p.id for p in presets]
+        rewrite = export_rewrite()
+
+        def job(progress: ProgressFn) -> str:
+            started = time.perf_counter()
+            presets = ExportPreset.query.filter(ExportPreset.id.in_(preset_ids)).order_by(ExportPreset.name.asc()).all()
+            results = run_export_presets(repo_root, resume_key, presets, progress=progress, rewrite=rewrite)
+            success = sum(1 for r in results if r.error is None)
+            failed = len(results) - success
+            unchanged = sum(1 for r in results if r.reused)
+            db.session.add(ExportHistory(
+                batch=True,
+                resume_key=resume_key,
+                persons_count=1,
+                language=None,
+                output_dir=str(repo_root / "output" / "json"),
+                output_path=None,
+                success=(failed == 0),
+                success_count=success,
+                failed_count=failed,
+            ))
+            db.session.commit()
+            message = (
+                f"Presets for {resume_key}: {success} file(s) written ({unchanged} unchanged), {failed} failed "
+                f"in {time.perf_counter() - started:.2f}s."
+            )
+            errors = sorted({f"{r.preset}: {r.error}" for r in results if r.error})
+            if errors:
+                message += " " + "; ".join(errors)
+            return message + rewrite_note(rewrite)
+
+        languages = [r.lang_code for r in selected_variants([resume_key])]
+        job_id = jobs.submit("export", job, total=len(plan_preset_exports(presets, languages)))
+        flash(f"Preset export of {len(presets)} preset(s) for {resume_key} started (job #{job_id}).", "success")
+        return redirect(url_for("export_page"))
+
+    # -------------------------
+    # Jobs
+    # -------------------------
+    @app.route("/jobs")
+    def jobs_list():
+        """JSON list of recent jobs, optionally filtered by ?kind=import|export."""
+        q = Job.query
+        kind = request.args.get("kind")
+        if kind:
+            q = q.filter_by(kind=kind)
+        limit = min(request.args.get("limit", 20, type=int), 100)
+        return jsonify([j.to_dict() for j in q.order_by(Job.id.desc()).limit(limit).all()])
+
+    @app.route("/jobs/<int:job_id>")
+    def job_status(job_id: int):
+        """JSON progress of one job, polled by the import/export pages."""
+        return jsonify(Job.query.get_or_404(job_id).to_dict())
+
+    # -------------------------
+    # URL rewriting
+    # -------------------------
+    @app.route("/export/url-rewrite", methods=["POST"])
+    def export_url_rewrite():
+        """
+        action=toggle: turn export-time URL rewriting on/off for this session.
+        action=preview: count what a bulk rewrite of the stored data would replace.
+        action=apply: rewrite the stored entries and configs (background job).
+        """
+        action = request.form.get("action")
+        if action == "toggle":
+            session["rewrite_urls"] = not rewrite_urls_enabled()
+            flash(f"URL rewriting on export is {'on' if session['rewrite_urls'] else 'off'}.", "success")
+            return redirect(url_for("export_page"))
+
+        path = Path(app.config.get("URL_MAP_PATH") or "")
+        if not path.is_file():
+            flash(f"No URL map at {path}.", "warning")
+            return redirect(url_for("export_page"))
+        try:
+            rewriter = get_url_rewriter(path)
+        except ValueError as ex:
+            flash(str(ex), "error")
+            return redirect(url_for("export_page"))
+
+        if action == "preview":
+            result = rewrite_stored_urls(rewriter, dry_run=True)
+            flash(
+                f"Dry run: {result.entries_changed} entries and {result.configs_changed} configs of "
+                f"{result.persons_changed} person(s) would change.",
+                "success",
+            )
+            for old, n in result.tally.counts.most_common():
+                flash(f"{old} → {rewriter.mapping[old]}: {n}", "info")
+            return redirect(url_for("export_page"))
+
+        if action == "apply":
+            def job(progress: ProgressFn) -> str:
+                result = rewrite_stored_urls(rewriter)
+                return (
+                    f"URL rewrite: {result.entries_changed} entries and {result.configs_changed} configs of "
+                    f"{result.persons_changed} person(s) updated. {result.tally.summary()}"
+                )
+
+            job_id = jobs.submit("export", job)
+            flash(f"URL rewrite of the stored data started (job #{job_id}).", "success")
         return redirect(url_for("export_page"))
 
     # -------------------------
@@ -789,17 +1079,14 @@ def create_app(*, repo_root: Path) -> Flask:
     # -------------------------
     @app.route("/export/by-tags/count", methods=["POST"])
     def export_by_tags_count():
-        """AJAX endpoint to get count of entries matching selected tags."""
+        """AJAX endpoint to get count of entries matching selected tags and/or a tag query."""
         resume_key = request.form.get("person") or ""
         lang_code = request.form.get("language") or current_language()
-        tag_ids_raw = request.form.getlist("tag_ids")
 
-        tag_ids = []
-        for tid in tag_ids_raw:
-            try:
-                tag_ids.append(int(tid))
-            except ValueError:
-                continue
+        try:
+            tag_ids = tag_filter_from(request.form, lang_code)
+        except TagQueryError as ex:
+            return jsonify({"count": 0, "error": str(ex)})
 
         if not resume_key or not tag_ids:
             return jsonify({"count": 0})
@@ -812,38 +1099,34 @@ def create_app(*, repo_root: Path) -> Flask:
         """Preview the filtered export JSON."""
         resume_key = request.form.get("person") or ""
         lang_code = request.form.get("language") or current_language()
-        tag_ids_raw = request.form.getlist("tag_ids")
-
-        tag_ids = []
-        for tid in tag_ids_raw:
-            try:
-                tag_ids.append(int(tid))
-            except ValueError:
-                continue
+        if lang_code not in SUPPORTED_LANGUAGES:
+            lang_code = "en"
 
         if not resume_key:
             flash("Select a person first.", "warning")
             return redirect(url_for("export_page"))
 
-        if not tag_ids:
-            flash("Select at least one tag.", "warning")
+        try:
+            tag_ids = tag_filter_from(request.form, lang_code)
+        except TagQueryError as ex:
+            flash(f"Invalid tag query: {ex}", "error")
             return redirect(url_for("export_page"))
 
-        if lang_code not in SUPPORTED_LANGUAGES:
-            lang_code = "en"
+        if not tag_ids:
+            flash("Select at least one tag or enter a tag query.", "warning")
+            return redirect(url_for("export_page"))
 
         try:
             json_payload = export_variant_by_tags_to_json(resume_key, lang_code, lang_code, tag_ids)
+            rewrite = export_rewrite()
+            if rewrite is not None:
+                json_payload = rewrite(json_payload)
         except Exception as ex:
             flash(f"Preview failed: {ex}", "error")
             return redirect(url_for("export_page"))
 
-        # Get tag labels for display
-        tag_labels = []
-        for tid in tag_ids:
-            tag = Tag.query.get(tid)
-            if tag:
-                tag_labels.append(tag.slug)
+        # Tag filter for display
+        tag_labels = [describe_tag_filter(tag_ids)]
 
         # lightweight summary object for template
         cv_data = type("CVD", (), {})()
@@ -855,7 +1138,7 @@ def create_app(*, repo_root: Path) -> Flask:
             "preview.html",
             person=resume_key,
             export_language=lang_code,
-            json_preview=json.dumps(json_payload, ensure_ascii=False, indent=2),
+            json_preview=codec.dumps_text(json_payload, indent=True, exact=True),
             cv_data=cv_data,
             supported_languages=SUPPORTED_LANGUAGES,
             filter_tags=tag_labels,
@@ -866,54 +1149,47 @@ def create_app(*, repo_root: Path) -> Flask:
         """Export CV filtered by tags with optional custom filename."""
         resume_key = request.form.get("person") or ""
         lang_code = request.form.get("language") or current_language()
-        tag_ids_raw = request.form.getlist("tag_ids")
         custom_filename = (request.form.get("custom_filename") or "").strip()
-
-        tag_ids = []
-        for tid in tag_ids_raw:
-            try:
-                tag_ids.append(int(tid))
-            except ValueError:
-                continue
+        if lang_code not in SUPPORTED_LANGUAGES:
+            lang_code = "en"
 
         if not resume_key:
             flash("Select a person first.", "warning")
             return redirect(url_for("export_page"))
 
-        if not tag_ids:
-            flash("Select at least one tag.", "warning")
+        try:
+            tag_ids = tag_filter_from(request.form, lang_code)
+        except TagQueryError as ex:
+            flash(f"Invalid tag query: {ex}", "error")
             return redirect(url_for("export_page"))
 
-        if lang_code not in SUPPORTED_LANGUAGES:
-            lang_code = "en"
+        if not tag_ids:
+            flash("Select at least one tag or enter a tag query.", "warning")
+            return redirect(url_for("export_page"))
 
         repo_root = Path(app.config["REPO_ROOT"])
+        rewrite = export_rewrite()
         try:
-            out_path = write_export_file_by_tags(
-                repo_root, resume_key, lang_code, lang_code, tag_ids, custom_filename
+            stored = write_export_file_by_tags(
+                repo_root, resume_key, lang_code, lang_code, tag_ids, custom_filename, rewrite=rewrite
             )
 
-            # Get tag slugs for history
-            tag_slugs = []
-            for tid in tag_ids:
-                tag = Tag.query.get(tid)
-                if tag:
-                    tag_slugs.append(tag.slug)
 
             h = ExportHistory(
                 batch=False,
                 resume_key=resume_key,
                 persons_count=1,
                 language=lang_code,
-                output_dir=str(out_path.parent),
-                output_path=str(out_path),
+                output_dir=str(stored.path.parent),
+                output_path=str(stored.path),
+                content_hash=stored.content_hash,
                 success=True,
                 success_count=1,
                 failed_count=0,
             )
             db.session.add(h)
             db.session.commit()
-            flash(f"Exported to {out_path} (filtered by tags: {', '.join(tag_slugs)})", "success")
+            flash(f"{export_message(stored)} (filtered by tags: {describe_tag_filter(tag_ids)}){rewrite_note(rewrite)}", "success")
         except Exception as ex:
             db.session.rollback()
             flash(f"Export failed: {ex}", "error")
@@ -925,6 +1201,8 @@ def create_app(*, repo_root: Path) -> Flask:
     @app.route("/tags", methods=["GET", "POST"])
     def tags_list():
         lang = current_language()
+        # search/sort/page of the table; forms post back to the same URL, so redirects keep the view
+        view_args = request.args.to_dict()
 
         if request.method == "POST":
             action = request.form.get("action")
@@ -933,11 +1211,11 @@ def create_app(*, repo_root: Path) -> Flask:
                     label = (request.form.get("label") or "").strip()
                     if not label:
                         flash("Label is required.", "warning")
-                        return redirect(url_for("tags_list"))
+                        return redirect(url_for("tags_list", **view_args))
                     t = resolve_or_create_tag(label, lang)
                     db.session.commit()
                     flash("Tag created.", "success")
-                    return redirect(url_for("tags_list"))
+                    return redirect(url_for("tags_list", **view_args))
 
                 if action == "add_translation":
                     tag_id = int(request.form.get("tag_id") or "0")
@@ -952,9 +1230,10 @@ def create_app(*, repo_root: Path) -> Flask:
                         existing.label = tr_label
                     else:
                         db.session.add(TagTranslation(tag_id=tag_id, lang_code=tr_lang, label=tr_label))
+                    bump_generation_for_tags([tag_id])
                     db.session.commit()
                     flash("Translation saved.", "success")
-                    return redirect(url_for("tags_list"))
+                    return redirect(url_for("tags_list", **view_args))
 
                 if action == "add_alias":
                     tag_id = int(request.form.get("tag_id") or "0")
@@ -972,7 +1251,7 @@ def create_app(*, repo_root: Path) -> Flask:
                         db.session.add(TagAlias(tag_id=tag_id, lang_code=al_lang, alias_label=al_label))
                     db.session.commit()
                     flash("Alias added.", "success")
-                    return redirect(url_for("tags_list"))
+                    return redirect(url_for("tags_list", **view_args))
 
                 if action == "delete_tag":
                     tag_id = int(request.form.get("tag_id") or "0")
@@ -981,7 +1260,7 @@ def create_app(*, repo_root: Path) -> Flask:
                         flash("Tag deleted.", "success")
                     else:
                         flash("Tag not found.", "warning")
-                    return redirect(url_for("tags_list"))
+                    return redirect(url_for("tags_list", **view_args))
 
                 if action == "merge_tags":
                     target_tag_id = int(request.form.get("target_tag_id") or "0")
@@ -992,13 +1271,13 @@ def create_app(*, repo_root: Path) -> Flask:
                             source_tag_ids.append(int(s))
                         except ValueError:
                             continue
-                    success, message = merge_tags(target_tag_id, source_tag_ids)
+                    success, message, _report = merge_tags(target_tag_id, source_tag_ids)
                     if success:
                         db.session.commit()
                         flash(message, "success")
                     else:
                         flash(message, "warning")
-                    return redirect(url_for("tags_list"))
+                    return redirect(url_for("tags_list", **view_args))
 
                 if action == "delete_all_tags":
                     count = delete_all_tags()
@@ -1007,42 +1286,71 @@ def create_app(*, repo_root: Path) -> Flask:
                         flash(f"Deleted all {count} tag(s).", "success")
                     else:
                         flash("No tags to delete.", "warning")
-                    return redirect(url_for("tags_list"))
+                    return redirect(url_for("tags_list", **view_args))
 
                 if action == "import_csv":
                     csv_file = request.files.get("csv_file")
                     if not csv_file or not csv_file.filename:
                         flash("No CSV file selected.", "warning")
-                        return redirect(url_for("tags_list"))
+                        return redirect(url_for("tags_list", **view_args))
                     try:
-                        csv_content = csv_file.read()
-                        created_count, warnings = import_tags_from_csv(csv_content, csv_file.filename)
+                        stats = import_tags_from_csv(csv_file.stream, csv_file.filename)
                         db.session.commit()
-                        if created_count > 0:
-                            flash(f"Created {created_count} new tag(s) from CSV.", "success")
-                        else:
-                            flash("No new tags created from CSV.", "warning")
-                        for w in warnings[-5:]:  # Show last 5 warnings
-                            flash(w, "warning")
+                        flash(stats.summary(), "success" if stats.created or stats.translations_added else "warning")
                     except Exception as ex:
                         db.session.rollback()
                         flash(f"CSV import failed: {ex}", "error")
-                    return redirect(url_for("tags_list"))
+                    return redirect(url_for("tags_list", **view_args))
 
             except Exception as ex:
                 db.session.rollback()
                 flash(f"Tag update failed: {ex}", "error")
-                return redirect(url_for("tags_list"))
+                return redirect(url_for("tags_list", **view_args))
 
-        tags = get_tag_table(lang)
-        return render_template("tags.html", tags=tags)
+        try:
+            page = int(request.args.get("page") or 1)
+            per_page = int(request.args.get("per_page") or 50)
+        except ValueError:
+            page, per_page = 1, 50
+        table = get_tag_table(
+            lang,
+            q=request.args.get("q") or "",
+            sort=request.args.get("sort") or "slug",
+            direction=request.args.get("dir") or "asc",
+            page=page,
+            per_page=min(per_page, 200),
+        )
+        duplicates = tag_duplicates.get()
+        return render_template(
+            "tags.html",
+            table=table,
+            tags=table.rows,
+            sorts=TAG_TABLE_SORTS,
+            duplicates=duplicates[:20],
+            duplicate_count=len(duplicates),
+        )
 
     @app.route("/api/tags")
     def api_tags():
-        """JSON API endpoint for tag autocomplete."""
-        lang = current_language()
-        tags = get_all_tags_for_autocomplete(lang)
-        return jsonify(tags)
+        """
+        JSON API endpoint for tag autocomplete: ?q=<prefix>&lang=<label language>&limit=<n>.
+        Matches slugs, translations and aliases in every language; most used tags first.
+        """
+        lang = request.args.get("lang") or current_language()
+        if lang not in SUPPORTED_LANGUAGES:
+            lang = current_language()
+        q = request.args.get("q") or ""
+        limit = min(max(request.args.get("limit", 20, type=int) or 20, 1), 100)
+
+        index = tag_search.get()
+        etag = index.etag(lang, limit, q)
+        if request.if_none_match.contains(etag):
+            resp = app.response_class(status=304)
+        else:
+            resp = jsonify(index.rows(q, lang, limit))
+        resp.set_etag(etag)
+        resp.headers["Cache-Control"] = "no-cache"
+        return resp
 
     @app.route("/person/<person>/batch-tag", methods=["POST"])
     def batch_tag_assign(person: str):
@@ -1050,7 +1358,8 @@ def create_app(*, repo_root: Path) -> Flask:
         p = PersonEntity.query.filter_by(slug=person).first_or_404()
         lang = current_language()
         
-        tag_id = request.form.get("tag_id", type=int)
+        # tag_id, or the slug/label typed into the autocomplete field
+        tag_id = request.form.get("tag_id", type=int) or tag_search.find(request.form.get("tag") or "")
         entry_keys = request.form.getlist("entry_keys")  # Format: "section:stable_id"
         
         if not tag_id:
@@ -1114,12 +1423,19 @@ def create_app(*, repo_root: Path) -> Flask:
 
         # Tags without translations in some languages
         tag_rows = []
-        for t in Tag.query.order_by(Tag.slug.asc()).all():
-            tr = {x.lang_code for x in TagTranslation.query.filter_by(tag_id=t.id).all()}
-            missing_tr = [l for l in SUPPORTED_LANGUAGES if l not in tr]
+        labels = tag_labels.get()
+        for tag_id, slug in sorted(labels.slugs.items(), key=lambda kv: kv[1]):
+            missing_tr = [l for l in SUPPORTED_LANGUAGES if (tag_id, l) not in labels.labels]
             if missing_tr:
-                tag_rows.append({"slug": t.slug, "tag_id": t.id, "missing": missing_tr})
+                tag_rows.append({"slug": slug, "tag_id": tag_id, "missing": missing_tr})
 
-        return render_template("diagnostics.html", missing_translations=rows, tags_missing_translations=tag_rows)
+        return render_template(
+            "diagnostics.html",
+            missing_translations=rows,
+            tags_missing_translations=tag_rows,
+            export_cache_stats=export_cache.stats(),
+            tag_label_stats=tag_labels.stats(),
+            tag_search_stats=tag_search.stats(),
+        )
 
     return app
@@ -1,26 +1,47 @@
 from __future__ import annotations
 
+import hashlib
+import io
 import json
 import logging
+import multiprocessing
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from datetime import datetime
+from itertools import groupby
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
 
-from .models import db, PersonEntity, CVVariant, Entry, Tag, TagTranslation, TagAlias, EntityTag
+from flask import current_app
+
+from .models import db, PersonEntity, CVVariant, Entry, Tag, TagTranslation, TagAlias, EntityTag, ImportHistory, ExportPreset
 from .fields import (
     SUPPORTED_LANGUAGES,
     SECTION_ORDER,
     stable_uuid,
+    entry_fingerprint,
     infer_lang_from_filename,
     infer_resume_key_from_filename,
     summarize_entry,
     skills_flatten,
     skills_group,
+    slugify,
 )
-from .tagging import resolve_or_create_tag, attach_tag
+from .tagging import TagResolver
+from .export_cache import export_cache, bump_generation
+from .export_store import TS_FORMAT, ExportStore, StoredExport
+from .json_codec import codec
+from .tag_index import tag_index
+from .tag_query import TagFilter, parse_tag_query, selected_tag_ids
+from .url_rewrite import UrlRewriter, UrlRewriteTally
 
 logger = logging.getLogger(__name__)
 
+# Optional export stage applied to the config and every exported item (e.g. UrlRewriteTally)
+RewriteFn = Callable[[Any], Any]
+
 
 def ensure_person(resume_key: str) -> PersonEntity:
     p = PersonEntity.query.filter_by(slug=resume_key).first()
@@ -43,87 +64,63 @@ def upsert_variant(person: PersonEntity, resume_key: str, lang_code: str, source
     return v
 
 
-def cleanup_orphaned_entity_tags(person_id: int, section: str, stable_id: str) -> bool:
+def cleanup_orphaned_entity_tags(person_id: int, section: Optional[str] = None, stable_id: Optional[str] = None) -> int:
     """
-    Clean up EntityTag links for a (person, section, stable_id) if no entries remain.
-    Returns True if EntityTags were deleted, False otherwise.
+    Delete EntityTag links of a person whose (section, stable_id) has no entry left in ANY language.
+    One anti-join DELETE; optionally narrowed to a section and/or stable_id.
+    Returns the number of links deleted.
     """
-    # Check if any entries with this stable_id still exist
-    remaining = Entry.query.filter_by(
-        person_id=person_id, section=section, stable_id=stable_id
-    ).first()
-    if remaining is None:
-        # No entries with this stable_id remain; delete associated EntityTag links
-        count = EntityTag.query.filter_by(
-            person_id=person_id, section=section, stable_id=stable_id
-        ).delete(synchronize_session=False)
-        return count > 0
-    return False
+    has_entry = (
+        db.session.query(Entry.id)
+        .filter(
+            Entry.person_id == EntityTag.person_id,
+            Entry.section == EntityTag.section,
+            Entry.stable_id == EntityTag.stable_id,
+        )
+        .exists()
+    )
+    q = EntityTag.query.filter(EntityTag.person_id == person_id, ~has_entry)
+    if section is not None:
+        q = q.filter(EntityTag.section == section)
+    if stable_id is not None:
+        q = q.filter(EntityTag.stable_id == stable_id)
+    return q.delete(synchronize_session=False)
 
 
-def _wipe_variant_entries(person_id: int, lang_code: str) -> None:
-    # Collect stable_ids being deleted in this language
-    entries_to_delete = Entry.query.filter_by(person_id=person_id, lang_code=lang_code).all()
-    stable_ids_to_check = {(e.section, e.stable_id) for e in entries_to_delete}
-    
-    # Delete the entries
-    Entry.query.filter_by(person_id=person_id, lang_code=lang_code).delete(synchronize_session=False)
-    
-    # Clean up orphaned EntityTag links for stable_ids that no longer exist in ANY language
-    for section, stable_id in stable_ids_to_check:
-        cleanup_orphaned_entity_tags(person_id, section, stable_id)
+def _wipe_variant_entries(person_id: int, lang_code: str) -> int:
+    """
+    Delete all entries of a language variant and their orphaned tag links.
+    Returns the number of entries deleted.
+    """
+    deleted = Entry.query.filter_by(person_id=person_id, lang_code=lang_code).delete(synchronize_session=False)
+    if deleted:
+        # Clean up EntityTag links for stable_ids that no longer exist in ANY language
+        cleanup_orphaned_entity_tags(person_id)
+    return deleted
 
 
-def import_cv_json_bytes(
-    file_bytes: bytes,
-    filename: str,
-    *,
-    import_mode: str = "merge",
-) -> Tuple[str, str, int, List[str]]:
+def _build_entry_rows(cv: Dict[str, Any], resume_key: str) -> Tuple[List[Dict[str, Any]], List[str]]:
     """
-    Import one CV JSON file into DB.
-    Returns: (resume_key, lang_code, entry_count, warnings)
+    Flatten a parsed CV document into entry rows ready to be written.
+    Each row holds section, stable_id, sort_order, cleaned data, summary and the raw type_key.
+    Returns: (rows, warnings)
     """
     warnings: List[str] = []
-    cv = json.loads(file_bytes.decode("utf-8"))
-
-    lang = infer_lang_from_filename(filename)
-    resume_key = infer_resume_key_from_filename(filename)
-
-    person = ensure_person(resume_key)
+    rows: List[Dict[str, Any]] = []
 
-    # overwrite mode wipes entries for that language variant
-    if import_mode == "overwrite":
-        _wipe_variant_entries(person.id, lang)
-
-    variant = upsert_variant(person, resume_key, lang, filename, cv.get("config"))
-
-    entry_count = 0
-
-    # Helper to create/update entry row
-    def upsert_entry(section: str, stable_id: str, sort_order: int, payload: Dict[str, Any]) -> Entry:
-        nonlocal entry_count
-        e = Entry.query.filter_by(person_id=person.id, lang_code=lang, section=section, stable_id=stable_id).first()
-        if e is None:
-            e = Entry(
-                person_id=person.id,
-                resume_key=resume_key,
-                lang_code=lang,
-                section=section,
-                stable_id=stable_id,
-                sort_order=sort_order,
-                data={},
-            )
-            db.session.add(e)
-            entry_count += 1
-        e.sort_order = sort_order
+    def add_row(section: str, stable_id: str, sort_order: int, payload: Dict[str, Any]) -> None:
         # Strip type_key from stored data - tags are managed via EntityTag links
         clean_payload = {k: v for k, v in (payload or {}).items() if k != "type_key"}
-        e.data = clean_payload
-        e.summary = summarize_entry(section, e.data)
-        return e
+        rows.append({
+            "section": section,
+            "stable_id": stable_id,
+            "sort_order": sort_order,
+            "data": clean_payload,
+            "summary": summarize_entry(section, clean_payload),
+            "fingerprint": entry_fingerprint(sort_order, clean_payload),
+            "type_key": (payload or {}).get("type_key"),
+        })
 
-    # Import each section
     for section in SECTION_ORDER:
         if section not in cv:
             continue
@@ -133,9 +130,7 @@ def import_cv_json_bytes(
             for i, item in enumerate(flat):
                 # stable key by category + skill name
                 key = f"{item.get('parent_category','')}|{item.get('sub_category','')}|{item.get('short_name') or item.get('long_name') or i}"
-                sid = stable_uuid(resume_key, "skills", key)
-                e = upsert_entry("skills", sid, i, item)
-                _import_tags_from_payload(person.id, "skills", sid, item, lang, warnings)
+                add_row("skills", stable_uuid(resume_key, "skills", key), i, item)
             continue
 
         if section == "workshop_and_certifications":
@@ -155,9 +150,7 @@ def import_cv_json_bytes(
                     payload = dict(cert)
                     payload["issuer"] = issuer
                     key = f"{issuer_i}:{cert_i}:{payload.get('name') or cert_i}"
-                    sid = stable_uuid(resume_key, section, key)
-                    e = upsert_entry(section, sid, idx, payload)
-                    _import_tags_from_payload(person.id, section, sid, payload, lang, warnings)
+                    add_row(section, stable_uuid(resume_key, section, key), idx, payload)
                     idx += 1
             continue
 
@@ -167,24 +160,435 @@ def import_cv_json_bytes(
             for i, item in enumerate(sec_val):
                 if not isinstance(item, dict):
                     continue
-                sid = stable_uuid(resume_key, section, str(i))
-                e = upsert_entry(section, sid, i, item)
-                _import_tags_from_payload(person.id, section, sid, item, lang, warnings)
+                add_row(section, stable_uuid(resume_key, section, str(i)), i, item)
         elif isinstance(sec_val, dict):
-            sid = stable_uuid(resume_key, section, "0")
-            e = upsert_entry(section, sid, 0, sec_val)
-            _import_tags_from_payload(person.id, section, sid, sec_val, lang, warnings)
+            add_row(section, stable_uuid(resume_key, section, "0"), 0, sec_val)
         else:
             warnings.append(f"Section {section}: unsupported type {type(sec_val)}")
 
-    variant.entry_count = Entry.query.filter_by(person_id=person.id, lang_code=lang).count()
+    return rows, warnings
+
+
+def _write_entry_rows(person: PersonEntity, resume_key: str, lang_code: str, rows: List[Dict[str, Any]]) -> Tuple[int, Dict[str, int]]:
+    """
+    Write entry rows for one (person, lang) with set-based statements.
+    Existing entries are loaded once as (section, stable_id) -> (id, fingerprint); new rows go
+    out as one bulk INSERT and changed ones as one bulk UPDATE by primary key. Rows whose
+    fingerprint matches are left alone, so their updated_at keeps meaning "last real change".
+    Returns (entries in the variant after the write, {inserted, updated, unchanged} counts).
+    """
+    existing: Dict[Tuple[str, str], Tuple[int, Optional[str]]] = {
+        (section, stable_id): (entry_id, fingerprint)
+        for entry_id, section, stable_id, fingerprint in db.session.query(
+            Entry.id, Entry.section, Entry.stable_id, Entry.fingerprint
+        )
+        .filter(Entry.person_id == person.id, Entry.lang_code == lang_code)
+        .all()
+    }
+
+    # Later rows win when a file repeats the same stable key (e.g. duplicate skills)
+    latest: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for row in rows:
+        latest[(row["section"], row["stable_id"])] = row
+
+    inserts: List[Dict[str, Any]] = []
+    updates: List[Dict[str, Any]] = []
+    unchanged = 0
+    now = datetime.utcnow()
+    for key, row in latest.items():
+        values = {
+            "sort_order": row["sort_order"],
+            "data": row["data"],
+            "summary": row["summary"],
+            "fingerprint": row["fingerprint"],
+        }
+        found = existing.get(key)
+        if found is None:
+            inserts.append({
+                "person_id": person.id,
+                "resume_key": resume_key,
+                "lang_code": lang_code,
+                "section": row["section"],
+                "stable_id": row["stable_id"],
+                **values,
+            })
+        elif found[1] == row["fingerprint"]:
+            unchanged += 1
+        else:
+            updates.append({"id": found[0], "updated_at": now, **values})
+
+    if inserts:
+        db.session.execute(db.insert(Entry), inserts)
+    if updates:
+        db.session.execute(db.update(Entry), updates)
+
+    stats = {"inserted": len(inserts), "updated": len(updates), "unchanged": unchanged}
+    return len(existing) + len(inserts), stats
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _section_hashes(rows: List[Dict[str, Any]]) -> Dict[str, str]:
+    """
+    Hash the rows of each section so unchanged sections can be skipped on re-import.
+    """
+    by_section: Dict[str, List[Dict[str, Any]]] = {}
+    for row in rows:
+        by_section.setdefault(row["section"], []).append(row)
+    return {
+        section: content_hash(json.dumps(sec_rows, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8"))
+        for section, sec_rows in by_section.items()
+    }
+
+
+@dataclass
+class FileImportResult:
+    filename: str
+    resume_key: str = ""
+    lang_code: str = ""
+    entry_count: int = 0
+    warnings: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    # skipped: the whole file matched the stored content hash
+    skipped: bool = False
+    skipped_sections: List[str] = field(default_factory=list)
+    # inserted / updated / unchanged / deleted entry counts
+    stats: Dict[str, int] = field(default_factory=dict)
+
+
+def parse_cv_file(filename: str, source: Union[bytes, Path]) -> Dict[str, Any]:
+    """
+    CPU-side half of an import: decode JSON and build entry rows without touching the DB.
+    source is either the raw file bytes or a path to read them from.
+    Safe to run in a worker process; the result is plain picklable data.
+    """
+    file_bytes = source.read_bytes() if isinstance(source, Path) else source
+    cv = codec.loads(file_bytes)
+    resume_key = infer_resume_key_from_filename(filename)
+    rows, warnings = _build_entry_rows(cv, resume_key)
+    return {
+        "filename": filename,
+        "resume_key": resume_key,
+        "lang_code": infer_lang_from_filename(filename),
+        "config": cv.get("config"),
+        "rows": rows,
+        "warnings": warnings,
+        "content_hash": content_hash(file_bytes),
+        "section_hashes": _section_hashes(rows),
+    }
+
+
+def import_parsed_cv(parsed: Dict[str, Any], *, import_mode: str = "merge", resolver: Optional[TagResolver] = None) -> FileImportResult:
+    """
+    DB-side half of an import: write the output of parse_cv_file and commit.
+    In merge mode a file whose content hash matches the variant is skipped entirely,
+    and sections whose hash matches the previous import are not rewritten.
+    Pass a TagResolver to share tag lookups across several files.
+    """
+    resume_key = parsed["resume_key"]
+    lang = parsed["lang_code"]
+    rows = parsed["rows"]
+    section_hashes: Dict[str, str] = parsed["section_hashes"]
+    warnings: List[str] = list(parsed["warnings"])
+
+    person = ensure_person(resume_key)
+
+    previous_hashes: Dict[str, str] = {}
+    if import_mode != "overwrite":
+        variant = CVVariant.query.filter_by(person_id=person.id, lang_code=lang).first()
+        if variant is not None and variant.content_hash == parsed["content_hash"]:
+            return FileImportResult(
+                parsed["filename"], resume_key, lang, variant.entry_count, warnings,
+                skipped=True, stats={"unchanged": variant.entry_count},
+            )
+        if variant is not None:
+            previous_hashes = dict(variant.section_hashes or {})
+
+    # overwrite mode wipes entries for that language variant
+    deleted = 0
+    if import_mode == "overwrite":
+        deleted = _wipe_variant_entries(person.id, lang)
+
+    variant = upsert_variant(person, resume_key, lang, parsed["filename"], parsed["config"])
+
+    skipped_sections = [sec for sec, h in section_hashes.items() if previous_hashes.get(sec) == h]
+    skipped_rows = 0
+    if skipped_sections:
+        kept = [row for row in rows if row["section"] not in skipped_sections]
+        skipped_rows = len(rows) - len(kept)
+        rows = kept
+
+    variant.entry_count, stats = _write_entry_rows(person, resume_key, lang, rows)
+    stats["unchanged"] += skipped_rows
+    stats["deleted"] = deleted
+
+    resolver = resolver or TagResolver()
+    for row in rows:
+        _import_tags_from_payload(person.id, row["section"], row["stable_id"], row, lang, warnings, resolver)
+    resolver.flush()
+
+    variant.content_hash = parsed["content_hash"]
+    variant.section_hashes = section_hashes
+    bump_generation([person.id])
     db.session.commit()
-    return resume_key, lang, variant.entry_count, warnings
+    return FileImportResult(
+        parsed["filename"], resume_key, lang, variant.entry_count, warnings,
+        skipped_sections=skipped_sections, stats=stats,
+    )
+
+
+def invalidate_import_hashes(person_id: int, lang_code: str, section: Optional[str] = None) -> None:
+    """
+    Forget stored import hashes after an entry was edited outside of an import,
+    so the next re-import of the source file rewrites it again.
+    With a section, only that section's hash (and the whole-file hash) is dropped.
+    """
+    variant = CVVariant.query.filter_by(person_id=person_id, lang_code=lang_code).first()
+    if variant is None:
+        return
+    variant.content_hash = None
+    if section is None:
+        variant.section_hashes = None
+    elif variant.section_hashes and section in variant.section_hashes:
+        variant.section_hashes = {k: v for k, v in variant.section_hashes.items() if k != section}
 
 
-def _import_tags_from_payload(person_id: int, section: str, stable_id: str, payload: Dict[str, Any], lang_code: str, warnings: List[str]) -> None:
+@dataclass
+class StoredUrlRewrite:
+    """Outcome of rewrite_stored_urls; tally.counts holds the replacements per old URL."""
+    tally: UrlRewriteTally
+    entries_changed: int = 0
+    configs_changed: int = 0
+    persons_changed: int = 0
+    dry_run: bool = False
+
+
+def rewrite_stored_urls(rewriter: UrlRewriter, *, dry_run: bool = False, batch_size: int = 500) -> StoredUrlRewrite:
     """
-    Reads payload['type_key'] if present and attaches those tags to (person, section, stable_id).
+    Apply a URL map to the stored data of every entry and variant config.
+    Entries are read from one cursor in batches; changed rows are written back with bulk UPDATEs
+    (summary and fingerprint recomputed), the import hashes of their variants are dropped so a
+    re-import of the old source file is not skipped, and the persons' generations are bumped.
+    With dry_run, only the counts are computed. Commits unless dry_run.
+    """
+    tally = rewriter.tally()
+    result = StoredUrlRewrite(tally, dry_run=dry_run)
+    now = datetime.utcnow()
+
+    updates: List[Dict[str, Any]] = []
+    touched: Set[Tuple[int, str, Optional[str]]] = set()
+    q = db.select(
+        Entry.id, Entry.person_id, Entry.lang_code, Entry.section, Entry.sort_order, Entry.data
+    ).execution_options(yield_per=batch_size)
+    for row in db.session.execute(q):
+        data = tally(row.data or {})
+        if data is row.data:
+            continue
+        updates.append({
+            "id": row.id,
+            "data": data,
+            "summary": summarize_entry(row.section, data),
+            "fingerprint": entry_fingerprint(row.sort_order, data),
+            "updated_at": now,
+        })
+        touched.add((row.person_id, row.lang_code, row.section))
+
+    config_updates: List[Dict[str, Any]] = []
+    for variant_id, person_id, lang_code, config in db.session.query(
+        CVVariant.id, CVVariant.person_id, CVVariant.lang_code, CVVariant.config
+    ).filter(CVVariant.config.isnot(None)):
+        new_config = tally(config)
+        if new_config is not config:
+            config_updates.append({"id": variant_id, "config": new_config})
+            touched.add((person_id, lang_code, None))
+
+    result.entries_changed = len(updates)
+    result.configs_changed = len(config_updates)
+    result.persons_changed = len({person_id for person_id, _, _ in touched})
+    if dry_run or not touched:
+        return result
+
+    for i in range(0, len(updates), batch_size):
+        db.session.execute(db.update(Entry), updates[i:i + batch_size])
+    if config_updates:
+        db.session.execute(db.update(CVVariant), config_updates)
+    for person_id, lang_code, section in touched:
+        if section is None:
+            # the config is not covered by a section hash, only by the whole-file hash
+            db.session.query(CVVariant).filter_by(person_id=person_id, lang_code=lang_code).update(
+                {CVVariant.content_hash: None}, synchronize_session=False
+            )
+        else:
+            invalidate_import_hashes(person_id, lang_code, section)
+    bump_generation({person_id for person_id, _, _ in touched})
+    db.session.commit()
+    logger.info(
+        f"Rewrote URLs in {result.entries_changed} entries and {result.configs_changed} configs: {tally.summary()}"
+    )
+    return result
+
+
+def import_cv_json_bytes(
+    file_bytes: bytes,
+    filename: str,
+    *,
+    import_mode: str = "merge",
+) -> Tuple[str, str, int, List[str], Dict[str, int]]:
+    """
+    Import one CV JSON file into DB.
+    Returns: (resume_key, lang_code, entry_count, warnings, stats)
+    stats has the inserted / updated / unchanged / deleted entry counts.
+    """
+    r = import_parsed_cv(parse_cv_file(filename, file_bytes), import_mode=import_mode)
+    return r.resume_key, r.lang_code, r.entry_count, r.warnings, r.stats
+
+
+def import_cv_files(
+    sources: Sequence[Tuple[str, Union[bytes, Path]]],
+    *,
+    import_mode: str = "merge",
+    max_workers: Optional[int] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> List[FileImportResult]:
+    """
+    Import many CV files: parsing runs in a (spawned) process pool, writes happen here in a single writer.
+    sources is a list of (filename, bytes-or-path). Results come back in input order.
+    In merge mode, files whose bytes match the stored content hash are skipped before parsing.
+    A single file (or max_workers=1) is parsed inline to skip the pool start-up cost.
+    progress, if given, is called as progress(files_done, files_total) after each file.
+    """
+    results: Dict[int, FileImportResult] = {}
+    if not sources:
+        return []
+
+    pending: List[Tuple[int, str, Union[bytes, Path]]] = list(
+        (i, filename, source) for i, (filename, source) in enumerate(sources)
+    )
+    if import_mode != "overwrite":
+        known = {
+            (resume_key, lang): (h, count)
+            for resume_key, lang, h, count in db.session.query(
+                CVVariant.resume_key, CVVariant.lang_code, CVVariant.content_hash, CVVariant.entry_count
+            ).filter(CVVariant.content_hash.isnot(None)).all()
+        }
+        still_pending = []
+        for i, filename, source in pending:
+            key = (infer_resume_key_from_filename(filename), infer_lang_from_filename(filename))
+            if key in known:
+                try:
+                    source = source.read_bytes() if isinstance(source, Path) else source
+                except OSError as ex:
+                    results[i] = FileImportResult(filename=filename, error=str(ex))
+                    continue
+                stored_hash, count = known[key]
+                if content_hash(source) == stored_hash:
+                    results[i] = FileImportResult(filename, key[0], key[1], count, skipped=True, stats={"unchanged": count})
+                    continue
+            still_pending.append((i, filename, source))
+        pending = still_pending
+    if progress:
+        progress(len(results), len(sources))
+
+    resolver = TagResolver()
+
+    def write(i: int, filename: str, parse: Callable[[], Dict[str, Any]]) -> None:
+        nonlocal resolver
+        try:
+            parsed = parse()
+        except Exception as ex:
+            results[i] = FileImportResult(filename=filename, error=str(ex))
+        else:
+            try:
+                results[i] = import_parsed_cv(parsed, import_mode=import_mode, resolver=resolver)
+            except Exception as ex:
+                db.session.rollback()
+                # tags queued or flushed by the failed file were rolled back with it
+                resolver = TagResolver()
+                results[i] = FileImportResult(filename=filename, error=str(ex))
+        if progress:
+            progress(len(results), len(sources))
+
+    def run_inline() -> None:
+        for i, filename, source in pending:
+            write(i, filename, lambda: parse_cv_file(filename, source))
+
+    if len(pending) <= 1 or max_workers == 1:
+        run_inline()
+        return [results[i] for i in range(len(sources))]
+
+    try:
+        # spawn, not fork: this runs on job and watcher threads of a threaded server, and a forked
+        # child would inherit locks (DB pool, logging, imports) held by other threads
+        pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+    except (OSError, NotImplementedError) as ex:
+        logger.warning(f"Process pool unavailable ({ex}), parsing imports inline")
+        run_inline()
+        return [results[i] for i in range(len(sources))]
+
+    with pool:
+        futures = [(i, filename, pool.submit(parse_cv_file, filename, source)) for i, filename, source in pending]
+        for i, filename, fut in futures:
+            write(i, filename, fut.result)
+    return [results[i] for i in range(len(sources))]
+
+
+def import_totals(results: Sequence[FileImportResult]) -> Dict[str, int]:
+    """Entry counts summed over successful results, plus the number of files skipped as unchanged."""
+    totals = {"inserted": 0, "updated": 0, "unchanged": 0, "deleted": 0, "skipped_files": 0}
+    for r in results:
+        if r.error is not None:
+            continue
+        for k, v in r.stats.items():
+            totals[k] = totals.get(k, 0) + v
+        if r.skipped:
+            totals["skipped_files"] += 1
+    return totals
+
+
+def record_import_history(results: List[FileImportResult], *, overwrite: bool = False) -> ImportHistory:
+    """
+    Write (and commit) an ImportHistory row with a per-file log for a batch of import results.
+    """
+    success = 0
+    errors = 0
+    logs: List[str] = []
+    for r in results:
+        if r.error is not None:
+            errors += 1
+            logs.append(f"ERROR importing {r.filename}: {r.error}")
+            continue
+        success += 1
+        if r.skipped:
+            logs.append(f"Skipped {r.filename}: unchanged since last import ({r.entry_count} entries).")
+            continue
+        st = r.stats
+        logs.append(
+            f"Imported {r.filename} as {r.resume_key} [{r.lang_code}] ({r.entry_count} entries: "
+            f"{st.get('inserted', 0)} inserted, {st.get('updated', 0)} updated, "
+            f"{st.get('unchanged', 0)} unchanged, {st.get('deleted', 0)} deleted)."
+        )
+        if r.skipped_sections:
+            logs.append(f"  Unchanged sections skipped: {', '.join(r.skipped_sections)}")
+        for w in r.warnings:
+            logs.append(f"  WARN: {w}")
+
+    h = ImportHistory(
+        files_count=len(results),
+        overwrite=overwrite,
+        success_count=success,
+        error_count=errors,
+        log="\n".join(logs),
+    )
+    db.session.add(h)
+    db.session.commit()
+    return h
+
+
+def _import_tags_from_payload(person_id: int, section: str, stable_id: str, payload: Dict[str, Any], lang_code: str, warnings: List[str], resolver: TagResolver) -> None:
+    """
+    Reads payload['type_key'] if present and queues those tags on (person, section, stable_id) in the resolver.
     """
     type_key = payload.get("type_key")
     if not type_key:
@@ -196,8 +600,8 @@ def _import_tags_from_payload(person_id: int, section: str, stable_id: str, payl
         if not isinstance(label, str) or not label.strip():
             continue
         try:
-            t = resolve_or_create_tag(label.strip(), lang_code)
-            attach_tag(person_id, section, stable_id, t.id)
+            slug = resolver.resolve(label.strip(), lang_code)
+            resolver.attach(person_id, section, stable_id, slug)
         except Exception as ex:
             warnings.append(f"Failed to import tag '{label}': {ex}")
 
@@ -206,113 +610,133 @@ def export_variant_to_json(resume_key: str, lang_code: str, export_language: str
     """
     Reconstruct the original CV JSON shape for a person+lang from the database.
     Tags are exported into 'type_key' in export_language (fallback: slug).
+    Results are cached per (person, lang, export_language, generation); treat them as read-only.
     """
-    person = PersonEntity.query.filter_by(slug=resume_key).first()
-    if not person:
+    found = db.session.query(PersonEntity.id, PersonEntity.generation).filter_by(slug=resume_key).first()
+    if not found:
         raise ValueError(f"Unknown person: {resume_key}")
 
-    variant = CVVariant.query.filter_by(person_id=person.id, lang_code=lang_code).first()
+    return _cached_variant_export(found.id, found.generation, lang_code, export_language)
+
+
+def _export_cache_key(person_id: int, generation: int, lang_code: str, export_language: str) -> Tuple[Any, ...]:
+    # the engine URL keeps apps on different databases (e.g. tests) apart in the shared cache
+    return (str(db.engine.url), person_id, lang_code, export_language, generation)
+
+
+def _cached_variant_export(person_id: int, generation: int, lang_code: str, export_language: str) -> Dict[str, Any]:
+    key = _export_cache_key(person_id, generation, lang_code, export_language)
+    out = export_cache.get(key)
+    if out is None:
+        out = _build_variant_export(person_id, lang_code, export_language)
+        export_cache.put(key, out)
+    return out
+
+
+def _build_variant_export(person_id: int, lang_code: str, export_language: str) -> Dict[str, Any]:
+    variant = CVVariant.query.filter_by(person_id=person_id, lang_code=lang_code).first()
     config = variant.config if variant else None
 
     out: Dict[str, Any] = {}
     if config is not None:
         out["config"] = config
 
-    # Build tag map for stable groups
-    tag_map = _tag_map_for_person(person.id, export_language)
+    # One query for all sections; SECTION_ORDER is applied while grouping
+    entries = (
+        Entry.query.filter_by(person_id=person_id, lang_code=lang_code)
+        .order_by(Entry.section.asc(), Entry.sort_order.asc(), Entry.id.asc())
+        .all()
+    )
+    if not entries:
+        return out
 
-    # basics etc
-    for section in SECTION_ORDER:
-        entries = Entry.query.filter_by(person_id=person.id, lang_code=lang_code, section=section).order_by(Entry.sort_order.asc(), Entry.id.asc()).all()
-        if not entries:
-            continue
+    tag_map = _tag_map_for_person(person_id, export_language)
+    out.update(_assemble_sections(_group_by_section(entries), tag_map))
+    return out
 
-        if section == "skills":
-            # rebuild nested
-            skills_obj: Dict[str, Dict[str, List[dict]]] = {}
-            for e in entries:
-                d = dict(e.data or {})
-                # inject exported tags - always use tag_map, never fallback to raw type_key
-                d["type_key"] = tag_map.get((section, e.stable_id), [])
-                parent = d.pop("parent_category", "Other")
-                sub = d.pop("sub_category", "Other")
-                skills_obj.setdefault(parent, {}).setdefault(sub, []).append(d)
-            out["skills"] = skills_obj
-            continue
 
-        if section == "workshop_and_certifications":
-            # rebuild issuer blocks
-            blocks: Dict[str, List[dict]] = {}
-            order: List[str] = []
-            for e in entries:
-                d = dict(e.data or {})
-                # always use tag_map, never fallback to raw type_key
-                d["type_key"] = tag_map.get((section, e.stable_id), [])
-                issuer = d.pop("issuer", "") or "Unknown"
-                if issuer not in blocks:
-                    blocks[issuer] = []
-                    order.append(issuer)
-                blocks[issuer].append(d)
-            out_list: List[dict] = []
-            for issuer in order:
-                out_list.append({"issuer": issuer, "certifications": blocks[issuer]})
-            out[section] = out_list
-            continue
+def _group_by_section(entries: Sequence[Entry]) -> Dict[str, List[Entry]]:
+    """Group entries by section, keeping their (sort_order, id) order within each section."""
+    by_section: Dict[str, List[Entry]] = {}
+    for e in sorted(entries, key=lambda e: (e.sort_order, e.id)):
+        by_section.setdefault(e.section, []).append(e)
+    return by_section
 
-        # list-like in JSON: basics is list in your files, even if 1 item
-        if section == "basics":
-            items = []
-            for e in entries:
-                d = dict(e.data or {})
-                # basics doesn't have type_key typically, but keep consistent
-                items.append(d)
-            out["basics"] = items
-            continue
 
-        # all other sections are list
-        items = []
-        for e in entries:
-            d = dict(e.data or {})
-            # always use tag_map, never fallback to raw type_key
-            d["type_key"] = tag_map.get((section, e.stable_id), [])
-            items.append(d)
-        out[section] = items
+# Sections whose JSON shape regroups the flat entries (they cannot be streamed item by item)
+GROUPED_SECTIONS = ("skills", "workshop_and_certifications")
 
+
+def _export_item(section: str, e: Entry, tag_map: Dict[Tuple[str, str], List[str]]) -> Dict[str, Any]:
+    d = dict(e.data or {})
+    # always use tag_map, never fallback to raw type_key; basics has no type_key
+    if section != "basics":
+        d["type_key"] = tag_map.get((section, e.stable_id), [])
+    return d
+
+
+def _group_section_items(section: str, items: List[Dict[str, Any]]) -> Any:
+    """Rebuild the nested JSON shape of a GROUPED_SECTIONS section from its flat items."""
+    if section == "skills":
+        # rebuild nested
+        skills_obj: Dict[str, Dict[str, List[dict]]] = {}
+        for d in items:
+            parent = d.pop("parent_category", "Other")
+            sub = d.pop("sub_category", "Other")
+            skills_obj.setdefault(parent, {}).setdefault(sub, []).append(d)
+        return skills_obj
+
+    # workshop_and_certifications: rebuild issuer blocks
+    blocks: Dict[str, List[dict]] = {}
+    order: List[str] = []
+    for d in items:
+        issuer = d.pop("issuer", "") or "Unknown"
+        if issuer not in blocks:
+            blocks[issuer] = []
+            order.append(issuer)
+        blocks[issuer].append(d)
+    return [{"issuer": issuer, "certifications": blocks[issuer]} for issuer in order]
+
+
+def _assemble_sections(entries_by_section: Dict[str, List[Entry]], tag_map: Dict[Tuple[str, str], List[str]]) -> Dict[str, Any]:
+    """
+    Rebuild the original JSON shape of each section in SECTION_ORDER.
+    Every section is a list in the JSON files (basics too, even with 1 item) except skills.
+    """
+    out: Dict[str, Any] = {}
+    for section in SECTION_ORDER:
+        entries = entries_by_section.get(section)
+        if not entries:
+            continue
+        items = [_export_item(section, e, tag_map) for e in entries]
+        out[section] = _group_section_items(section, items) if section in GROUPED_SECTIONS else items
     return out
 
 
-def _tag_map_for_person(person_id: int, export_language: str) -> Dict[Tuple[str, str], List[str]]:
+def _tag_map_for_person(person_id: int, export_language: str, tag_ids: Optional[List[int]] = None) -> Dict[Tuple[str, str], List[str]]:
     """
     Returns {(section, stable_id): [labels...]} for the given person.
+    Labels come from one join of links, tags and export_language translations (fallback: slug).
+    With tag_ids, only those tags are included.
     """
-    # Collect all links in one go
-    links = EntityTag.query.filter_by(person_id=person_id).all()
-    if not links:
-        return {}
-
-    # tag translations cache
-    tr_cache: Dict[Tuple[int, str], str] = {}
-    def label_for(tag_id: int) -> str:
-        key = (tag_id, export_language)
-        if key in tr_cache:
-            return tr_cache[key]
-        tr = TagTranslation.query.filter_by(tag_id=tag_id, lang_code=export_language).first()
-        if tr:
-            tr_cache[key] = tr.label
-            return tr.label
-        t = Tag.query.get(tag_id)
-        if t:
-            logger.debug(f"Missing translation for tag '{t.slug}' (id={tag_id}) in language '{export_language}', using slug as fallback")
-            tr_cache[key] = t.slug
-            return t.slug
-        logger.warning(f"Tag with id={tag_id} not found during export, returning generic fallback 'tag'")
-        tr_cache[key] = "tag"
-        return "tag"
+    q = (
+        db.session.query(EntityTag.section, EntityTag.stable_id, Tag.slug, TagTranslation.label)
+        .join(Tag, Tag.id == EntityTag.tag_id)
+        .outerjoin(
+            TagTranslation,
+            db.and_(TagTranslation.tag_id == Tag.id, TagTranslation.lang_code == export_language),
+        )
+        .filter(EntityTag.person_id == person_id)
+    )
+    if tag_ids is not None:
+        q = q.filter(EntityTag.tag_id.in_(tag_ids))
 
     tag_map: Dict[Tuple[str, str], List[str]] = {}
-    for l in links:
-        k = (l.section, l.stable_id)
-        tag_map.setdefault(k, []).append(label_for(l.tag_id))
+    for section, stable_id, slug, label in q.all():
+        if label is None:
+            logger.debug(f"Missing translation for tag '{slug}' in language '{export_language}', using slug as fallback")
+            label = slug
+        tag_map.setdefault((section, stable_id), []).append(label)
 
     # normalize ordering
     for k in list(tag_map.keys()):
@@ -320,120 +744,356 @@ def _tag_map_for_person(person_id: int, export_language: str) -> Dict[Tuple[str,
     return tag_map
 
 
-def write_export_file(repo_root: Path, resume_key: str, lang_code: str, export_language: str, *, out_dir: Optional[Path] = None) -> Path:
+def write_export_file(
+    repo_root: Path,
+    resume_key: str,
+    lang_code: str,
+    export_language: str,
+    *,
+    out_dir: Optional[Path] = None,
+    rewrite: Optional[RewriteFn] = None,
+) -> StoredExport:
     """
-    Write an exported JSON file to output/json/.
+    Write an exported JSON file to output/json/ (content-addressed, see ExportStore).
+    If the newest export of this variant has the same content, it is returned with reused=True.
+    A payload already in the export cache is written from memory; otherwise the export is streamed.
+    rewrite, if given, is applied to the config and each item before it is written.
     """
     out_dir = out_dir or (repo_root / "output" / "json")
     out_dir.mkdir(parents=True, exist_ok=True)
+    store = ExportStore(out_dir)
+    base = f"{resume_key}_{lang_code}_export_{export_language}"
+    ts = datetime.utcnow().strftime(TS_FORMAT)
 
-    payload = export_variant_to_json(resume_key, lang_code, export_language)
-    ts = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-    out_path = out_dir / f"{resume_key}_{lang_code}_export_{export_language}_{ts}.json"
-    out_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
-    return out_path
+    found = db.session.query(PersonEntity.id, PersonEntity.generation).filter_by(slug=resume_key).first()
+    if found is not None:
+        payload = export_cache.get(_export_cache_key(found.id, found.generation, lang_code, export_language))
+        if payload is not None:
+            if rewrite is not None:
+                payload = rewrite(payload)
+            return store.store_bytes(codec.dumps(payload, indent=True, exact=True), base, ts)
 
+    chunks = stream_variant_export(resume_key, lang_code, export_language, rewrite=rewrite)
+    return store.store(chunks, base, ts)
 
-def _get_entries_with_all_tags(person_id: int, lang_code: str, tag_ids: List[int]) -> Dict[Tuple[str, str], Entry]:
+
+def selected_variants(resume_keys: Sequence[str], languages: Optional[Sequence[str]] = None) -> List[Any]:
     """
-    Get entries that have ALL the specified tags (AND logic).
-    Returns {(section, stable_id): Entry} for matching entries.
+    Existing variants of the given persons in the given languages (default: all supported), in one query.
+    Rows have slug, id (person id), generation and lang_code, sorted in (person, language) selection order.
     """
-    if not tag_ids:
-        return {}
-
-    # Find stable_ids that have ALL the required tags
-    from sqlalchemy import func
-
-    # Query for (section, stable_id) that appear with each of the required tag_ids
-    # Group by section+stable_id and count distinct tag_ids - must equal len(tag_ids)
-    matching_groups = (
-        db.session.query(EntityTag.section, EntityTag.stable_id)
-        .filter(EntityTag.person_id == person_id, EntityTag.tag_id.in_(tag_ids))
-        .group_by(EntityTag.section, EntityTag.stable_id)
-        .having(func.count(func.distinct(EntityTag.tag_id)) == len(tag_ids))
+    languages = list(languages or SUPPORTED_LANGUAGES)
+    rows = (
+        db.session.query(PersonEntity.slug, PersonEntity.id, PersonEntity.generation, CVVariant.lang_code)
+        .join(CVVariant, CVVariant.person_id == PersonEntity.id)
+        .filter(PersonEntity.slug.in_(list(resume_keys)), CVVariant.lang_code.in_(languages))
         .all()
     )
+    person_order = {k: i for i, k in enumerate(resume_keys)}
+    rows.sort(key=lambda r: (person_order[r.slug], languages.index(r.lang_code)))
+    return rows
 
-    if not matching_groups:
-        return {}
 
-    # Fetch entries for these groups
-    result: Dict[Tuple[str, str], Entry] = {}
-    for section, stable_id in matching_groups:
-        entry = Entry.query.filter_by(
-            person_id=person_id,
-            lang_code=lang_code,
-            section=section,
-            stable_id=stable_id
-        ).first()
-        if entry:
-            result[(section, stable_id)] = entry
+@dataclass
+class ExportFileResult:
+    """Outcome of exporting one variant in a batch; seconds covers building and writing."""
+    resume_key: str
+    lang_code: str
+    path: Optional[Path] = None
+    seconds: float = 0.0
+    error: Optional[str] = None
+    content_hash: Optional[str] = None
+    reused: bool = False  # unchanged since the last export, nothing written
+    preset: Optional[str] = None
 
-    return result
 
+def export_variants_batch(
+    repo_root: Path,
+    resume_keys: Sequence[str],
+    languages: Optional[Sequence[str]] = None,
+    *,
+    out_dir: Optional[Path] = None,
+    max_workers: Optional[int] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+    rewrite: Optional[RewriteFn] = None,
+) -> List[ExportFileResult]:
+    """
+    Export every existing variant of the given persons (each in its own language).
+    Variants are looked up in one query; payloads are built and written on a thread pool,
+    each worker reading through its own app context (and so its own DB connection).
+    Persons/languages without a variant are left out. Results come back in (person, language) order.
+    progress, if given, is called as progress(files_done, files_total) after each file.
+    rewrite, if given, is applied to each payload (it is called from the worker threads).
+    """
+    out_dir = out_dir or (repo_root / "output" / "json")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    ts = datetime.utcnow().strftime(TS_FORMAT)
+    store = ExportStore(out_dir)
+
+    rows = selected_variants(resume_keys, languages)
+    if not rows:
+        return []
 
-def count_entries_with_tags(resume_key: str, lang_code: str, tag_ids: List[int]) -> int:
+    def export_one(slug: str, person_id: int, generation: int, lang: str) -> ExportFileResult:
+        started = time.perf_counter()
+        try:
+            payload = _cached_variant_export(person_id, generation, lang, lang)
+            if rewrite is not None:
+                payload = rewrite(payload)
+            data = codec.dumps(payload, indent=True, exact=True)
+            stored = store.store_bytes(data, f"{slug}_{lang}_export_{lang}", ts)
+            return ExportFileResult(
+                slug, lang, stored.path, time.perf_counter() - started,
+                content_hash=stored.content_hash, reused=stored.reused,
+            )
+        except Exception as ex:
+            logger.warning(f"Export of {slug} [{lang}] failed: {ex}")
+            return ExportFileResult(slug, lang, seconds=time.perf_counter() - started, error=str(ex))
+
+    results: List[ExportFileResult] = []
+    if len(rows) == 1 or max_workers == 1:
+        for r in rows:
+            results.append(export_one(*r))
+            if progress:
+                progress(len(results), len(rows))
+        return results
+
+    app = current_app._get_current_object()
+
+    def export_in_context(*args: Any) -> ExportFileResult:
+        with app.app_context():
+            return export_one(*args)
+
+    by_index: Dict[int, ExportFileResult] = {}
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cvgen-export") as pool:
+        futures = {pool.submit(export_in_context, *r): i for i, r in enumerate(rows)}
+        for fut in as_completed(futures):
+            by_index[futures[fut]] = fut.result()
+            if progress:
+                progress(len(by_index), len(rows))
+    return [by_index[i] for i in range(len(rows))]
+
+
+class ExportSnapshot:
     """
-    Count entries that have ALL the specified tags.
+    One person's variant configs, entries (all languages) and tag links, loaded once.
+    Any number of full or tag-filtered exports are then built in memory, with the same output
+    as export_variant_to_json / export_variant_by_tags_to_json.
     """
-    person = PersonEntity.query.filter_by(slug=resume_key).first()
-    if not person:
-        return 0
-    matching = _get_entries_with_all_tags(person.id, lang_code, tag_ids)
-    return len(matching)
 
+    def __init__(self, resume_key: str) -> None:
+        found = db.session.query(PersonEntity.id, PersonEntity.generation).filter_by(slug=resume_key).first()
+        if not found:
+            raise ValueError(f"Unknown person: {resume_key}")
+        self.resume_key = resume_key
+        self.person_id = found.id
+
+        self.configs: Dict[str, Any] = dict(
+            db.session.query(CVVariant.lang_code, CVVariant.config).filter_by(person_id=found.id).all()
+        )
+
+        self.entries: Dict[str, List[Entry]] = {}
+        for e in Entry.query.filter_by(person_id=found.id).order_by(Entry.sort_order.asc(), Entry.id.asc()):
+            self.entries.setdefault(e.lang_code, []).append(e)
+
+        self.links: List[Tuple[str, str, int]] = []
+        self.slugs: Dict[int, str] = {}
+        for section, stable_id, tag_id, slug in (
+            db.session.query(EntityTag.section, EntityTag.stable_id, EntityTag.tag_id, Tag.slug)
+            .join(Tag, Tag.id == EntityTag.tag_id)
+            .filter(EntityTag.person_id == found.id)
+        ):
+            self.links.append((section, stable_id, tag_id))
+            self.slugs[tag_id] = slug
+
+        person_tags = db.session.query(EntityTag.tag_id).filter(EntityTag.person_id == found.id)
+        self.labels: Dict[Tuple[int, str], str] = {
+            (tag_id, lang): label
+            for tag_id, lang, label in db.session.query(
+                TagTranslation.tag_id, TagTranslation.lang_code, TagTranslation.label
+            ).filter(TagTranslation.tag_id.in_(person_tags))
+        }
+
+        self.index = tag_index.get(found.id, found.generation)
+        self._tag_maps: Dict[Tuple[str, Optional[Tuple[int, ...]]], Dict[Tuple[str, str], List[str]]] = {}
+
+    def languages(self) -> List[str]:
+        """Languages the person has a variant in, in SUPPORTED_LANGUAGES order."""
+        return [lang for lang in SUPPORTED_LANGUAGES if lang in self.configs]
+
+    def tag_map(self, export_language: str, tag_ids: Optional[List[int]] = None) -> Dict[Tuple[str, str], List[str]]:
+        """In-memory _tag_map_for_person."""
+        key = (export_language, tuple(sorted(tag_ids)) if tag_ids is not None else None)
+        tag_map = self._tag_maps.get(key)
+        if tag_map is None:
+            wanted = set(tag_ids) if tag_ids is not None else None
+            groups: Dict[Tuple[str, str], Set[str]] = {}
+            for section, stable_id, tag_id in self.links:
+                if wanted is None or tag_id in wanted:
+                    label = self.labels.get((tag_id, export_language)) or self.slugs[tag_id]
+                    groups.setdefault((section, stable_id), set()).add(label)
+            tag_map = self._tag_maps[key] = {k: sorted(v, key=lambda x: x.lower()) for k, v in groups.items()}
+        return tag_map
+
+    def export(self, lang_code: str, export_language: str, tag_filter: Optional[TagFilter] = None) -> Dict[str, Any]:
+        out: Dict[str, Any] = {}
+        config = self.configs.get(lang_code)
+        if config is not None:
+            out["config"] = config
+
+        entries = self.entries.get(lang_code, [])
+        if tag_filter is not None:
+            keep = self.index.keys_of(self.index.match(tag_filter, lang_code))
+            entries = [e for e in entries if (e.section, e.stable_id) in keep]
+        if not entries:
+            return out
 
-def _tag_map_for_entries_filtered(person_id: int, tag_ids: List[int], export_language: str) -> Dict[Tuple[str, str], List[str]]:
+        tag_map = self.tag_map(export_language, selected_tag_ids(tag_filter) if tag_filter is not None else None)
+        out.update(_assemble_sections(_group_by_section(entries), tag_map))
+        return out
+
+
+def preset_filename(pattern: str, resume_key: str, lang_code: str, preset_name: str, *, add_lang: bool = False) -> str:
     """
-    Like _tag_map_for_person, but only includes the selected tags (not all tags on entry).
-    Returns {(section, stable_id): [labels for selected tags only...]}.
+    Fill {person}, {lang} and {preset} in a preset filename pattern (path separators are replaced).
+    With add_lang, a pattern without {lang} gets "_<lang>" (before ".json"), so languages do not share a file.
     """
-    if not tag_ids:
-        return {}
+    name = (pattern or "{person}_{lang}_{preset}").strip()
+    if add_lang and "{lang}" not in name:
+        name = f"{name[:-5]}_{{lang}}.json" if name.lower().endswith(".json") else f"{name}_{{lang}}"
+    name = name.replace("{person}", resume_key).replace("{lang}", lang_code).replace("{preset}", slugify(preset_name))
+    return name.replace("/", "_").replace("\\", "_")
 
-    # Get translation labels for the selected tag_ids
-    tr_cache: Dict[int, str] = {}
-    for tag_id in tag_ids:
-        tr = TagTranslation.query.filter_by(tag_id=tag_id, lang_code=export_language).first()
-        if tr:
-            tr_cache[tag_id] = tr.label
-        else:
-            t = Tag.query.get(tag_id)
-            if t:
-                tr_cache[tag_id] = t.slug
-            else:
-                tr_cache[tag_id] = "tag"
-
-    # Get all entity-tag links for this person with the selected tags
-    links = EntityTag.query.filter(
-        EntityTag.person_id == person_id,
-        EntityTag.tag_id.in_(tag_ids)
-    ).all()
 
-    tag_map: Dict[Tuple[str, str], List[str]] = {}
-    for link in links:
-        k = (link.section, link.stable_id)
-        label = tr_cache.get(link.tag_id, "tag")
-        tag_map.setdefault(k, []).append(label)
+def plan_preset_exports(presets: Sequence[ExportPreset], languages: Sequence[str]) -> List[Tuple[ExportPreset, str]]:
+    """(preset, language) exports a preset run writes, given the languages the person has."""
+    return [
+        (preset, lang)
+        for preset in presets
+        for lang in languages
+        if not preset.languages or lang in preset.languages
+    ]
 
-    # Normalize ordering
-    for k in list(tag_map.keys()):
-        tag_map[k] = sorted(set(tag_map[k]), key=lambda x: x.lower())
 
-    return tag_map
+def run_export_presets(
+    repo_root: Path,
+    resume_key: str,
+    presets: Sequence[ExportPreset],
+    *,
+    out_dir: Optional[Path] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+    rewrite: Optional[RewriteFn] = None,
+) -> List[ExportFileResult]:
+    """
+    Write every (preset, language) export of one person from a single ExportSnapshot (see plan_preset_exports).
+    Presets without a tag query export the full variant. Languages the person lacks are skipped.
+    Files go through ExportStore: patterns without ".json" get a timestamp and unchanged content
+    is not written again; patterns ending in ".json" are replaced in place. A preset that writes
+    several languages with a pattern lacking {lang} gets "_<lang>" appended to the name.
+    """
+    out_dir = out_dir or (repo_root / "output" / "json")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    ts = datetime.utcnow().strftime(TS_FORMAT)
+    store = ExportStore(out_dir)
+    snapshot = ExportSnapshot(resume_key)
+    resolver = TagResolver()
+
+    plan = plan_preset_exports(presets, snapshot.languages())
+    lang_counts: Dict[int, int] = {}
+    for preset, _lang in plan:
+        lang_counts[id(preset)] = lang_counts.get(id(preset), 0) + 1
+
+    filters: Dict[int, Tuple[Optional[TagFilter], Optional[str]]] = {}
+    for preset in presets:
+        tag_filter: Optional[TagFilter] = None
+        error: Optional[str] = None
+        if preset.tag_query:
+            try:
+                # stored queries are canonical slugs, so the language does not matter here
+                tag_filter = parse_tag_query(preset.tag_query, SUPPORTED_LANGUAGES[0], resolver)
+            except ValueError as ex:
+                error = f"Invalid tag query: {ex}"
+        filters[id(preset)] = (tag_filter, error)
+
+    planned = [(preset, lang, *filters[id(preset)]) for preset, lang in plan]
+
+    results: List[ExportFileResult] = []
+    for preset, lang, tag_filter, error in planned:
+        started = time.perf_counter()
+        result = ExportFileResult(resume_key, lang, preset=preset.name, error=error)
+        if error is None:
+            try:
+                payload = snapshot.export(lang, lang, tag_filter)
+                if rewrite is not None:
+                    payload = rewrite(payload)
+                data = codec.dumps(payload, indent=True, exact=True)
+                name = preset_filename(
+                    preset.filename_pattern, resume_key, lang, preset.name, add_lang=lang_counts[id(preset)] > 1
+                )
+                if name.lower().endswith(".json"):
+                    stored = store.store_bytes_as(data, name)
+                else:
+                    stored = store.store_bytes(data, name, ts)
+                result.path, result.content_hash, result.reused = stored.path, stored.content_hash, stored.reused
+            except Exception as ex:
+                logger.warning(f"Preset export '{preset.name}' of {resume_key} [{lang}] failed: {ex}")
+                result.error = str(ex)
+        result.seconds = time.perf_counter() - started
+        results.append(result)
+        if progress:
+            progress(len(results), len(planned))
+    return results
+
+
+def _matching_groups(person_id: int, lang_code: str, tag_ids: TagFilter, generation: Optional[int] = None) -> Set[Tuple[str, str]]:
+    """(section, stable_id) groups with an entry in lang_code that match the tag filter, from the tag bitmap index."""
+    if generation is None:
+        generation = db.session.query(PersonEntity.generation).filter_by(id=person_id).scalar() or 0
+    index = tag_index.get(person_id, generation)
+    return index.keys_of(index.match(tag_ids, lang_code))
+
+
+def _get_matching_entries(person_id: int, lang_code: str, tag_ids: TagFilter) -> Dict[Tuple[str, str], Entry]:
+    """
+    Get entries that match the tag filter: a list of tag ids (ALL required) or a parsed tag query.
+    Returns {(section, stable_id): Entry} for matching entries.
+    """
+    keys = sorted(_matching_groups(person_id, lang_code, tag_ids))
+    result: Dict[Tuple[str, str], Entry] = {}
+    # row-value IN, chunked to stay under SQLite's bound parameter limit
+    for i in range(0, len(keys), 400):
+        for e in Entry.query.filter(
+            Entry.person_id == person_id,
+            Entry.lang_code == lang_code,
+            db.tuple_(Entry.section, Entry.stable_id).in_(keys[i:i + 400]),
+        ):
+            result[(e.section, e.stable_id)] = e
+    return result
+
+
+def count_entries_with_tags(resume_key: str, lang_code: str, tag_ids: TagFilter) -> int:
+    """
+    Count entries that match the tag filter (tag id list = ALL required, or a parsed tag query).
+    Answered from the tag bitmap index; only the person lookup hits the database while it is warm.
+    """
+    found = db.session.query(PersonEntity.id, PersonEntity.generation).filter_by(slug=resume_key).first()
+    if not found:
+        return 0
+    index = tag_index.get(found.id, found.generation)
+    return index.count(index.match(tag_ids, lang_code))
 
 
 def export_variant_by_tags_to_json(
     resume_key: str,
     lang_code: str,
     export_language: str,
-    tag_ids: List[int]
+    tag_ids: TagFilter
 ) -> Dict[str, Any]:
     """
     Export CV JSON filtered by tags.
-    - Only entries with ALL selected tags are included
-    - type_key in output only includes selected tags (not other tags the entry had)
+    - tag_ids is a list of tag ids (entries need ALL of them) or a parsed tag query (tag_query.parse_tag_query)
+    - type_key in output only includes selected tags (not other tags the entry had);
+      for a query, those are the tags it does not negate
     """
     person = PersonEntity.query.filter_by(slug=resume_key).first()
     if not person:
@@ -447,76 +1107,157 @@ def export_variant_by_tags_to_json(
         out["config"] = config
 
     # Get entries matching all tags
-    matching_entries = _get_entries_with_all_tags(person.id, lang_code, tag_ids)
+    matching_entries = _get_matching_entries(person.id, lang_code, tag_ids)
     if not matching_entries:
         return out
 
     # Get tag map with only selected tags
-    tag_map = _tag_map_for_entries_filtered(person.id, tag_ids, export_language)
+    tag_map = _tag_map_for_person(person.id, export_language, selected_tag_ids(tag_ids))
+    out.update(_assemble_sections(_group_by_section(list(matching_entries.values())), tag_map))
+    return out
 
-    # Group entries by section
-    from collections import defaultdict
-    entries_by_section: Dict[str, List[Entry]] = defaultdict(list)
-    for (section, stable_id), entry in matching_entries.items():
-        entries_by_section[section].append(entry)
 
-    # Sort entries within each section by sort_order
-    for section in entries_by_section:
-        entries_by_section[section].sort(key=lambda e: (e.sort_order, e.id))
+def _json_at(value: Any, level: int) -> str:
+    """json.dumps(indent=2) of value as it appears nested `level` deep in an indented document."""
+    return codec.dumps_text(value, indent=True, exact=True).replace("\n", "\n" + "  " * level)
 
-    # Build output
-    from .fields import SECTION_ORDER
 
-    for section in SECTION_ORDER:
-        entries = entries_by_section.get(section, [])
-        if not entries:
-            continue
+def _iter_export_chunks(
+    config: Any,
+    entries: Iterable[Entry],
+    tag_map: Dict[Tuple[str, str], List[str]],
+    rewrite: Optional[RewriteFn] = None,
+) -> Iterator[str]:
+    """
+    Yield the export document as text chunks, byte-identical to json.dumps(payload, ensure_ascii=False, indent=2).
+    entries must arrive grouped by section in SECTION_ORDER. List sections are emitted item by item;
+    only GROUPED_SECTIONS are collected before they are written.
+    """
+    first = True
 
-        if section == "skills":
-            skills_obj: Dict[str, Dict[str, List[dict]]] = {}
-            for e in entries:
-                d = dict(e.data or {})
-                d["type_key"] = tag_map.get((section, e.stable_id), [])
-                parent = d.pop("parent_category", "Other")
-                sub = d.pop("sub_category", "Other")
-                skills_obj.setdefault(parent, {}).setdefault(sub, []).append(d)
-            out["skills"] = skills_obj
-            continue
+    def item(section: str, e: Entry) -> Dict[str, Any]:
+        d = _export_item(section, e, tag_map)
+        return rewrite(d) if rewrite is not None else d
 
-        if section == "workshop_and_certifications":
-            blocks: Dict[str, List[dict]] = {}
-            order: List[str] = []
-            for e in entries:
-                d = dict(e.data or {})
-                d["type_key"] = tag_map.get((section, e.stable_id), [])
-                issuer = d.pop("issuer", "") or "Unknown"
-                if issuer not in blocks:
-                    blocks[issuer] = []
-                    order.append(issuer)
-                blocks[issuer].append(d)
-            out_list: List[dict] = []
-            for issuer in order:
-                out_list.append({"issuer": issuer, "certifications": blocks[issuer]})
-            out[section] = out_list
-            continue
+    def key(name: str) -> str:
+        nonlocal first
+        sep = "{\n  " if first else ",\n  "
+        first = False
+        return f"{sep}{json.dumps(name, ensure_ascii=False)}: "
 
-        if section == "basics":
-            items = []
-            for e in entries:
-                d = dict(e.data or {})
-                items.append(d)
-            out["basics"] = items
+    if config is not None:
+        yield key("config") + _json_at(rewrite(config) if rewrite is not None else config, 1)
+
+    for section, group in groupby(entries, key=lambda e: e.section):
+        if section in GROUPED_SECTIONS:
+            items = [item(section, e) for e in group]
+            yield key(section) + _json_at(_group_section_items(section, items), 1)
             continue
+        yield key(section) + "["
+        sep = "\n    "
+        for e in group:
+            yield sep + _json_at(item(section, e), 2)
+            sep = ",\n    "
+        yield "\n  ]"
 
-        # All other sections
-        items = []
-        for e in entries:
-            d = dict(e.data or {})
-            d["type_key"] = tag_map.get((section, e.stable_id), [])
-            items.append(d)
-        out[section] = items
+    yield "{}" if first else "\n}"
 
-    return out
+
+def stream_variant_export(
+    resume_key: str,
+    lang_code: str,
+    export_language: str,
+    tag_ids: Optional[TagFilter] = None,
+    *,
+    batch_size: int = 500,
+    rewrite: Optional[RewriteFn] = None,
+) -> Iterator[str]:
+    """
+    Streaming counterpart of export_variant_to_json / export_variant_by_tags_to_json (when tag_ids is given).
+    Entries are read from one ordered cursor in batches of batch_size, so memory stays flat for large
+    variants and the first chunk is available right away. Lookups (and the unknown-person error) happen
+    before this returns; the entry query runs when the iterator is first read, so read it inside an app context.
+    rewrite, if given, is applied to the config and to each item as it is written (see url_rewrite).
+    """
+    person = PersonEntity.query.filter_by(slug=resume_key).first()
+    if not person:
+        raise ValueError(f"Unknown person: {resume_key}")
+
+    variant = CVVariant.query.filter_by(person_id=person.id, lang_code=lang_code).first()
+    config = variant.config if variant else None
+
+    section_rank = db.case({s: i for i, s in enumerate(SECTION_ORDER)}, value=Entry.section)
+    q = db.select(Entry).where(
+        Entry.person_id == person.id, Entry.lang_code == lang_code, Entry.section.in_(SECTION_ORDER)
+    )
+    q = q.order_by(section_rank, Entry.sort_order.asc(), Entry.id.asc()).execution_options(yield_per=batch_size)
+
+    keep: Optional[Set[Tuple[str, str]]] = None
+    if tag_ids is not None:
+        keep = _matching_groups(person.id, lang_code, tag_ids, person.generation)
+        if not keep:
+            return _iter_export_chunks(config, [], {}, rewrite)
+        q = q.where(Entry.section.in_({section for section, _ in keep}))
+
+    tag_map = _tag_map_for_person(person.id, export_language, selected_tag_ids(tag_ids) if tag_ids is not None else None)
+
+    def entries() -> Iterator[Entry]:
+        # executed on first read, in the session that is current then (e.g. inside stream_with_context)
+        for e in db.session.execute(q).scalars():
+            if keep is None or (e.section, e.stable_id) in keep:
+                yield e
+
+    return _iter_export_chunks(config, entries(), tag_map, rewrite)
+
+
+class _ZipSink(io.RawIOBase):
+    """Unseekable write target for ZipFile; written bytes are collected until drained."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b: Any) -> int:
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_export_zip(
+    variants: Sequence[Tuple[str, str]],
+    tag_ids: Optional[TagFilter] = None,
+    rewrite: Optional[RewriteFn] = None,
+) -> Iterator[bytes]:
+    """
+    Yield a ZIP archive of (resume_key, lang_code) exports, built on the fly.
+    Each member is produced by stream_variant_export and compressed as it is read, and the archive
+    bytes are yielded as soon as they are written, so nothing is staged on disk and memory stays bounded.
+    With tag_ids, each member is the tag-filtered export. Run inside an app context.
+    """
+    sink = _ZipSink()
+    # unseekable target: ZipFile writes data descriptors after each member instead of seeking back
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for resume_key, lang_code in variants:
+            name = f"{resume_key}_{lang_code}_tags_export.json" if tag_ids else f"{resume_key}_{lang_code}_export_{lang_code}.json"
+            # force_zip64: the member size is unknown up front
+            with zf.open(name, "w", force_zip64=True) as member:
+                for chunk in stream_variant_export(resume_key, lang_code, lang_code, tag_ids, rewrite=rewrite):
+                    member.write(chunk.encode("utf-8"))
+                    data = sink.drain()
+                    if data:
+                        yield data
+            data = sink.drain()
+            if data:
+                yield data
+    # central directory
+    yield sink.drain()
 
 
 def write_export_file_by_tags(
@@ -524,18 +1265,20 @@ def write_export_file_by_tags(
     resume_key: str,
     lang_code: str,
     export_language: str,
-    tag_ids: List[int],
+    tag_ids: TagFilter,
     custom_filename: Optional[str] = None,
     *,
-    out_dir: Optional[Path] = None
-) -> Path:
+    out_dir: Optional[Path] = None,
+    rewrite: Optional[RewriteFn] = None,
+) -> StoredExport:
     """
     Write an exported JSON file filtered by tags with optional custom filename.
+    Stored content-addressed like write_export_file. Filtered exports are not cached, so this always streams.
     """
     out_dir = out_dir or (repo_root / "output" / "json")
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    payload = export_variant_by_tags_to_json(resume_key, lang_code, export_language, tag_ids)
+    chunks = stream_variant_export(resume_key, lang_code, export_language, tag_ids, rewrite=rewrite)
 
     if custom_filename:
         # Sanitize filename - remove path separators and ensure .json extension
@@ -543,10 +1286,7 @@ def write_export_file_by_tags(
         filename = filename.replace("/", "_").replace("\\", "_")
         if not filename.lower().endswith(".json"):
             filename += ".json"
-        out_path = out_dir / filename
-    else:
-        ts = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-        out_path = out_dir / f"{resume_key}_{lang_code}_tags_export_{ts}.json"
+        return ExportStore(out_dir).store_as(chunks, filename)
 
-    out_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
-    return out_path
+    ts = datetime.utcnow().strftime(TS_FORMAT)
+    return ExportStore(out_dir).store(chunks, f"{resume_key}_{lang_code}_tags_export", ts)
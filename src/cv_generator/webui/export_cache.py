@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .models import db, PersonEntity, EntityTag
+
+# session.info key: ids of persons bumped in the open transaction (None = every person)
+_BUMPED = "bumped_person_ids"
+
+
+def bump_generation(person_ids: Iterable[int]) -> None:
+    """
+    Mark persons as changed so cached exports built from older data are no longer used.
+    Call from every write path that can change an export (entries, tag links, tag labels).
+    """
+    ids = sorted({pid for pid in person_ids if pid is not None})
+    if not ids:
+        return
+    PersonEntity.query.filter(PersonEntity.id.in_(ids)).update(
+        {PersonEntity.generation: PersonEntity.generation + 1}, synchronize_session=False
+    )
+    _note_bumped(ids)
+
+
+def bump_generation_for_tags(tag_ids: Iterable[int]) -> None:
+    """Bump every person that has a link to one of the given tags (e.g. after a label change)."""
+    ids = sorted(set(tag_ids))
+    if not ids:
+        return
+    users = [pid for (pid,) in db.session.query(EntityTag.person_id).filter(EntityTag.tag_id.in_(ids)).distinct()]
+    bump_generation(users)
+
+
+def bump_all_generations() -> None:
+    PersonEntity.query.update({PersonEntity.generation: PersonEntity.generation + 1}, synchronize_session=False)
+    db.session.info[_BUMPED] = None
+
+
+def _note_bumped(person_ids: Iterable[int]) -> None:
+    info = db.session.info
+    if _BUMPED not in info:
+        info[_BUMPED] = set(person_ids)
+    elif info[_BUMPED] is not None:
+        info[_BUMPED].update(person_ids)
+
+
+class ExportCache:
+    """
+    Thread-safe LRU of built export payloads.
+    Keys include the person's generation, so stale entries are never returned; they just age out.
+    Cached payloads are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, maxsize: int = 256) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def discard_persons(self, engine_url: Optional[str], person_ids: Optional[Set[int]]) -> None:
+        """Drop entries of the given persons (None = all) on a database (None = any); keys start (url, person_id)."""
+        with self._lock:
+            for key in [k for k in self._data if _key_matches(k, engine_url, person_ids)]:
+                del self._data[key]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+def _key_matches(key: Any, engine_url: Optional[str], person_ids: Optional[Set[int]]) -> bool:
+    return (engine_url is None or key[0] == engine_url) and (person_ids is None or key[1] in person_ids)
+
+
+# Caches keyed by (engine url, person id, ..., generation), cleaned up by _generation_rolled_back
+_generation_caches: List[Any] = []
+
+
+def track_generation_cache(cache: Any) -> Any:
+    """Register a cache with a discard_persons(engine_url, person_ids) method. Returns the cache."""
+    _generation_caches.append(cache)
+    return cache
+
+
+export_cache = track_generation_cache(ExportCache())
+
+
+# -------------------------
+# Rollback
+# -------------------------
+@event.listens_for(Session, "after_commit")
+def _generation_committed(session: Session) -> None:
+    session.info.pop(_BUMPED, None)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _generation_rolled_back(session: Session, transaction: Any) -> None:
+    # runs after _generation_committed, so anything still noted was rolled back (or closed without
+    # a commit). Those generation numbers will be issued again for other content, so whatever was
+    # cached under them inside the transaction must go.
+    if transaction.parent is not None or _BUMPED not in session.info:
+        return
+    person_ids = session.info.pop(_BUMPED)
+    try:
+        engine_url: Optional[str] = str(session.get_bind().url)
+    except Exception:
+        engine_url = None  # no app context: drop these persons on every database
+    for cache in _generation_caches:
+        cache.discard_persons(engine_url, person_ids)
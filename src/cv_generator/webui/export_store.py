@@ -0,0 +1,311 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Blobs live next to the human-readable names, out of the way of "*.json" listings
+BLOB_DIR = ".blobs"
+
+# "<base>_<YYYYmmdd_HHMMSS>.json" - the timestamp suffix used by the exporters
+TS_FORMAT = "%Y%m%d_%H%M%S"
+_TS_NAME = re.compile(r"^(?P<base>.+)_(?P<ts>\d{8}_\d{6})\.json$")
+
+# Streamed exports are held in memory up to this size, so duplicates are detected before any write
+SPOOL_LIMIT = 8 * 1024 * 1024
+
+# Newest timestamped name per base, per export directory, valid while the directory's mtime is unchanged
+_latest_lock = threading.Lock()
+_latest_by_root: Dict[str, Tuple[int, Dict[str, str]]] = {}
+
+
+@dataclass
+class StoredExport:
+    """A name in the export directory and the content-addressed blob behind it."""
+    path: Path
+    content_hash: str
+    reused: bool = False  # True if the content matched the newest export of the same name and no new name was made
+
+
+class ExportStore:
+    """
+    Content-addressed export storage.
+
+    Export bytes are stored once as <dir>/.blobs/<hh>/<sha256>.json; the readable names in <dir>
+    are hard links to the blob (symlinks, then plain copies, where links are not supported).
+    Writing the same content again costs no new blob, and a timestamped export whose content equals
+    the newest export of the same base name is skipped entirely.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.blob_root = root / BLOB_DIR
+
+    def blob_path(self, digest: str) -> Path:
+        return self.blob_root / digest[:2] / f"{digest}.json"
+
+    # -------------------------
+    # Writing
+    # -------------------------
+    def put_bytes(self, data: bytes) -> str:
+        """Store data as a blob (no write if it already exists). Returns the hash."""
+        digest = hashlib.sha256(data).hexdigest()
+        if not self.blob_path(digest).exists():
+            self._write_blob(digest, data)
+        return digest
+
+    def _write_blob(self, digest: str, data: bytes) -> None:
+        blob = self.blob_path(digest)
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = self._temp_file(self.blob_root)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_name, blob)
+
+    def put_chunks(self, chunks: Iterable[str]) -> str:
+        """
+        Stream text chunks (UTF-8) into a blob while hashing them. Returns the hash.
+        Up to SPOOL_LIMIT bytes are kept in memory, so content that is already stored is not written
+        at all; larger documents spill to a temporary file as they arrive.
+        """
+        h = hashlib.sha256()
+        buffered: List[bytes] = []
+        size = 0
+        it = iter(chunks)
+        for chunk in it:
+            data = chunk.encode("utf-8")
+            h.update(data)
+            buffered.append(data)
+            size += len(data)
+            if size > SPOOL_LIMIT:
+                break
+        else:
+            digest = h.hexdigest()
+            if not self.blob_path(digest).exists():
+                self._write_blob(digest, b"".join(buffered))
+            return digest
+
+        self.blob_root.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = self._temp_file(self.blob_root)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.writelines(buffered)
+                buffered = []
+                for chunk in it:
+                    data = chunk.encode("utf-8")
+                    h.update(data)
+                    f.write(data)
+            digest = h.hexdigest()
+            blob = self.blob_path(digest)
+            if blob.exists():
+                os.unlink(tmp_name)
+            else:
+                blob.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp_name, blob)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+        return digest
+
+    def link(self, digest: str, name: str) -> Path:
+        """Point <root>/<name> at the blob, replacing an existing file of that name."""
+        blob = self.blob_path(digest)
+        target = self.root / name
+        # a name unique across threads and processes; mkstemp reserves it, the link takes its place
+        fd, tmp_name = tempfile.mkstemp(prefix=f".{target.name}.", suffix=".tmp", dir=self.root)
+        os.close(fd)
+        tmp = Path(tmp_name)
+        try:
+            tmp.unlink()
+            try:
+                os.link(blob, tmp)
+            except OSError:
+                try:
+                    tmp.symlink_to(os.path.relpath(blob, target.parent))
+                except OSError:
+                    shutil.copyfile(blob, tmp)
+            os.replace(tmp, target)
+        finally:
+            # still there on failure, or when target was already a link to the same blob
+            # (rename between two links to one file leaves both in place)
+            if tmp.exists() or tmp.is_symlink():
+                tmp.unlink()
+        return target
+
+    def latest(self, base: str) -> Optional[Path]:
+        """Newest timestamped export named <base>_<ts>.json, if any."""
+        name = self._latest_names().get(base)
+        return self.root / name if name is not None else None
+
+    def _latest_names(self) -> Dict[str, str]:
+        """
+        base -> newest timestamped name in the directory. Scanned once and reused (across instances)
+        until the directory changes; names this process links are added without a rescan.
+        """
+        key = str(self.root)
+        try:
+            mtime = os.stat(self.root).st_mtime_ns
+        except OSError:
+            return {}
+        with _latest_lock:
+            cached = _latest_by_root.get(key)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+        names: Dict[str, str] = {}
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                base = _base_of(entry.name)
+                if base is not None and entry.name > names.get(base, ""):
+                    names[base] = entry.name
+        with _latest_lock:
+            _latest_by_root[key] = (mtime, names)
+        return names
+
+    def _note_latest(self, base: str, name: str) -> None:
+        """Record a name just linked by _store_digest, keeping the directory scan valid."""
+        key = str(self.root)
+        with _latest_lock:
+            cached = _latest_by_root.get(key)
+            if cached is None:
+                return
+            names = dict(cached[1])
+            if name > names.get(base, ""):
+                names[base] = name
+            try:
+                _latest_by_root[key] = (os.stat(self.root).st_mtime_ns, names)
+            except OSError:
+                del _latest_by_root[key]
+
+    def store(self, chunks: Iterable[str], base: str, ts: str) -> StoredExport:
+        """
+        Store an export under <base>_<ts>.json. If the newest <base>_*.json already has
+        the same content, no new name is created and that file is returned with reused=True.
+        """
+        return self._store_digest(self.put_chunks(chunks), base, ts)
+
+    def store_bytes(self, data: bytes, base: str, ts: str) -> StoredExport:
+        """Like store() for content already in memory; an unchanged export writes nothing."""
+        return self._store_digest(self.put_bytes(data), base, ts)
+
+    def store_as(self, chunks: Iterable[str], name: str) -> StoredExport:
+        """Store an export under a fixed name (replacing what was there)."""
+        return self._store_digest_as(self.put_chunks(chunks), name)
+
+    def store_bytes_as(self, data: bytes, name: str) -> StoredExport:
+        return self._store_digest_as(self.put_bytes(data), name)
+
+    def _store_digest_as(self, digest: str, name: str) -> StoredExport:
+        current = self.root / name
+        if current.exists() and self._is_blob(current, digest):
+            return StoredExport(current, digest, reused=True)
+        return StoredExport(self.link(digest, name), digest)
+
+    def _store_digest(self, digest: str, base: str, ts: str) -> StoredExport:
+        previous = self.latest(base)
+        if previous is not None and self._is_blob(previous, digest):
+            return StoredExport(previous, digest, reused=True)
+        path = self.link(digest, f"{base}_{ts}.json")
+        self._note_latest(base, path.name)
+        return StoredExport(path, digest)
+
+    def _is_blob(self, path: Path, digest: str) -> bool:
+        blob = self.blob_path(digest)
+        try:
+            if os.path.samefile(path, blob):
+                return True
+            # copies (no link support): compare by content
+            return path.stat().st_size == blob.stat().st_size and _file_hash(path) == digest
+        except OSError:
+            return False
+
+    @staticmethod
+    def _temp_file(directory: Path) -> Tuple[int, str]:
+        return tempfile.mkstemp(prefix=".tmp-", suffix=".json", dir=directory)
+
+    # -------------------------
+    # Retention
+    # -------------------------
+    def prune(self, *, keep_days: Optional[float] = 30, keep_last: int = 1, dry_run: bool = False) -> Dict[str, int]:
+        """
+        Apply retention to timestamped names, then delete blobs no name refers to.
+        For each base name the newest keep_last files are always kept; older ones are removed once
+        they are more than keep_days old (keep_days=None keeps them). Custom-named exports are never removed.
+        Returns counts of removed names/blobs and bytes freed.
+        """
+        stats = {"names_removed": 0, "blobs_removed": 0, "bytes_freed": 0, "names_kept": 0, "blobs_kept": 0}
+        if not self.root.exists():
+            return stats
+
+        by_base: Dict[str, List[Path]] = {}
+        for p in self.root.glob("*.json"):
+            base = _base_of(p.name)
+            if base is not None:
+                by_base.setdefault(base, []).append(p)
+
+        # names carry their (UTC) export time; file mtimes are shared with the blob through hard links
+        cutoff = (datetime.utcnow() - timedelta(days=keep_days)).strftime(TS_FORMAT) if keep_days is not None else None
+        removed: Set[Path] = set()
+        for paths in by_base.values():
+            paths.sort(key=lambda p: p.name, reverse=True)
+            for p in paths[keep_last:]:
+                if cutoff is None or _TS_NAME.match(p.name).group("ts") >= cutoff:
+                    continue
+                removed.add(p)
+                if not dry_run:
+                    p.unlink()
+        stats["names_removed"] = len(removed)
+
+        referenced: Set[Tuple[int, int]] = set()
+        for p in self.root.glob("*.json"):
+            if p in removed:
+                continue
+            try:
+                st = p.stat()  # follows symlinks to the blob
+            except OSError:
+                continue  # dangling symlink
+            referenced.add((st.st_dev, st.st_ino))
+            stats["names_kept"] += 1
+
+        if self.blob_root.exists():
+            for blob in self.blob_root.glob("*/*.json"):
+                st = blob.stat()
+                if (st.st_dev, st.st_ino) in referenced:
+                    stats["blobs_kept"] += 1
+                    continue
+                stats["blobs_removed"] += 1
+                stats["bytes_freed"] += st.st_size
+                if not dry_run:
+                    blob.unlink()
+            # leftovers of interrupted writes
+            for tmp in self.blob_root.glob(".tmp-*"):
+                if not dry_run and tmp.stat().st_mtime < time.time() - 3600:
+                    tmp.unlink()
+        if not dry_run:
+            logger.info(f"Pruned {self.root}: {stats['names_removed']} name(s), {stats['blobs_removed']} blob(s), {stats['bytes_freed']} bytes")
+        return stats
+
+
+def _base_of(name: str) -> Optional[str]:
+    m = _TS_NAME.match(name)
+    return m.group("base") if m else None
+
+
+def _file_hash(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            h.update(block)
+    return h.hexdigest()
+
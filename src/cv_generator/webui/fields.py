@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import hashlib
+import json
 import re
 import uuid
 from dataclasses import dataclass
@@ -145,13 +146,18 @@ def get_section_icon(section: str) -> str:
 
 
 
+_SPACES = re.compile(r"\s+")
+_NON_SLUG = re.compile(r"[^a-z0-9\-\_]+")
+_DASHES = re.compile(r"-{2,}")
+
+
 def slugify(text: str) -> str:
     original = text.strip()
     text = original.lower()
     # replace Persian/Arabic spaces etc with dash
-    text = re.sub(r"\s+", "-", text)
-    text = re.sub(r"[^a-z0-9\-\_]+", "", text)
-    text = re.sub(r"-{2,}", "-", text).strip("-")
+    text = _SPACES.sub("-", text)
+    text = _NON_SLUG.sub("", text)
+    text = _DASHES.sub("-", text).strip("-")
     # If the result is empty or just "tag" (non-Latin scripts), use a hash to make unique
     if not text or text == "tag":
         # Use a short hash of the original text to make it unique
@@ -167,6 +173,14 @@ def stable_uuid(resume_key: str, section: str, key: str) -> str:
     return str(uuid.uuid5(_NS, f"{resume_key}:{section}:{key}"))
 
 
+def entry_fingerprint(sort_order: int, data: Dict[str, Any]) -> str:
+    """
+    Hash of the imported state of an entry (position + data); equal fingerprints mean an import would not change the row.
+    """
+    raw = json.dumps([sort_order or 0, data or {}], ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
 def infer_lang_from_filename(name: str) -> str:
     n = name.lower()
     if n.endswith("_fa.json") or n.endswith(".fa.json") or "_fa." in n:
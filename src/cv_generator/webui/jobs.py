@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Optional
+
+from flask import Flask
+
+from .models import db, Job
+
+logger = logging.getLogger(__name__)
+
+# A job body receives a progress(done, total) callback and returns a summary message.
+ProgressFn = Callable[[int, int], None]
+JobFn = Callable[[ProgressFn], Optional[str]]
+
+# Minimum seconds between progress commits (the final update is always written)
+PROGRESS_INTERVAL = 0.5
+
+
+class JobRunner:
+    """
+    Runs long imports/exports on a thread pool, each inside its own app context.
+    Job state lives in the jobs table so any request (or another process) can read it.
+    With app.config["JOBS_INLINE"] set, jobs run synchronously in the caller (scripts, tests).
+    """
+
+    def __init__(self, app: Flask, *, max_workers: int = 2) -> None:
+        self.app = app
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cvgen-job")
+
+    def submit(self, kind: str, fn: JobFn, *, total: int = 0) -> int:
+        """Persist a queued job and schedule it. Returns the job id."""
+        job = Job(kind=kind, status="queued", total=total)
+        db.session.add(job)
+        db.session.commit()
+        job_id = job.id
+        if self.app.config.get("JOBS_INLINE"):
+            self._run(job_id, fn)
+        else:
+            self._pool.submit(self._run, job_id, fn)
+        return job_id
+
+    def _run(self, job_id: int, fn: JobFn) -> None:
+        with self.app.app_context():
+            job = db.session.get(Job, job_id)
+            job.status = "running"
+            job.started_at = datetime.utcnow()
+            db.session.commit()
+
+            last_commit = 0.0
+
+            def progress(done: int, total: int) -> None:
+                nonlocal last_commit
+                now = time.monotonic()
+                if done < total and now - last_commit < PROGRESS_INTERVAL:
+                    return
+                last_commit = now
+                j = db.session.get(Job, job_id)
+                j.done = done
+                j.total = total
+                db.session.commit()
+
+            try:
+                message = fn(progress)
+                status = "done"
+            except Exception as ex:
+                logger.exception(f"Job {job_id} failed")
+                db.session.rollback()
+                message = f"Failed: {ex}"
+                status = "failed"
+
+            job = db.session.get(Job, job_id)
+            job.status = status
+            job.message = (message or "")[:500]
+            job.finished_at = datetime.utcnow()
+            if status == "done":
+                job.done = job.total
+            db.session.commit()
+
+
+def fail_interrupted_jobs() -> int:
+    """
+    Mark jobs left queued/running by a previous server process as failed.
+    Returns the number of jobs updated.
+    """
+    count = Job.query.filter(Job.status.in_(["queued", "running"])).update(
+        {"status": "failed", "message": "Interrupted by server restart.", "finished_at": datetime.utcnow()},
+        synchronize_session=False,
+    )
+    db.session.commit()
+    return count
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+
+class JsonCodec(ABC):
+    """
+    JSON encoding/decoding used on the import, export and preview paths.
+    Output is always UTF-8 without ASCII escaping; indent=True gives the 2-space layout of the export files.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def loads(self, data: Union[bytes, str]) -> Any:
+        """Decode a document; bytes are parsed as UTF-8 without decoding them to str first where possible."""
+
+    @abstractmethod
+    def dumps(self, value: Any, *, indent: bool = False, exact: bool = False) -> bytes:
+        """
+        Encode value as UTF-8 bytes. With exact=True the bytes equal
+        json.dumps(value, ensure_ascii=False, indent=2 if indent else None).encode("utf-8").
+        """
+
+    def dumps_text(self, value: Any, *, indent: bool = False, exact: bool = False) -> str:
+        return self.dumps(value, indent=indent, exact=exact).decode("utf-8")
+
+
+class StdlibCodec(JsonCodec):
+    name = "stdlib"
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        # json.loads takes UTF-8 bytes directly
+        return json.loads(data)
+
+    def dumps(self, value: Any, *, indent: bool = False, exact: bool = False) -> bytes:
+        return self.dumps_text(value, indent=indent).encode("utf-8")
+
+    def dumps_text(self, value: Any, *, indent: bool = False, exact: bool = False) -> str:
+        return json.dumps(value, ensure_ascii=False, indent=2 if indent else None)
+
+
+class OrjsonCodec(JsonCodec):
+    """
+    orjson (Rust) codec. Its indented output matches the stdlib except for floats written in
+    exponent form (1e+16 vs 1e16), NaN/Infinity (null) and values orjson rejects (non-str keys,
+    ints beyond 64 bits, which always go to the stdlib); exact=True hands the float cases,
+    and compact output, to the stdlib as well.
+    """
+
+    name = "orjson"
+
+    def __init__(self) -> None:
+        if orjson is None:
+            raise RuntimeError("orjson is not installed")
+        self._stdlib = StdlibCodec()
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        # orjson reads integers beyond 64 bits as floats, and rejects NaN/Infinity and a UTF-8 BOM,
+        # all of which the stdlib accepts: such documents are left to the stdlib
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        if data.translate(_DIGITS_TO_ZERO).find(_LONG_NUMBER) != -1:
+            return self._stdlib.loads(data)
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            return self._stdlib.loads(data)
+
+    def dumps(self, value: Any, *, indent: bool = False, exact: bool = False) -> bytes:
+        # compact orjson output has no space after separators, unlike the stdlib default
+        if exact and (not indent or not _orjson_exact(value)):
+            return self._stdlib.dumps(value, indent=indent)
+        try:
+            return orjson.dumps(value, option=orjson.OPT_INDENT_2 if indent else 0)
+        except TypeError:  # orjson.JSONEncodeError
+            return self._stdlib.dumps(value, indent=indent)
+
+
+# 20 digits in a row may be an integer beyond 64 bits; mapping digits to "0" and using bytes.find
+# is several times faster than a regex scan
+_DIGITS_TO_ZERO = bytes.maketrans(b"0123456789", b"0" * 10)
+_LONG_NUMBER = b"0" * 20
+
+
+def _orjson_exact(value: Any) -> bool:
+    """True if orjson writes value exactly like the stdlib (no NaN/Infinity, no exponent-form floats)."""
+    stack = [value]
+    while stack:
+        v = stack.pop()
+        if isinstance(v, str):
+            continue
+        if isinstance(v, dict):
+            stack.extend(v.values())
+        elif isinstance(v, (list, tuple)):
+            stack.extend(v)
+        elif isinstance(v, float):
+            if not math.isfinite(v) or (v and not 1e-4 <= abs(v) < 1e16):
+                return False
+    return True
+
+
+CODECS = {"stdlib": StdlibCodec, "orjson": OrjsonCodec}
+
+
+def get_codec(name: Optional[str] = None) -> JsonCodec:
+    """
+    Codec by name ("stdlib", "orjson"); "auto" or None picks orjson if installed.
+    The CVGEN_JSON_CODEC environment variable sets the default.
+    """
+    name = (name or os.environ.get("CVGEN_JSON_CODEC") or "auto").lower()
+    if name == "auto":
+        name = "orjson" if orjson is not None else "stdlib"
+    if name not in CODECS:
+        raise ValueError(f"Unknown JSON codec: {name}")
+    return CODECS[name]()
+
+
+codec = get_codec()
+
+
+def benchmark_codecs(paths: Sequence[Path], *, repeat: int = 20) -> List[Dict[str, Any]]:
+    """
+    Time every available codec on the given JSON files: decode from bytes, export-style encode
+    (indent, exact) and compact encode. Returns one row per codec with milliseconds per pass over
+    all files, and whether its exact output matched the stdlib byte for byte.
+    """
+    blobs = [Path(p).read_bytes() for p in paths]
+    docs = [json.loads(b) for b in blobs]
+    reference = [StdlibCodec().dumps(d, indent=True) for d in docs]
+
+    rows: List[Dict[str, Any]] = []
+    for name in CODECS:
+        try:
+            c = get_codec(name)
+        except RuntimeError:
+            continue
+
+        def timed(fn) -> float:
+            best = float("inf")
+            for _ in range(repeat):
+                started = time.perf_counter()
+                fn()
+                best = min(best, time.perf_counter() - started)
+            return best * 1000
+
+        rows.append({
+            "codec": name,
+            "loads_ms": timed(lambda: [c.loads(b) for b in blobs]),
+            "dumps_export_ms": timed(lambda: [c.dumps(d, indent=True, exact=True) for d in docs]),
+            "dumps_compact_ms": timed(lambda: [c.dumps(d) for d in docs]),
+            "identical": [c.dumps(d, indent=True, exact=True) for d in docs] == reference,
+        })
+    return rows
@@ -4,6 +4,9 @@ from datetime import datetime
 from typing import Any, Optional
 
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, inspect, text
+
+from .fields import entry_fingerprint
 
 db = SQLAlchemy()
 
@@ -15,6 +18,8 @@ class PersonEntity(db.Model):
     slug = db.Column(db.String(120), unique=True, nullable=False, index=True)
     display_name = db.Column(db.String(200), nullable=True)
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    # Bumped on every change that affects this person's exports (see export_cache.bump_generation)
+    generation = db.Column(db.Integer, nullable=False, default=0)
 
     variants = db.relationship("CVVariant", back_populates="person", cascade="all, delete-orphan")
     entries = db.relationship("Entry", back_populates="person", cascade="all, delete-orphan")
@@ -43,6 +48,11 @@ class CVVariant(db.Model):
     # Optional: store the "config" object from CV JSON
     config = db.Column(db.JSON, nullable=True)
 
+    # sha256 of the last imported source bytes and of each imported section,
+    # used to skip unchanged files/sections on re-import. Cleared by UI edits.
+    content_hash = db.Column(db.String(64), nullable=True)
+    section_hashes = db.Column(db.JSON, nullable=True)
+
     person = db.relationship("PersonEntity", back_populates="variants")
 
     __table_args__ = (
@@ -71,6 +81,8 @@ class Entry(db.Model):
     needs_translation = db.Column(db.Boolean, nullable=False, default=False)
 
     data = db.Column(db.JSON, nullable=False, default=dict)
+    # entry_fingerprint(sort_order, data); kept current by the listener below and by bulk imports
+    fingerprint = db.Column(db.String(64), nullable=True)
 
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -82,6 +94,12 @@ class Entry(db.Model):
     )
 
 
+@event.listens_for(Entry, "before_insert")
+@event.listens_for(Entry, "before_update")
+def _refresh_entry_fingerprint(mapper, connection, target: Entry) -> None:
+    target.fingerprint = entry_fingerprint(target.sort_order, target.data)
+
+
 class Tag(db.Model):
     __tablename__ = "tags"
 
@@ -156,6 +174,57 @@ class ImportHistory(db.Model):
     log = db.Column(db.Text, nullable=True)
 
 
+class Job(db.Model):
+    """
+    A background import/export run. Progress is updated by the job runner while it works,
+    so pages can poll /jobs/<id> instead of waiting on the request.
+    """
+    __tablename__ = "jobs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(32), nullable=False, index=True)  # "import" | "export"
+    status = db.Column(db.String(16), nullable=False, default="queued", index=True)  # queued|running|done|failed
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    done = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    message = db.Column(db.String(500), nullable=True)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "done": self.done,
+            "total": self.total,
+            "message": self.message,
+        }
+
+
+class ExportPreset(db.Model):
+    """
+    A named tailored export: a tag query, the languages to export and a filename pattern.
+    Run for a person by cv_io.run_export_presets, which serves all presets from one snapshot.
+    """
+    __tablename__ = "export_presets"
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(120), unique=True, nullable=False)
+    # Canonical tag query (slugs; see tag_query). Empty = full export with all tags
+    tag_query = db.Column(db.String(500), nullable=True)
+    # Language codes to export; empty/None = every language the person has
+    languages = db.Column(db.JSON, nullable=True)
+    # Placeholders {person}, {lang}, {preset}. Without ".json" a timestamp is appended
+    # (unchanged content is not re-exported); with ".json" the file is replaced on every run.
+    filename_pattern = db.Column(db.String(300), nullable=False, default="{person}_{lang}_{preset}")
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
 class ExportHistory(db.Model):
     __tablename__ = "export_history"
 
@@ -169,7 +238,31 @@ class ExportHistory(db.Model):
 
     output_dir = db.Column(db.String(500), nullable=True)
     output_path = db.Column(db.String(800), nullable=True)
+    # sha256 of the exported bytes (single-file exports; see export_store)
+    content_hash = db.Column(db.String(64), nullable=True)
 
     success = db.Column(db.Boolean, nullable=False, default=True)
     success_count = db.Column(db.Integer, nullable=False, default=0)
     failed_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+def upgrade_schema() -> None:
+    """
+    Add columns that were introduced after a database was created.
+    db.create_all() only creates missing tables, so existing tables are extended here
+    with ALTER TABLE ... ADD COLUMN (nullable, or NOT NULL with the column's scalar default).
+    """
+    inspector = inspect(db.engine)
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for col in table.columns:
+                if col.name in existing:
+                    continue
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {col.name} {col.type.compile(dialect=db.engine.dialect)}"
+                default = col.default.arg if col.default is not None and col.default.is_scalar else None
+                if default is not None:
+                    ddl += f" NOT NULL DEFAULT {int(default) if isinstance(default, bool) else repr(default)}"
+                conn.execute(text(ddl))
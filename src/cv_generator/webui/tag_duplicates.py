@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import math
+import re
+import threading
+from bisect import bisect_left
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+from .models import db
+from .tag_search import TagSearchIndex, tag_search
+
+# trigram Jaccard similarity at which two labels count as near-duplicates
+SIMILARITY_THRESHOLD = 0.7
+
+# scores of the rule-based matches, next to trigram Jaccard values in [SIMILARITY_THRESHOLD, 1)
+_SCORE_EXACT = 1.0  # same letters and digits ("Machine Learning" / "machine-learning")
+_SCORE_SLUG_VARIANT = 0.95  # "machine-learning-2" from resolve_or_create_tag's uniqueness loop
+_SCORE_ACRONYM = 0.7  # "ML" / "Machine Learning"
+
+_MIN_GRAM_LENGTH = 4  # shorter texts are only matched exactly or as acronyms
+_SLUG_VARIANT = re.compile(r"^(.+)-\d+$")
+_DIGITS = re.compile(r"\d+")
+_NON_ALNUM = re.compile(r"[\W_]+")
+
+Pairs = Dict[Tuple[int, int], Tuple[float, str, str, str]]  # (low id, high id) -> (score, reason, text, text)
+
+
+@dataclass
+class DuplicateSuggestion:
+    """Two tags that look like the same tag; merging source into target keeps the more used one."""
+    target_id: int
+    target_slug: str
+    source_id: int
+    source_slug: str
+    score: float
+    reason: str  # "same text", "slug variant", "acronym" or "similar"
+    target_text: str  # the (normalized) texts that matched
+    source_text: str
+    target_usage: int = 0
+    source_usage: int = 0
+
+
+def _compact(text: str) -> str:
+    """Letters and digits of a normalized text only, so spacing and punctuation don't matter."""
+    return _NON_ALNUM.sub("", text)
+
+
+def _grams(compact: str) -> Set[str]:
+    """Trigrams, with a start marker only: "server" / "servers" differ in one trigram, not two."""
+    padded = f"#{compact}"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _acronym(normalized: str) -> Optional[str]:
+    words = [w for w in normalized.split() if w[0].isalnum()]
+    return "".join(w[0] for w in words) if 2 <= len(words) <= 6 else None
+
+
+def find_duplicate_pairs(index: TagSearchIndex, *, threshold: float = SIMILARITY_THRESHOLD) -> Pairs:
+    """
+    Pairs of tags whose slugs, translations or aliases (any language) look alike, with the best
+    score and reason per pair. Works on the normalized texts of the search index.
+
+    Exact and rule-based matches are dictionary lookups. Similar texts are found with a trigram
+    inverted index and prefix filtering: each text's trigrams are ordered rarest first, and two
+    texts sharing at least k trigrams share two of the first n - k + 2 trigrams of each. Only those
+    prefixes are indexed and probed, and the few texts found under two of them are verified with a
+    set intersection. No pairs of tags are enumerated.
+    """
+    slugs = index.labels.slugs
+    ids_by_compact: Dict[str, List[int]] = {}
+    shown: Dict[str, str] = {}  # compact -> the first normalized text with that compact form
+    short: Dict[str, Set[int]] = {}  # compact form of short single words -> tag ids (acronym targets)
+    acronyms: List[Tuple[str, List[int], str]] = []  # (acronym, tag ids, text)
+
+    for text, tids in index.exact.items():
+        compact = _compact(text)
+        if not compact:
+            continue
+        ids = ids_by_compact.get(compact)
+        if ids is None:
+            ids_by_compact[compact] = list(tids)
+            shown[compact] = text
+        else:
+            ids.extend(tid for tid in tids if tid not in ids)
+        if " " not in text and 2 <= len(compact) <= 6:
+            short.setdefault(compact, set()).update(tids)
+        acronym = _acronym(text)
+        if acronym:
+            acronyms.append((acronym, tids, text))
+
+    best: Pairs = {}
+
+    def found(a: int, b: int, score: float, reason: str, text_a: str, text_b: str) -> None:
+        if a == b:
+            return
+        key = (a, b) if a < b else (b, a)
+        if key not in best or score > best[key][0]:
+            best[key] = (score, reason, text_a, text_b) if a < b else (score, reason, text_b, text_a)
+
+    # same compact text on different tags
+    for compact, ids in ids_by_compact.items():
+        for other in ids[1:]:
+            found(ids[0], other, _SCORE_EXACT, "same text", shown[compact], shown[compact])
+
+    # "foo-2" next to "foo"
+    for tid, slug in slugs.items():
+        m = _SLUG_VARIANT.match(slug)
+        if m and m.group(1) in index.ids_by_slug:
+            found(index.ids_by_slug[m.group(1)], tid, _SCORE_SLUG_VARIANT, "slug variant", m.group(1), slug)
+
+    # "ML" next to "Machine Learning"
+    for acronym, tids, text in acronyms:
+        for other in short.get(acronym, ()):
+            for tid in tids:
+                found(other, tid, _SCORE_ACRONYM, "acronym", shown[acronym], text)
+
+    # trigram similarity with prefix filtering
+    compacts = [c for c in ids_by_compact if len(c) >= _MIN_GRAM_LENGTH]
+    freq: Counter = Counter()
+    for compact in compacts:
+        freq.update(_grams(compact))
+    # trigrams as ranks, rarest first; those of a single text can't be shared and are left out of the prefixes
+    rank = {g: r for r, g in enumerate(sorted(freq, key=lambda g: (freq[g], g)))}
+    unique = sum(1 for count in freq.values() if count == 1)
+    records = [(tuple(sorted(map(rank.__getitem__, _grams(compact)))), compact) for compact in compacts]
+    records.sort(key=lambda r: len(r[0]))  # smallest texts first
+    sizes = [len(ordered) for ordered, _compact_text in records]
+
+    # per text size n: the first record that is large enough (threshold * n trigrams), how many
+    # rarest trigrams to probe, and how many to index for later, larger texts, which need at least
+    # 2 * threshold / (1 + threshold) * n trigrams in common with it
+    first_of: Dict[int, int] = {}
+    probe_len: Dict[int, int] = {}
+    index_len: Dict[int, int] = {}
+    for n in set(sizes):
+        first_of[n] = bisect_left(sizes, math.ceil(threshold * n - 1e-9))
+        probe_len[n] = n - math.ceil(threshold * n - 1e-9) + 2
+        index_len[n] = n - math.ceil(2 * threshold / (1 + threshold) * n - 1e-9) + 2
+    # shared trigrams two texts with n + m trigrams in all need: shared / (n + m - shared) >= threshold
+    needed = [math.ceil(threshold / (1 + threshold) * total - 1e-9) for total in range(2 * max(sizes, default=0) + 1)]
+
+    postings: Dict[int, List[int]] = {}  # trigram rank -> record numbers, ascending, so also by size
+    for i, (ordered, compact) in enumerate(records):
+        n = sizes[i]
+        shared_from = bisect_left(ordered, unique)
+        first = first_of[n]
+        once: Set[int] = set()
+        twice: Set[int] = set()  # records under two of the probed trigrams: the only ones compared
+        for g in ordered[shared_from:probe_len[n]]:
+            hits = postings.get(g)
+            if hits:
+                if hits[0] < first:
+                    hits = hits[bisect_left(hits, first):]
+                twice.update(once.intersection(hits))
+                once.update(hits)
+        if twice:
+            grams = set(ordered)
+            for j in twice:
+                other_ordered, other = records[j]
+                shared = len(grams.intersection(other_ordered))
+                # "Python 2" / "Python 3" differ in their numbers, not in spelling
+                if shared < needed[n + sizes[j]] or _DIGITS.findall(other) != _DIGITS.findall(compact):
+                    continue
+                score = round(shared / (n + sizes[j] - shared), 3)
+                for a in ids_by_compact[other]:
+                    for b in ids_by_compact[compact]:
+                        found(a, b, score, "similar", shown[other], shown[compact])
+        for g in ordered[shared_from:index_len[n]]:
+            postings.setdefault(g, []).append(i)
+    return best
+
+
+def rank_duplicates(pairs: Pairs, index: TagSearchIndex) -> List[DuplicateSuggestion]:
+    """Suggestions from find_duplicate_pairs, best first; the more used tag (the older one on a tie) is the target."""
+    slugs, usage = index.labels.slugs, index.usage
+    suggestions = []
+    for (a, b), (score, reason, text_a, text_b) in pairs.items():
+        if (usage.get(b, 0), -b) > (usage.get(a, 0), -a):
+            a, b, text_a, text_b = b, a, text_b, text_a
+        suggestions.append(DuplicateSuggestion(
+            a, slugs[a], b, slugs[b], score, reason, text_a, text_b, usage.get(a, 0), usage.get(b, 0),
+        ))
+    suggestions.sort(key=lambda s: (-s.score, -(s.target_usage + s.source_usage), s.target_slug, s.source_slug))
+    return suggestions
+
+
+class DuplicateCache:
+    """
+    Duplicate suggestions built on the shared tag search index: pairs are recomputed when the tag
+    label snapshot changes, and only re-ranked when the index picks up new usage counts.
+    """
+
+    def __init__(self) -> None:
+        self.runs = 0
+        self._data: Dict[str, Tuple[TagSearchIndex, Pairs, List[DuplicateSuggestion]]] = {}  # by engine URL
+        self._lock = threading.Lock()
+
+    def get(self) -> List[DuplicateSuggestion]:
+        key = str(db.engine.url)
+        index = tag_search.get()
+        with self._lock:
+            cached = self._data.get(key)
+        if cached is not None and cached[0] is index:
+            return cached[2]
+        if cached is not None and cached[0].labels is index.labels:
+            pairs = cached[1]
+        else:
+            pairs = find_duplicate_pairs(index)
+            with self._lock:
+                self.runs += 1
+        suggestions = rank_duplicates(pairs, index)
+        with self._lock:
+            self._data[key] = (index, pairs, suggestions)
+        return suggestions
+
+
+tag_duplicates = DuplicateCache()
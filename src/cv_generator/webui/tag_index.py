@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+from .export_cache import track_generation_cache
+from .models import db, Entry, EntityTag
+from .tag_query import TagFilter, as_expr
+
+GroupKey = Tuple[str, str]  # (section, stable_id)
+
+
+class PersonTagIndex:
+    """
+    Bitmap index of one person's tag links.
+
+    Every (section, stable_id) group of the person gets a bit position. Each tag maps to a Python int
+    with the bits of the groups linked to it, and each language to the bits of the groups that have an
+    entry in that language. Tag filters (see tag_query) then evaluate to bitwise AND/OR/NOT.
+    """
+
+    def __init__(self, keys: List[GroupKey], tag_bits: Dict[int, int], lang_bits: Dict[str, int]) -> None:
+        self.keys = keys
+        self.tag_bits = tag_bits
+        self.lang_bits = lang_bits
+
+    @classmethod
+    def build(cls, person_id: int) -> "PersonTagIndex":
+        """Load the index with two queries (links, entry keys)."""
+        positions: Dict[GroupKey, int] = {}
+        keys: List[GroupKey] = []
+
+        def bit(key: GroupKey) -> int:
+            pos = positions.get(key)
+            if pos is None:
+                pos = positions[key] = len(keys)
+                keys.append(key)
+            return 1 << pos
+
+        tag_bits: Dict[int, int] = {}
+        for section, stable_id, tag_id in db.session.query(
+            EntityTag.section, EntityTag.stable_id, EntityTag.tag_id
+        ).filter(EntityTag.person_id == person_id):
+            tag_bits[tag_id] = tag_bits.get(tag_id, 0) | bit((section, stable_id))
+
+        lang_bits: Dict[str, int] = {}
+        for section, stable_id, lang_code in db.session.query(
+            Entry.section, Entry.stable_id, Entry.lang_code
+        ).filter(Entry.person_id == person_id):
+            lang_bits[lang_code] = lang_bits.get(lang_code, 0) | bit((section, stable_id))
+
+        return cls(keys, tag_bits, lang_bits)
+
+    def match(self, tag_filter: TagFilter, lang_code: str) -> int:
+        """Bitmap of groups with an entry in lang_code that satisfy the filter (tag id list = all required)."""
+        universe = self.lang_bits.get(lang_code, 0)
+        return as_expr(tag_filter).bits(self, universe) & universe
+
+    def keys_of(self, bits: int) -> Set[GroupKey]:
+        out: Set[GroupKey] = set()
+        while bits:
+            low = bits & -bits
+            out.add(self.keys[low.bit_length() - 1])
+            bits ^= low
+        return out
+
+    @staticmethod
+    def count(bits: int) -> int:
+        return bin(bits).count("1")
+
+
+class TagIndexCache:
+    """
+    Per-person PersonTagIndex instances, keyed by the person's generation.
+    Every write that changes links or entries (attach/detach, imports, edits) bumps the generation,
+    so the next lookup rebuilds that person's index; reads in between are pure bit operations.
+    """
+
+    def __init__(self, maxsize: int = 64) -> None:
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, PersonTagIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, person_id: int, generation: int) -> PersonTagIndex:
+        # the engine URL keeps apps on different databases apart, like the export cache
+        key = (str(db.engine.url), person_id, generation)
+        with self._lock:
+            index: Optional[PersonTagIndex] = self._data.get(key)
+            if index is not None:
+                self._data.move_to_end(key)
+                return index
+        index = PersonTagIndex.build(person_id)
+        with self._lock:
+            # older generations of this person are dead weight now
+            for stale in [k for k in self._data if k[:2] == key[:2]]:
+                del self._data[stale]
+            self._data[key] = index
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return index
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def discard_persons(self, engine_url: Optional[str], person_ids: Optional[Set[int]]) -> None:
+        """Drop the indexes of the given persons (None = all); see export_cache.track_generation_cache."""
+        with self._lock:
+            for key in [
+                k for k in self._data
+                if (engine_url is None or k[0] == engine_url) and (person_ids is None or k[1] in person_ids)
+            ]:
+                del self._data[key]
+
+
+tag_index = track_generation_cache(TagIndexCache())
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .models import db, Tag, TagAlias, TagTranslation
+
+_TAG_MODELS = (Tag, TagTranslation, TagAlias)
+_TAG_TABLES = tuple(m.__table__ for m in _TAG_MODELS)
+
+
+class TagLabels:
+    """One consistent load of every tag's slug, translations and aliases."""
+
+    def __init__(self) -> None:
+        self.slugs: Dict[int, str] = {}
+        self.labels: Dict[Tuple[int, str], str] = {}  # (tag_id, lang) -> label
+        self.aliases: Dict[int, List[Tuple[str, str]]] = {}  # tag_id -> [(lang, alias_label)]
+        self.loaded_at = time.monotonic()
+        self._terms: Optional[Tuple[Dict[str, int], Dict[Tuple[str, str], int], Dict[Tuple[str, str], int]]] = None
+
+    @classmethod
+    def load(cls) -> "TagLabels":
+        """Three queries, however many tags there are."""
+        out = cls()
+        out.slugs = dict(db.session.query(Tag.id, Tag.slug).all())
+        for tag_id, lang, label in db.session.query(TagTranslation.tag_id, TagTranslation.lang_code, TagTranslation.label).order_by(TagTranslation.id):
+            out.labels[(tag_id, lang)] = label
+        for tag_id, lang, alias in db.session.query(TagAlias.tag_id, TagAlias.lang_code, TagAlias.alias_label).order_by(TagAlias.id):
+            out.aliases.setdefault(tag_id, []).append((lang, alias))
+        return out
+
+    def label(self, tag_id: int, lang_code: str) -> Optional[str]:
+        """Label in lang_code, falling back to the slug; None for an unknown tag."""
+        return self.labels.get((tag_id, lang_code)) or self.slugs.get(tag_id)
+
+    def tag_id(self, slug: str) -> Optional[int]:
+        return self._term_maps()[0].get(slug)
+
+    def find(self, text: str, lang_code: str) -> Optional[int]:
+        """
+        Tag id for an exact slug, alias or translation label in lang_code, in that order
+        (the order TagResolver matches tag input in). None if nothing matches.
+        """
+        by_slug, by_alias, by_label = self._term_maps()
+        tag_id = by_slug.get(text)
+        if tag_id is None:
+            tag_id = by_alias.get((lang_code, text))
+        if tag_id is None:
+            tag_id = by_label.get((lang_code, text))
+        return tag_id
+
+    def _term_maps(self) -> Tuple[Dict[str, int], Dict[Tuple[str, str], int], Dict[Tuple[str, str], int]]:
+        # built on first use; a race only builds the same maps twice
+        if self._terms is None:
+            by_alias: Dict[Tuple[str, str], int] = {}
+            for tag_id, aliases in self.aliases.items():
+                for lang, alias in aliases:
+                    by_alias[(lang, alias)] = tag_id
+            by_label: Dict[Tuple[str, str], int] = {}
+            for (tag_id, lang), label in self.labels.items():
+                by_label.setdefault((lang, label), tag_id)  # oldest translation wins
+            self._terms = ({slug: tid for tid, slug in self.slugs.items()}, by_alias, by_label)
+        return self._terms
+
+
+class TagLabelCache:
+    """
+    Process-wide TagLabels, so pages that show tags need no tag queries at all.
+
+    The snapshot is dropped whenever Tag, TagTranslation or TagAlias rows are written through a
+    session of this process (unit-of-work flushes and bulk insert/update/delete statements alike,
+    see the listeners below) and reloaded on next use. max_age bounds how long changes made by
+    another process (e.g. cvgen_webui.py --watch-only) can go unseen.
+    """
+
+    def __init__(self, max_age: float = 300.0) -> None:
+        self.max_age = max_age
+        self.loads = 0
+        # bumped by invalidate(); a load that started before an invalidation is not stored
+        self.generation = 0
+        self._data: Dict[str, TagLabels] = {}  # by engine URL, like the export cache
+        self._lock = threading.Lock()
+
+    def get(self) -> TagLabels:
+        key = str(db.engine.url)
+        with self._lock:
+            labels = self._data.get(key)
+            generation = self.generation
+        if labels is not None and time.monotonic() - labels.loaded_at < self.max_age:
+            return labels
+        labels = TagLabels.load()
+        with self._lock:
+            self.loads += 1
+            if self.generation == generation:
+                self._data[key] = labels
+        return labels
+
+    def stats(self) -> Dict[str, float]:
+        return {"loads": self.loads, "max_age": self.max_age}
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.generation += 1
+
+    # -------------------------
+    # Lookups
+    # -------------------------
+    def label(self, tag_id: int, lang_code: str) -> Optional[str]:
+        return self.get().label(tag_id, lang_code)
+
+    def slug(self, tag_id: int) -> Optional[str]:
+        return self.get().slugs.get(tag_id)
+
+    def labels_for(self, tag_ids: Iterable[int], lang_code: str) -> List[Dict[str, Any]]:
+        """[{id, slug, label}] for the given tags (unknown ids skipped), sorted by label."""
+        labels = self.get()
+        out = [
+            {"id": tid, "slug": labels.slugs[tid], "label": labels.label(tid, lang_code)}
+            for tid in dict.fromkeys(tag_ids)
+            if tid in labels.slugs
+        ]
+        return sorted(out, key=lambda t: t["label"].lower())
+
+    def all_tags(self, lang_code: str) -> List[Dict[str, Any]]:
+        """[{id, slug, label}] for every tag, sorted by slug."""
+        labels = self.get()
+        return [
+            {"id": tid, "slug": slug, "label": labels.label(tid, lang_code)}
+            for tid, slug in sorted(labels.slugs.items(), key=lambda kv: kv[1])
+        ]
+
+
+tag_labels = TagLabelCache()
+
+
+# -------------------------
+# Invalidation
+# -------------------------
+@event.listens_for(Session, "after_flush")
+def _tag_rows_flushed(session: Session, flush_context: Any) -> None:
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, _TAG_MODELS):
+            session.info["tag_labels_changed"] = True
+            tag_labels.invalidate()
+            return
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _tag_rows_bulk_written(state: Any) -> None:
+    if state.is_insert or state.is_update or state.is_delete:
+        # ORM statements name a mapper; plain table statements (e.g. TagResolver.flush) only a table
+        mapper = state.bind_mapper
+        if (mapper is not None and mapper.class_ in _TAG_MODELS) or getattr(state.statement, "table", None) in _TAG_TABLES:
+            state.session.info["tag_labels_changed"] = True
+            tag_labels.invalidate()
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _tag_transaction_ended(session: Session) -> None:
+    # a snapshot loaded by another request between the write and the commit may predate the commit,
+    # and one loaded inside this transaction may hold rows that were just rolled back
+    if session.info.pop("tag_labels_changed", False):
+        tag_labels.invalidate()
@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import re
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, List, Optional, Sequence, Set, Union
+
+from .fields import slugify
+from .tag_labels import tag_labels
+from .tagging import TagResolver
+
+if TYPE_CHECKING:
+    from .tag_index import PersonTagIndex
+
+
+class TagQueryError(ValueError):
+    """Raised for syntax errors and unknown tags in a tag query."""
+
+
+class TagExpr(ABC):
+    """
+    Node of a parsed tag query. bits() evaluates it against a PersonTagIndex, where universe
+    is the bitmap of all groups in scope (the entries of one language) and gives NOT its meaning.
+    """
+
+    @abstractmethod
+    def bits(self, index: "PersonTagIndex", universe: int) -> int:
+        ...
+
+    @abstractmethod
+    def tag_ids(self, positive: bool = True) -> Set[int]:
+        """Tags the expression asks to be present (or, with positive=False, absent)."""
+
+
+class TagRef(TagExpr):
+    def __init__(self, tag_id: int, text: str = "") -> None:
+        self.tag_id = tag_id
+        self.text = text or str(tag_id)
+
+    def bits(self, index: "PersonTagIndex", universe: int) -> int:
+        return index.tag_bits.get(self.tag_id, 0) & universe
+
+    def tag_ids(self, positive: bool = True) -> Set[int]:
+        return {self.tag_id} if positive else set()
+
+    def __str__(self) -> str:
+        # quoted where it would not read back as a single term
+        if self.text.lower() in _KEYWORDS or re.search(r'[\s()"!&|]', self.text):
+            return '"' + self.text.replace('"', "") + '"'
+        return self.text
+
+
+class Not(TagExpr):
+    def __init__(self, child: TagExpr) -> None:
+        self.child = child
+
+    def bits(self, index: "PersonTagIndex", universe: int) -> int:
+        return universe & ~self.child.bits(index, universe)
+
+    def tag_ids(self, positive: bool = True) -> Set[int]:
+        return self.child.tag_ids(not positive)
+
+    def __str__(self) -> str:
+        return f"NOT ({self.child})" if isinstance(self.child, (And, Or)) else f"NOT {self.child}"
+
+
+class And(TagExpr):
+    def __init__(self, children: Sequence[TagExpr]) -> None:
+        self.children = list(children)
+
+    def bits(self, index: "PersonTagIndex", universe: int) -> int:
+        out = universe
+        for child in self.children:
+            out &= child.bits(index, universe)
+            if not out:
+                break
+        return out
+
+    def tag_ids(self, positive: bool = True) -> Set[int]:
+        return set().union(*(c.tag_ids(positive) for c in self.children))
+
+    def __str__(self) -> str:
+        return " AND ".join(f"({c})" if isinstance(c, Or) else str(c) for c in self.children)
+
+
+class Or(TagExpr):
+    def __init__(self, children: Sequence[TagExpr]) -> None:
+        self.children = list(children)
+
+    def bits(self, index: "PersonTagIndex", universe: int) -> int:
+        out = 0
+        for child in self.children:
+            out |= child.bits(index, universe)
+        return out
+
+    def tag_ids(self, positive: bool = True) -> Set[int]:
+        return set().union(*(c.tag_ids(positive) for c in self.children))
+
+    def __str__(self) -> str:
+        return " OR ".join(str(c) for c in self.children)
+
+
+# A tag filter is either a list of tag ids that must all be present, or a parsed expression
+TagFilter = Union[Sequence[int], TagExpr]
+
+
+def as_expr(tag_filter: TagFilter) -> TagExpr:
+    if isinstance(tag_filter, TagExpr):
+        return tag_filter
+    ids = sorted(set(tag_filter))
+    if not ids:
+        return Or([])  # no tags selected matches nothing
+    return And([TagRef(tid) for tid in ids])
+
+
+def selected_tag_ids(tag_filter: TagFilter) -> List[int]:
+    """Tags shown in the filtered export's type_key: the ones the filter requires or offers."""
+    if isinstance(tag_filter, TagExpr):
+        return sorted(tag_filter.tag_ids())
+    return list(tag_filter)
+
+
+# -------------------------
+# Parser
+# -------------------------
+# Grammar (NOT binds tightest, then AND, then OR; adjacent terms are ANDed):
+#   expr := and_expr (OR and_expr)*
+#   and_expr := unary ([AND] unary)*
+#   unary := NOT unary | "(" expr ")" | term
+# A term is a tag slug, alias or label in the query language; quote labels with spaces, operator characters or keywords.
+_TOKEN = re.compile(r'\s*(?:(\()|(\))|"([^"]*)"|(!)|(&&?|\|\|?)|([^\s()"!&|]+))')
+_KEYWORDS = {"and": "AND", "&&": "AND", "&": "AND", "or": "OR", "||": "OR", "|": "OR", "not": "NOT", "-": "NOT"}
+
+
+def _tokenize(text: str) -> List[tuple]:
+    tokens: List[tuple] = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        m = _TOKEN.match(text, pos)
+        if not m:
+            raise TagQueryError(f"Unbalanced quote at position {pos + 1}.")
+        pos = m.end()
+        if m.group(1):
+            tokens.append(("(", None))
+        elif m.group(2):
+            tokens.append((")", None))
+        elif m.group(3) is not None:
+            tokens.append(("TERM", m.group(3)))
+        elif m.group(4):
+            tokens.append(("NOT", None))
+        elif m.group(5):
+            tokens.append((_KEYWORDS[m.group(5)], None))
+        else:
+            word = m.group(6)
+            kw = _KEYWORDS.get(word.lower())
+            tokens.append((kw, None) if kw else ("TERM", word))
+    return tokens
+
+
+class _Parser:
+    def __init__(self, tokens: List[tuple], resolve) -> None:
+        self.tokens = tokens
+        self.pos = 0
+        self.resolve = resolve
+
+    def peek(self) -> Optional[str]:
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else None
+
+    def take(self) -> tuple:
+        tok = self.tokens[self.pos]
+        self.pos += 1
+        return tok
+
+    def parse(self) -> TagExpr:
+        if not self.tokens:
+            raise TagQueryError("Empty tag query.")
+        expr = self.expr()
+        if self.peek() is not None:
+            raise TagQueryError(f"Unexpected '{self.tokens[self.pos][1] or self.peek()}'.")
+        return expr
+
+    def expr(self) -> TagExpr:
+        children = [self.and_expr()]
+        while self.peek() == "OR":
+            self.take()
+            children.append(self.and_expr())
+        return children[0] if len(children) == 1 else Or(children)
+
+    def and_expr(self) -> TagExpr:
+        children = [self.unary()]
+        while self.peek() in ("AND", "NOT", "(", "TERM"):
+            if self.peek() == "AND":
+                self.take()
+            children.append(self.unary())
+        return children[0] if len(children) == 1 else And(children)
+
+    def unary(self) -> TagExpr:
+        kind = self.peek()
+        if kind is None:
+            raise TagQueryError("Tag query ends unexpectedly.")
+        if kind == "NOT":
+            self.take()
+            return Not(self.unary())
+        if kind == "(":
+            self.take()
+            inner = self.expr()
+            if self.peek() != ")":
+                raise TagQueryError("Missing ')'.")
+            self.take()
+            return inner
+        if kind == "TERM":
+            return self.resolve(self.take()[1])
+        raise TagQueryError(f"Unexpected '{kind}'.")
+
+
+def parse_tag_query(text: str, lang_code: str, resolver: Optional[TagResolver] = None) -> TagExpr:
+    """
+    Parse e.g. '(ml OR bioinformatics) AND NOT teaching' into a TagExpr.
+    Terms are matched like tag input elsewhere: slug, then alias, then translation label in lang_code
+    (then the slugified term). Unknown tags raise TagQueryError.
+    Without a resolver, terms are looked up in the process-wide tag label snapshot (no queries).
+    """
+    labels = tag_labels.get() if resolver is None else None
+
+    def resolve(term: str) -> TagExpr:
+        raw = term.strip()
+        if labels is not None:
+            tag_id = labels.find(raw, lang_code)
+            if tag_id is None:
+                tag_id = labels.tag_id(slugify(raw))
+            slug = labels.slugs[tag_id] if tag_id is not None else None
+        else:
+            slug = (
+                resolver.find_by_slug(raw)
+                or resolver.find_by_alias(raw, lang_code)
+                or resolver.find_by_translation(raw, lang_code)
+                or resolver.find_by_slug(slugify(raw))
+            )
+            tag_id = resolver.tag_id(slug) if slug else None
+        if tag_id is None:
+            raise TagQueryError(f"Unknown tag '{raw}'.")
+        return TagRef(tag_id, slug)
+
+    return _Parser(_tokenize(text or ""), resolve).parse()
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import copy
+import hashlib
+import heapq
+import threading
+import time
+import unicodedata
+import uuid
+from bisect import bisect_left
+from typing import Dict, List, Optional
+
+from .models import db, EntityTag
+from .tag_labels import TagLabels, tag_labels
+
+# Arabic code points typed on Arabic keyboards map to the Persian letters used in our labels;
+# tatweel and zero-width joiners are dropped and ZWNJ, "-" and "_" separate words.
+# Persian and Arabic-Indic digits become ASCII digits.
+_FOLD = str.maketrans({
+    "\u064a": "\u06cc",  # ARABIC YEH -> FARSI YEH
+    "\u0649": "\u06cc",  # ALEF MAKSURA -> FARSI YEH
+    "\u0643": "\u06a9",  # ARABIC KAF -> KEHEH
+    "\u0629": "\u0647",  # TEH MARBUTA -> HEH
+    "\u0640": None,  # TATWEEL
+    "\u200d": None,  # ZWJ
+    "\u200c": " ",  # ZWNJ
+    "-": " ",
+    "_": " ",
+    **{chr(0x06F0 + i): str(i) for i in range(10)},
+    **{chr(0x0660 + i): str(i) for i in range(10)},
+})
+
+# each label is also indexed from its first few inner words ("learning" finds "Machine Learning")
+_MAX_WORD_STARTS = 6
+
+# sorts after every key that starts with a given prefix
+_PREFIX_END = "\U0010ffff"
+
+# results per query are capped at _TOP_DEPTH; prefixes covering at least _MEMO_RANGE keys keep
+# their top results (up to _MEMO_SIZE prefixes)
+_TOP_DEPTH = 100
+_MEMO_RANGE = 256
+_MEMO_SIZE = 4096
+
+_EPOCH = uuid.uuid4().hex[:8]  # ETags from a previous process never match
+
+
+def normalize_tag_text(text: str) -> str:
+    """
+    Matching form of a tag label or query: case-folded, accents and Arabic diacritics removed,
+    Arabic letter variants folded to Persian ones, separators collapsed to single spaces.
+    """
+    if text.isascii():
+        return " ".join(text.lower().replace("-", " ").replace("_", " ").split())
+    text = unicodedata.normalize("NFKD", text.translate(_FOLD).casefold())
+    if any(map(unicodedata.combining, text)):
+        text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(text.split())
+
+
+class TagSearchIndex:
+    """
+    A sorted array of the distinct normalized slugs, translations, aliases (every language) and
+    their inner word starts, each with the ids of the tags it belongs to. A query is a binary
+    search for the prefix range; its tags are ordered by a precomputed usage rank (most used first,
+    ties by slug). Top results of prefixes with large ranges (the first keystrokes) are memoized,
+    so those cost a lookup after the first request.
+    """
+
+    def __init__(self, labels: TagLabels, usage: Dict[int, int], version: str) -> None:
+        self.labels = labels
+        self.ids_by_slug = {slug: tid for tid, slug in labels.slugs.items()}
+
+        texts: Dict[int, set] = {tid: {slug} for tid, slug in labels.slugs.items()}
+        for (tid, _lang), label in labels.labels.items():
+            if tid in texts:
+                texts[tid].add(label)
+        for tid, aliases in labels.aliases.items():
+            if tid in texts:
+                texts[tid].update(alias for _lang, alias in aliases)
+
+        normalized: Dict[str, str] = {}
+        postings: Dict[str, List[int]] = {}  # key -> tag ids; one tag's keys are added together
+        self.exact: Dict[str, List[int]] = {}  # whole normalized text -> tag ids
+
+        def add(index: Dict[str, List[int]], key: str, tid: int) -> None:
+            ids = index.get(key)
+            if ids is None:
+                index[key] = [tid]
+            elif ids[-1] != tid:
+                ids.append(tid)
+
+        for tid, strings in texts.items():
+            for s in strings:
+                key = normalized.get(s)
+                if key is None:
+                    key = normalized[s] = normalize_tag_text(s)
+                if not key:
+                    continue
+                add(self.exact, key, tid)
+                add(postings, key, tid)
+                start = key.find(" ")
+                n = 0
+                while start != -1 and n < _MAX_WORD_STARTS:
+                    add(postings, key[start + 1:], tid)
+                    start = key.find(" ", start + 1)
+                    n += 1
+        self.keys: List[str] = sorted(postings)
+        self.postings: List[List[int]] = [postings[k] for k in self.keys]
+        self.rerank(usage, version)
+
+    def rerank(self, usage: Dict[int, int], version: str) -> None:
+        """Order results by new usage counts (cheap next to building the keys)."""
+        slugs = self.labels.slugs
+        order = sorted(slugs, key=lambda tid: (-usage.get(tid, 0), slugs[tid]))
+        self.usage = usage
+        self.version = version
+        self.rank: Dict[int, int] = {tid: i for i, tid in enumerate(order)}
+        self._top: Dict[str, List[int]] = {"": order[:_TOP_DEPTH]}
+        self.built_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def search(self, query: str, limit: int) -> List[int]:
+        """Ids of the tags with a label, alias, slug or inner word starting with query, most used first."""
+        limit = min(limit, _TOP_DEPTH)
+        q = normalize_tag_text(query)
+        top = self._top.get(q)
+        if top is None:
+            lo = bisect_left(self.keys, q)
+            hi = bisect_left(self.keys, q + _PREFIX_END, lo)
+            ids = set()
+            for p in self.postings[lo:hi]:
+                ids.update(p)
+            if hi - lo < _MEMO_RANGE:
+                return heapq.nsmallest(limit, ids, key=self.rank.__getitem__)
+            top = heapq.nsmallest(_TOP_DEPTH, ids, key=self.rank.__getitem__)
+            top_cache = self._top
+            if len(top_cache) >= _MEMO_SIZE:
+                top_cache.clear()
+            top_cache[q] = top
+        return top[:limit]
+
+    def find(self, text: str) -> Optional[int]:
+        """Tag for typed text: a slug, or a label/alias that (normalized) names exactly one tag."""
+        text = (text or "").strip()
+        if text in self.ids_by_slug:
+            return self.ids_by_slug[text]
+        ids = self.exact.get(normalize_tag_text(text), ())
+        return ids[0] if len(ids) == 1 else None
+
+    def rows(self, query: str, lang_code: str, limit: int) -> List[Dict[str, object]]:
+        """[{id, slug, label, usage}] for an autocomplete query; label is in lang_code."""
+        return [
+            {"id": tid, "slug": self.labels.slugs[tid], "label": self.labels.label(tid, lang_code), "usage": self.usage.get(tid, 0)}
+            for tid in self.search(query, limit)
+        ]
+
+    def etag(self, *parts: object) -> str:
+        """ETag for a response computed from this index and the given request parameters."""
+        raw = "\x1f".join([self.version, *map(str, parts)])
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:24]
+
+
+class TagSearchCache:
+    """
+    Process-wide TagSearchIndex, rebuilt when the tag label snapshot changes (any tag, translation
+    or alias write, see tag_labels); usage counts older than usage_max_age are reloaded and the
+    existing keys re-ranked. Usage only orders results, so links attached in the meantime just
+    rank with the old counts for a while.
+    """
+
+    def __init__(self, usage_max_age: float = 60.0) -> None:
+        self.usage_max_age = usage_max_age
+        self.builds = 0
+        self._data: Dict[str, TagSearchIndex] = {}  # by engine URL, like the label cache
+        self._lock = threading.Lock()
+
+    def get(self) -> TagSearchIndex:
+        key = str(db.engine.url)
+        # an index built from labels that were invalidated meanwhile is used once, not stored
+        generation = tag_labels.generation
+        labels = tag_labels.get()
+        with self._lock:
+            index = self._data.get(key)
+        if index is not None and index.labels is labels and time.monotonic() - index.built_at < self.usage_max_age:
+            return index
+        usage = dict(db.session.query(EntityTag.tag_id, db.func.count()).group_by(EntityTag.tag_id).all())
+        with self._lock:
+            self.builds += 1
+            version = f"{_EPOCH}-{self.builds}"
+        if index is not None and index.labels is labels:
+            # same tags, only the usage counts are due: re-rank a copy, keep the keys
+            index = copy.copy(index)
+            index.rerank(usage, version)
+        else:
+            index = TagSearchIndex(labels, usage, version)
+        if tag_labels.generation == generation:
+            with self._lock:
+                self._data[key] = index
+        return index
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            sizes = [len(i) for i in self._data.values()]
+        return {"builds": self.builds, "keys": sum(sizes), "usage_max_age": self.usage_max_age}
+
+    def find(self, text: str) -> Optional[int]:
+        return self.get().find(text)
+
+
+tag_search = TagSearchCache()
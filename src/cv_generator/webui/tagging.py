@@ -1,12 +1,14 @@
 from __future__ import annotations
 
 import csv
-import io
 import logging
-from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
-from .models import db, Tag, TagAlias, TagTranslation, EntityTag
+from .models import db, CVVariant, Tag, TagAlias, TagTranslation, EntityTag
 from .fields import slugify, SUPPORTED_LANGUAGES
+from .export_cache import bump_generation, bump_generation_for_tags, bump_all_generations
+from .tag_labels import tag_labels
 
 logger = logging.getLogger(__name__)
 
@@ -14,42 +16,42 @@ logger = logging.getLogger(__name__)
 def get_all_tags_for_autocomplete(lang_code: str) -> List[Dict[str, any]]:
     """
     Return all tags with their labels for autocomplete/selection.
-    Each tag includes id, slug, and label in the specified language.
+    Each tag includes id, slug, and label in the specified language (from the tag label cache).
     """
-    tags = Tag.query.order_by(Tag.slug.asc()).all()
-    results = []
-    for t in tags:
-        tr = TagTranslation.query.filter_by(tag_id=t.id, lang_code=lang_code).first()
-        label = tr.label if tr else t.slug
-        results.append({
-            "id": t.id,
-            "slug": t.slug,
-            "label": label,
-        })
-    return results
+    return tag_labels.all_tags(lang_code)
 
 
 def get_tag_label(tag_id: int, lang_code: str) -> str:
-    tr = TagTranslation.query.filter_by(tag_id=tag_id, lang_code=lang_code).first()
-    if tr:
-        return tr.label
-    tag = Tag.query.get(tag_id)
-    if tag:
-        logger.debug(f"Missing translation for tag '{tag.slug}' (id={tag_id}) in language '{lang_code}', using slug as fallback")
-        return tag.slug
+    labels = tag_labels.get()
+    label = labels.labels.get((tag_id, lang_code))
+    if label:
+        return label
+    slug = labels.slugs.get(tag_id)
+    if slug:
+        logger.debug(f"Missing translation for tag '{slug}' (id={tag_id}) in language '{lang_code}', using slug as fallback")
+        return slug
     logger.warning(f"Tag with id={tag_id} not found, returning generic fallback 'tag'")
     return "tag"
 
 
 def list_entity_tags(person_id: int, section: str, stable_id: str, lang_code: str) -> List[str]:
-    links = EntityTag.query.filter_by(person_id=person_id, section=section, stable_id=stable_id).all()
-    if not links:
-        return []
-    labels = []
-    for l in links:
-        labels.append(get_tag_label(l.tag_id, lang_code))
+    links = db.session.query(EntityTag.tag_id).filter_by(person_id=person_id, section=section, stable_id=stable_id).all()
     # stable, readable order
-    return sorted(labels, key=lambda x: x.lower())
+    return sorted((get_tag_label(tag_id, lang_code) for (tag_id,) in links), key=lambda x: x.lower())
+
+
+def entity_tags_by_group(person_id: int, lang_code: str, section: Optional[str] = None) -> Dict[Tuple[str, str], List[Dict[str, any]]]:
+    """
+    {(section, stable_id): [{id, slug, label}, ...]} for all of a person's tag links (optionally one section),
+    with one query for the links and labels from the tag label cache. Tags are sorted by label.
+    """
+    q = db.session.query(EntityTag.section, EntityTag.stable_id, EntityTag.tag_id).filter(EntityTag.person_id == person_id)
+    if section is not None:
+        q = q.filter(EntityTag.section == section)
+    tag_ids: Dict[Tuple[str, str], List[int]] = {}
+    for sec, stable_id, tag_id in q:
+        tag_ids.setdefault((sec, stable_id), []).append(tag_id)
+    return {key: tag_labels.labels_for(ids, lang_code) for key, ids in tag_ids.items()}
 
 
 def resolve_or_create_tag(input_text: str, lang_code: str) -> Tag:
@@ -108,6 +110,8 @@ def attach_tag(person_id: int, section: str, stable_id: str, tag_id: int) -> boo
     if exists:
         return False
     db.session.add(EntityTag(person_id=person_id, section=section, stable_id=stable_id, tag_id=tag_id))
+    bump_generation([person_id])
+    invalidate_link_hashes([(person_id, section)])
     return True
 
 
@@ -116,32 +120,321 @@ def detach_tag(person_id: int, section: str, stable_id: str, tag_id: int) -> boo
     if not link:
         return False
     db.session.delete(link)
+    bump_generation([person_id])
+    invalidate_link_hashes([(person_id, section)])
     return True
 
 
-def get_tag_table(lang_code: str) -> List[dict]:
+def invalidate_link_hashes(groups: Iterable[Tuple[int, str]]) -> None:
+    """
+    Forget the stored import hashes of (person_id, section) pairs whose tag links changed outside
+    of an import. Links are shared by all languages, so every variant of the person is affected;
+    the next re-import of an unchanged source file then rewrites those sections and restores its links.
     """
-    For tags management page: return a list of tags with translations+aliases.
+    sections: Dict[int, Set[str]] = {}
+    for person_id, section in groups:
+        sections.setdefault(person_id, set()).add(section)
+    if not sections:
+        return
+    for variant in CVVariant.query.filter(CVVariant.person_id.in_(list(sections))):
+        variant.content_hash = None
+        if variant.section_hashes:
+            dropped = sections[variant.person_id]
+            variant.section_hashes = {k: v for k, v in variant.section_hashes.items() if k not in dropped}
+
+
+def _invalidate_tag_link_hashes(tag_ids: List[int]) -> None:
+    """invalidate_link_hashes for every section linked to one of the tags (call before the links change)."""
+    invalidate_link_hashes(
+        db.session.query(EntityTag.person_id, EntityTag.section).filter(EntityTag.tag_id.in_(tag_ids)).distinct().all()
+    )
+
+
+class TagResolver:
     """
-    tags = Tag.query.order_by(Tag.slug.asc()).all()
+    In-memory tag resolution for bulk work (CV import, CSV load).
+
+    Slugs, aliases and translations are loaded once into hash maps; labels are resolved
+    without queries, and new tags, translations, aliases and entity links are queued
+    until flush() writes them in batches. Tags are tracked by slug so that tags created
+    in this batch can be linked before they have an id.
+    """
+
+    def __init__(self) -> None:
+        self._loaded = False
+        self._ids: Dict[str, Optional[int]] = {}  # slug -> id (None until flushed)
+        self._aliases: Dict[Tuple[str, str], str] = {}  # (lang, alias_label) -> slug
+        self._translations: Dict[Tuple[str, str], str] = {}  # (lang, label) -> slug
+        self._translated: Set[Tuple[str, str]] = set()  # (slug, lang) with a translation
+        self._links: Dict[int, Set[Tuple[str, str, str]]] = {}  # person_id -> {(section, stable_id, slug)}
+
+        self._new_tags: List[str] = []
+        self._new_translations: List[Tuple[str, str, str]] = []
+        self._new_aliases: List[Tuple[str, str, str]] = []
+        self._new_links: List[Tuple[int, str, str, str]] = []
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        id_to_slug: Dict[int, str] = {}
+        for tag_id, slug in db.session.query(Tag.id, Tag.slug).all():
+            self._ids[slug] = tag_id
+            id_to_slug[tag_id] = slug
+        for lang, label, tag_id in db.session.query(TagAlias.lang_code, TagAlias.alias_label, TagAlias.tag_id).all():
+            if tag_id in id_to_slug:
+                self._aliases[(lang, label)] = id_to_slug[tag_id]
+        for lang, label, tag_id in (
+            db.session.query(TagTranslation.lang_code, TagTranslation.label, TagTranslation.tag_id)
+            .order_by(TagTranslation.id.asc())
+            .all()
+        ):
+            if tag_id in id_to_slug:
+                self._translations.setdefault((lang, label), id_to_slug[tag_id])
+                self._translated.add((id_to_slug[tag_id], lang))
+        self._loaded = True
+
+    def find_by_slug(self, slug: str) -> Optional[str]:
+        self._load()
+        return slug if slug in self._ids else None
+
+    def find_by_alias(self, label: str, lang_code: str) -> Optional[str]:
+        self._load()
+        return self._aliases.get((lang_code, label))
+
+    def find_by_translation(self, label: str, lang_code: str) -> Optional[str]:
+        self._load()
+        return self._translations.get((lang_code, label))
+
+    def new_tag(self, base_label: str) -> str:
+        """Queue a new tag with a unique slug derived from base_label. Returns the slug."""
+        self._load()
+        slug = slugify(base_label)
+        # ensure uniqueness
+        base = slug
+        i = 2
+        while slug in self._ids:
+            slug = f"{base}-{i}"
+            i += 1
+        self._ids[slug] = None
+        self._new_tags.append(slug)
+        return slug
+
+    def add_translation(self, slug: str, lang_code: str, label: str) -> bool:
+        """
+        Queue a translation (plus a matching alias if that alias is free) when the tag has
+        none in lang_code yet. Returns True if a translation was queued.
+        """
+        self._load()
+        if (slug, lang_code) in self._translated:
+            return False
+        self._translated.add((slug, lang_code))
+        self._translations.setdefault((lang_code, label), slug)
+        self._new_translations.append((slug, lang_code, label))
+        if (lang_code, label) not in self._aliases:
+            self._aliases[(lang_code, label)] = slug
+            self._new_aliases.append((slug, lang_code, label))
+        return True
+
+    def resolve(self, input_text: str, lang_code: str) -> str:
+        """
+        In-memory equivalent of resolve_or_create_tag: slug, then alias, then translation
+        label; otherwise a new tag with translation + alias is queued. Returns the slug.
+        """
+        raw = (input_text or "").strip()
+        if not raw:
+            raise ValueError("Empty tag input.")
+        slug = self.find_by_slug(raw) or self.find_by_alias(raw, lang_code) or self.find_by_translation(raw, lang_code)
+        if slug is not None:
+            return slug
+        slug = self.new_tag(raw)
+        self.add_translation(slug, lang_code, raw)
+        return slug
+
+    def attach(self, person_id: int, section: str, stable_id: str, slug: str) -> bool:
+        """Queue an entity link unless it already exists. Returns True if queued."""
+        self._load()
+        links = self._links.get(person_id)
+        if links is None:
+            id_to_slug = {tag_id: s for s, tag_id in self._ids.items() if tag_id is not None}
+            links = {
+                (sec, sid, id_to_slug[tag_id])
+                for sec, sid, tag_id in db.session.query(EntityTag.section, EntityTag.stable_id, EntityTag.tag_id)
+                .filter(EntityTag.person_id == person_id)
+                .all()
+                if tag_id in id_to_slug
+            }
+            self._links[person_id] = links
+        key = (section, stable_id, slug)
+        if key in links:
+            return False
+        links.add(key)
+        self._new_links.append((person_id, section, stable_id, slug))
+        return True
+
+    def tag_id(self, slug: str) -> Optional[int]:
+        """Id of a tag by slug; tags queued by this resolver have an id only after flush()."""
+        self._load()
+        return self._ids.get(slug)
+
+    def flush(self) -> Dict[str, int]:
+        """
+        Write queued tags, translations, aliases and links in batches (no commit).
+        Cached entity links are dropped afterwards since other code may delete links.
+        Returns counts of rows written per kind.
+        """
+        counts = {
+            "tags": len(self._new_tags),
+            "translations": len(self._new_translations),
+            "aliases": len(self._new_aliases),
+            "links": len(self._new_links),
+        }
+        # labels of already-existing tags change when they gain a translation
+        relabeled = {self._ids[slug] for slug, _, _ in self._new_translations if self._ids[slug] is not None}
+        if relabeled:
+            bump_generation_for_tags(relabeled)
+        if self._new_tags:
+            # one multi-row INSERT .. RETURNING rather than a flush that inserts tag by tag
+            for tag_id, slug in db.session.execute(
+                db.insert(Tag).returning(Tag.id, Tag.slug),
+                [{"slug": slug} for slug in self._new_tags],
+            ):
+                self._ids[slug] = tag_id
+        # plain table inserts: executemany without the ORM's per-row bulk bookkeeping
+        if self._new_translations:
+            db.session.execute(TagTranslation.__table__.insert(), [
+                {"tag_id": self._ids[slug], "lang_code": lang, "label": label}
+                for slug, lang, label in self._new_translations
+            ])
+        if self._new_aliases:
+            db.session.execute(TagAlias.__table__.insert(), [
+                {"tag_id": self._ids[slug], "lang_code": lang, "alias_label": label}
+                for slug, lang, label in self._new_aliases
+            ])
+        if self._new_links:
+            db.session.execute(EntityTag.__table__.insert(), [
+                {"person_id": person_id, "section": section, "stable_id": stable_id, "tag_id": self._ids[slug]}
+                for person_id, section, stable_id, slug in self._new_links
+            ])
+            bump_generation(person_id for person_id, _, _, _ in self._new_links)
+        self._new_tags = []
+        self._new_translations = []
+        self._new_aliases = []
+        self._new_links = []
+        self._links = {}
+        return counts
+
+
+# Sort keys of the tag table (label = translation in the UI language, falling back to the slug)
+TAG_TABLE_SORTS = ("slug", "label", "usage", "newest")
+
+
+@dataclass
+class TagTablePage:
+    """One page of the tags management table."""
+    rows: List[dict]
+    total: int  # tags matching the search
+    page: int
+    per_page: int
+    sort: str
+    direction: str
+    q: str
+
+    @property
+    def pages(self) -> int:
+        return max(1, -(-self.total // self.per_page))
+
+
+def get_tag_table(
+    lang_code: str,
+    *,
+    q: str = "",
+    sort: str = "slug",
+    direction: str = "asc",
+    page: int = 1,
+    per_page: int = 50,
+) -> TagTablePage:
+    """
+    For tags management page: one page of tags with translations, aliases and usage counts.
+
+    Three queries regardless of the number of tags: a COUNT of the matches, the page itself
+    (translations pivoted to one column per language and usage counts from one GROUP BY, both
+    joined as subqueries so sorting and paging happen in SQL), and the aliases of the page's tags.
+    q matches slugs, translation labels and aliases (case-insensitive substring).
+    """
+    sort = sort if sort in TAG_TABLE_SORTS else "slug"
+    direction = "desc" if direction == "desc" else "asc"
+    per_page = max(1, per_page)
+
+    usage = (
+        db.session.query(EntityTag.tag_id.label("tag_id"), db.func.count().label("n"))
+        .group_by(EntityTag.tag_id)
+        .subquery()
+    )
+    pivot = (
+        db.session.query(
+            TagTranslation.tag_id.label("tag_id"),
+            *[
+                db.func.max(db.case((TagTranslation.lang_code == lang, TagTranslation.label))).label(lang)
+                for lang in SUPPORTED_LANGUAGES
+            ],
+        )
+        .group_by(TagTranslation.tag_id)
+        .subquery()
+    )
+
+    where = []
+    q = (q or "").strip()
+    if q:
+        pattern = "%" + q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        where.append(db.or_(
+            Tag.slug.ilike(pattern, escape="\\"),
+            db.exists().where(TagTranslation.tag_id == Tag.id, TagTranslation.label.ilike(pattern, escape="\\")),
+            db.exists().where(TagAlias.tag_id == Tag.id, TagAlias.alias_label.ilike(pattern, escape="\\")),
+        ))
+
+    total = db.session.query(db.func.count(Tag.id)).filter(*where).scalar() or 0
+    pages = max(1, -(-total // per_page))
+    page = min(max(1, page), pages)
+
+    usage_count = db.func.coalesce(usage.c.n, 0)
+    label = db.func.lower(db.func.coalesce(pivot.c[lang_code], Tag.slug)) if lang_code in SUPPORTED_LANGUAGES else db.func.lower(Tag.slug)
+    order = {
+        "slug": Tag.slug,
+        "label": label,
+        "usage": usage_count,
+        "newest": Tag.id,
+    }[sort]
+    order = order.desc() if direction == "desc" else order.asc()
+
+    rows_q = (
+        db.session.query(Tag.id, Tag.slug, usage_count.label("usage_count"), *[pivot.c[lang] for lang in SUPPORTED_LANGUAGES])
+        .outerjoin(usage, usage.c.tag_id == Tag.id)
+        .outerjoin(pivot, pivot.c.tag_id == Tag.id)
+        .filter(*where)
+        .order_by(order, Tag.id.asc())
+        .limit(per_page)
+        .offset((page - 1) * per_page)
+    )
     rows = []
-    for t in tags:
-        translations = {tr.lang_code: tr.label for tr in TagTranslation.query.filter_by(tag_id=t.id).all()}
-        aliases = {al.lang_code: [] for al in TagAlias.query.with_entities(TagAlias.lang_code).distinct().all()}
-        # normalize aliases
-        alias_rows = TagAlias.query.filter_by(tag_id=t.id).all()
-        for a in alias_rows:
-            aliases.setdefault(a.lang_code, []).append(a.alias_label)
-        # count how many entities use this tag
-        usage_count = EntityTag.query.filter_by(tag_id=t.id).count()
+    for r in rows_q:
         rows.append({
-            "id": t.id,
-            "slug": t.slug,
-            "translations": translations,
-            "aliases": aliases,
-            "usage_count": usage_count,
+            "id": r.id,
+            "slug": r.slug,
+            "translations": {lang: getattr(r, lang) for lang in SUPPORTED_LANGUAGES if getattr(r, lang) is not None},
+            "aliases": {lang: [] for lang in SUPPORTED_LANGUAGES},
+            "usage_count": r.usage_count,
         })
-    return rows
+
+    if rows:
+        by_id = {row["id"]: row for row in rows}
+        for tag_id, lang, alias in (
+            db.session.query(TagAlias.tag_id, TagAlias.lang_code, TagAlias.alias_label)
+            .filter(TagAlias.tag_id.in_(list(by_id)))
+            .order_by(TagAlias.id.asc())
+        ):
+            by_id[tag_id]["aliases"].setdefault(lang, []).append(alias)
+
+    return TagTablePage(rows, total, page, per_page, sort, direction, q)
 
 
 def delete_tag(tag_id: int) -> bool:
@@ -152,6 +445,8 @@ def delete_tag(tag_id: int) -> bool:
     tag = Tag.query.get(tag_id)
     if not tag:
         return False
+    bump_generation_for_tags([tag_id])
+    _invalidate_tag_link_hashes([tag_id])
     # Delete all associated entity tags (cascade should handle this, but be explicit)
     EntityTag.query.filter_by(tag_id=tag_id).delete(synchronize_session=False)
     # Delete all aliases
@@ -163,81 +458,105 @@ def delete_tag(tag_id: int) -> bool:
     return True
 
 
-def merge_tags(target_tag_id: int, source_tag_ids: List[int]) -> Tuple[bool, str]:
+@dataclass
+class TagMergeReport:
+    """What merge_tags did; translations are (lang, label) pairs."""
+    target_slug: str
+    merged_slugs: List[str]
+    links_moved: int = 0
+    links_dropped: int = 0  # the entity already had the target tag, or another merged source
+    translations_kept: List[Tuple[str, str]] = field(default_factory=list)  # moved to the target
+    translations_dropped: List[Tuple[str, str]] = field(default_factory=list)  # the target had that language
+    aliases_moved: int = 0
+
+    def summary(self) -> str:
+        parts = [
+            f"Merged {len(self.merged_slugs)} tag(s) into '{self.target_slug}'",
+            f"{self.links_moved} link(s) moved, {self.links_dropped} duplicate link(s) dropped",
+            f"{self.aliases_moved} alias(es) moved",
+        ]
+        if self.translations_kept:
+            parts.append("translations kept: " + ", ".join(f"{l.upper()} '{t}'" for l, t in self.translations_kept))
+        if self.translations_dropped:
+            parts.append("translations dropped: " + ", ".join(f"{l.upper()} '{t}'" for l, t in self.translations_dropped))
+        return "; ".join(parts) + "."
+
+
+def merge_tags(target_tag_id: int, source_tag_ids: List[int]) -> Tuple[bool, str, Optional[TagMergeReport]]:
     """
     Merge one or more source tags into a target tag.
     This will:
     - Transfer all entity associations from source tags to target tag
-    - Transfer all translations (if target doesn't have that language)
-    - Transfer all aliases (if not conflicting)
+      (dropping links the entity already has to the target or through another source)
+    - Transfer translations for languages the target doesn't have (the first source in the list wins)
+    - Transfer all aliases (alias labels are unique per language, so they cannot clash)
     - Delete the source tags
 
-    Returns (success, message).
+    Runs as a fixed number of set-based statements however many links the tags have.
+    Returns (success, message, report); report is None when nothing was merged.
     """
-    target = Tag.query.get(target_tag_id)
+    target = db.session.query(Tag.id, Tag.slug).filter(Tag.id == target_tag_id).first()
     if not target:
-        return False, "Target tag not found."
+        return False, "Target tag not found.", None
 
     if not source_tag_ids:
-        return False, "No source tags provided."
-
-    # Filter out target from source list and invalid IDs
-    source_tag_ids = [s for s in source_tag_ids if s != target_tag_id]
-    source_tags = [Tag.query.get(sid) for sid in source_tag_ids]
-    source_tags = [s for s in source_tags if s is not None]
-
-    if not source_tags:
-        return False, "No valid source tags to merge."
-
-    merged_count = 0
-    for source in source_tags:
-        # Transfer entity associations
-        entity_links = EntityTag.query.filter_by(tag_id=source.id).all()
-        for link in entity_links:
-            # Check if target already has this association
-            existing = EntityTag.query.filter_by(
-                person_id=link.person_id,
-                section=link.section,
-                stable_id=link.stable_id,
-                tag_id=target.id
-            ).first()
-            if not existing:
-                # Update the link to point to target
-                link.tag_id = target.id
-            else:
-                # Remove duplicate link
-                db.session.delete(link)
-
-        # Transfer translations (only if target doesn't have that language)
-        for tr in TagTranslation.query.filter_by(tag_id=source.id).all():
-            existing_tr = TagTranslation.query.filter_by(
-                tag_id=target.id, lang_code=tr.lang_code
-            ).first()
-            if not existing_tr:
-                tr.tag_id = target.id
-            else:
-                db.session.delete(tr)
-
-        # Transfer aliases (only if no conflict)
-        for alias in TagAlias.query.filter_by(tag_id=source.id).all():
-            existing_alias = TagAlias.query.filter_by(
-                lang_code=alias.lang_code, alias_label=alias.alias_label
-            ).first()
-            if existing_alias and existing_alias.tag_id != target.id:
-                # Conflict with another tag - delete source alias to avoid uniqueness violation
-                db.session.delete(alias)
-            elif existing_alias and existing_alias.tag_id == target.id:
-                # Already exists for target - delete source's duplicate
-                db.session.delete(alias)
-            else:
-                # No conflict - transfer alias to target
-                alias.tag_id = target.id
-
-        # Delete the source tag
-        db.session.delete(source)
-        merged_count += 1
-
-    return True, f"Merged {merged_count} tag(s) into '{target.slug}'."
+        return False, "No source tags provided.", None
+
+    # Filter out target from source list and invalid IDs, keeping the given order
+    source_tag_ids = [s for s in dict.fromkeys(source_tag_ids) if s != target_tag_id]
+    slugs = dict(db.session.query(Tag.id, Tag.slug).filter(Tag.id.in_(source_tag_ids)).all())
+    source_ids = [s for s in source_tag_ids if s in slugs]
+
+    if not source_ids:
+        return False, "No valid source tags to merge.", None
+
+    report = TagMergeReport(target.slug, [slugs[s] for s in source_ids])
+    bump_generation_for_tags([target.id] + source_ids)
+    _invalidate_tag_link_hashes(source_ids)
+    sources = EntityTag.tag_id.in_(source_ids)
+
+    # Entity associations: drop source links the target (or a lower-id source link) already covers,
+    # then re-point the rest in one UPDATE
+    other = db.aliased(EntityTag)
+    same_entity = db.and_(
+        other.person_id == EntityTag.person_id,
+        other.section == EntityTag.section,
+        other.stable_id == EntityTag.stable_id,
+    )
+    report.links_dropped = EntityTag.query.filter(
+        sources,
+        db.or_(
+            db.exists().where(same_entity, other.tag_id == target.id),
+            db.exists().where(same_entity, other.tag_id.in_(source_ids), other.id < EntityTag.id),
+        ),
+    ).delete(synchronize_session=False)
+    report.links_moved = EntityTag.query.filter(sources).update({EntityTag.tag_id: target.id}, synchronize_session=False)
+
+    # Translations: at most one row per source and language, decided in Python
+    have = {lang for (lang,) in db.session.query(TagTranslation.lang_code).filter(TagTranslation.tag_id == target.id)}
+    order = {sid: i for i, sid in enumerate(source_ids)}
+    keep: List[int] = []
+    for tr_id, tag_id, lang, label in sorted(
+        db.session.query(TagTranslation.id, TagTranslation.tag_id, TagTranslation.lang_code, TagTranslation.label)
+        .filter(TagTranslation.tag_id.in_(source_ids)),
+        key=lambda r: order[r[1]],
+    ):
+        if lang in have:
+            report.translations_dropped.append((lang, label))
+        else:
+            have.add(lang)
+            keep.append(tr_id)
+            report.translations_kept.append((lang, label))
+    if keep:
+        TagTranslation.query.filter(TagTranslation.id.in_(keep)).update({TagTranslation.tag_id: target.id}, synchronize_session=False)
+    TagTranslation.query.filter(TagTranslation.tag_id.in_(source_ids)).delete(synchronize_session=False)
+
+    report.aliases_moved = TagAlias.query.filter(TagAlias.tag_id.in_(source_ids)).update({TagAlias.tag_id: target.id}, synchronize_session=False)
+
+    # Delete the source tags (nothing refers to them any more)
+    Tag.query.filter(Tag.id.in_(source_ids)).delete(synchronize_session=False)
+
+    return True, report.summary(), report
 
 
 def delete_all_tags() -> int:
@@ -249,6 +568,9 @@ def delete_all_tags() -> int:
     count = Tag.query.count()
     if count == 0:
         return 0
+    bump_all_generations()
+    # every variant's links go, so no stored import hash describes the database any more
+    CVVariant.query.update({CVVariant.content_hash: None, CVVariant.section_hashes: None}, synchronize_session=False)
 
     # Delete all entity tags first
     EntityTag.query.delete(synchronize_session=False)
@@ -262,113 +584,123 @@ def delete_all_tags() -> int:
     return count
 
 
-def import_tags_from_csv(csv_content: bytes, filename: str) -> Tuple[int, List[str]]:
+@dataclass
+class TagCsvImportStats:
+    """Aggregated outcome of import_tags_from_csv."""
+    filename: str
+    columns: Dict[str, str] = field(default_factory=dict)  # lang -> CSV header
+    rows: int = 0
+    created: int = 0  # rows that became a new tag
+    matched: int = 0  # rows that resolved to an existing tag (or one created earlier in the file)
+    skipped: int = 0  # rows without any label
+    translations_added: int = 0
+    aliases_added: int = 0
+    skipped_rows: List[int] = field(default_factory=list)  # first few skipped row numbers
+    latin1_lines: int = 0  # lines that were not valid UTF-8
+
+    def summary(self) -> str:
+        msg = (
+            f"{self.filename}: {self.rows} row(s), {self.created} new tag(s), {self.matched} matched existing tag(s), "
+            f"{self.translations_added} translation(s) and {self.aliases_added} alias(es) added"
+        )
+        if self.skipped:
+            rows = ", ".join(str(r) for r in self.skipped_rows)
+            msg += f", {self.skipped} row(s) skipped without labels (row {rows}{', …' if self.skipped > len(self.skipped_rows) else ''})"
+        if self.latin1_lines:
+            msg += f", {self.latin1_lines} line(s) read as Latin-1"
+        return msg + "."
+
+
+def _csv_lines(stream: IO[bytes], stats: TagCsvImportStats) -> Iterator[str]:
+    """Decode an upload line by line: UTF-8 (BOM stripped), falling back to Latin-1 per line."""
+    first = True
+    for raw in stream:
+        if first:
+            raw = raw.removeprefix(b"\xef\xbb\xbf")
+            first = False
+        try:
+            yield raw.decode("utf-8")
+        except UnicodeDecodeError:
+            stats.latin1_lines += 1
+            yield raw.decode("latin-1")
+
+
+def import_tags_from_csv(stream: IO[bytes], filename: str, *, batch_size: int = 5000) -> TagCsvImportStats:
     """
     Import tags from a CSV file.
     The CSV should have headers like 'en_tag', 'de_tag', 'fa_tag' for each supported language.
     Each row represents a tag set with translations in multiple languages.
 
-    Returns (number of tags created, list of warnings/messages).
+    The upload is read incrementally and resolved against the in-memory TagResolver maps;
+    new tags, translations and aliases are written every batch_size rows (no commit).
+    Raises ValueError for a file without language columns or with malformed CSV.
     """
-    warnings: List[str] = []
-    created_count = 0
-
+    stats = TagCsvImportStats(filename)
+    reader = csv.DictReader(_csv_lines(stream, stats))
     try:
-        # Try to decode as UTF-8 first, then fall back to other encodings
-        try:
-            text = csv_content.decode("utf-8-sig")  # Handle BOM
-        except UnicodeDecodeError:
-            text = csv_content.decode("latin-1")
-
-        reader = csv.DictReader(io.StringIO(text))
         headers = reader.fieldnames or []
-
-        # Find language columns
-        lang_columns: Dict[str, str] = {}
-        for lang in SUPPORTED_LANGUAGES:
-            possible_headers = [f"{lang}_tag", f"{lang.upper()}_tag", f"tag_{lang}", lang, lang.upper()]
-            for h in headers:
-                if h.strip().lower() in [p.lower() for p in possible_headers]:
-                    lang_columns[lang] = h
-                    break
-
-        if not lang_columns:
-            warnings.append(f"No valid language columns found. Expected headers like: en_tag, de_tag, fa_tag")
-            return 0, warnings
-
-        warnings.append(f"Found language columns: {lang_columns}")
-
+    except csv.Error as ex:
+        raise ValueError(f"Error parsing CSV: {ex}") from ex
+
+    # Find language columns
+    for lang in SUPPORTED_LANGUAGES:
+        possible_headers = {f"{lang}_tag", f"tag_{lang}", lang}
+        for h in headers:
+            if h.strip().lower() in possible_headers:
+                stats.columns[lang] = h
+                break
+
+    if not stats.columns:
+        raise ValueError("No valid language columns found. Expected headers like: en_tag, de_tag, fa_tag")
+
+    resolver = TagResolver()
+    pending = 0
+    try:
         for row_num, row in enumerate(reader, start=2):  # Start at 2 because row 1 is header
-            # Get the first non-empty label to use as base for slug
-            first_label = None
-            first_lang = None
+            stats.rows += 1
+            # Non-empty labels by language, in column order (the first one is the base for a new slug)
             labels: Dict[str, str] = {}
-
-            for lang, col in lang_columns.items():
+            for lang, col in stats.columns.items():
                 val = (row.get(col) or "").strip()
                 if val:
                     labels[lang] = val
-                    if first_label is None:
-                        first_label = val
-                        first_lang = lang
 
-            if not first_label:
-                warnings.append(f"Row {row_num}: skipped (no labels found)")
+            if not labels:
+                stats.skipped += 1
+                if len(stats.skipped_rows) < 5:
+                    stats.skipped_rows.append(row_num)
                 continue
 
-            # Check if tag with this label already exists
-            existing_tag = None
+            # Check if tag with this label already exists (translation, then alias, then slug)
+            slug = None
             for lang, label in labels.items():
-                # Check by translation
-                existing_tr = TagTranslation.query.filter_by(lang_code=lang, label=label).first()
-                if existing_tr:
-                    existing_tag = Tag.query.get(existing_tr.tag_id)
-                    break
-                # Check by alias
-                existing_alias = TagAlias.query.filter_by(lang_code=lang, alias_label=label).first()
-                if existing_alias:
-                    existing_tag = Tag.query.get(existing_alias.tag_id)
-                    break
-                # Check by slug
-                slug_check = slugify(label)
-                existing_tag = Tag.query.filter_by(slug=slug_check).first()
-                if existing_tag:
+                slug = (
+                    resolver.find_by_translation(label, lang)
+                    or resolver.find_by_alias(label, lang)
+                    or resolver.find_by_slug(slugify(label))
+                )
+                if slug:
                     break
 
-            if existing_tag:
-                # Update existing tag with any missing translations
-                for lang, label in labels.items():
-                    existing_tr = TagTranslation.query.filter_by(tag_id=existing_tag.id, lang_code=lang).first()
-                    if not existing_tr:
-                        db.session.add(TagTranslation(tag_id=existing_tag.id, lang_code=lang, label=label))
-                        # Also add alias
-                        existing_alias = TagAlias.query.filter_by(lang_code=lang, alias_label=label).first()
-                        if not existing_alias:
-                            db.session.add(TagAlias(tag_id=existing_tag.id, lang_code=lang, alias_label=label))
-                warnings.append(f"Row {row_num}: updated existing tag '{existing_tag.slug}'")
+            if slug:
+                stats.matched += 1
             else:
-                # Create new tag
-                slug = slugify(first_label)
-                base = slug
-                i = 2
-                while Tag.query.filter_by(slug=slug).first() is not None:
-                    slug = f"{base}-{i}"
-                    i += 1
-
-                tag = Tag(slug=slug)
-                db.session.add(tag)
-                db.session.flush()
-
-                for lang, label in labels.items():
-                    db.session.add(TagTranslation(tag_id=tag.id, lang_code=lang, label=label))
-                    # Also add alias for lookup
-                    db.session.add(TagAlias(tag_id=tag.id, lang_code=lang, alias_label=label))
-
-                created_count += 1
-                warnings.append(f"Row {row_num}: created tag '{slug}'")
-
-    except Exception as e:
-        warnings.append(f"Error parsing CSV: {e}")
-        return 0, warnings
-
-    return created_count, warnings
+                slug = resolver.new_tag(next(iter(labels.values())))
+                stats.created += 1
+            # Add any missing translations
+            for lang, label in labels.items():
+                resolver.add_translation(slug, lang, label)
+
+            pending += 1
+            if pending >= batch_size:
+                written = resolver.flush()
+                stats.translations_added += written["translations"]
+                stats.aliases_added += written["aliases"]
+                pending = 0
+    except csv.Error as ex:
+        raise ValueError(f"Error parsing CSV at line {reader.line_num}: {ex}") from ex
+
+    written = resolver.flush()
+    stats.translations_added += written["translations"]
+    stats.aliases_added += written["aliases"]
+    return stats
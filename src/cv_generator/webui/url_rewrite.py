@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .json_codec import codec
+
+# A mapped URL preceded by, or followed by, more URL characters is part of a longer URL and is left alone.
+# A trailing "." only continues the URL if more URL characters follow it (otherwise it ends a sentence).
+_URL_BEFORE = r"(?<![\w.~%+/-])"
+_URL_AFTER = r"(?![\w~%+/-]|\.[\w~%+/-])"
+
+
+class UrlRewriter:
+    """
+    Rewrites old URLs to new ones in one pass per string.
+
+    All source URLs are compiled into a single regex shaped like a prefix trie, so a string is scanned
+    once however many mappings there are, and shared prefixes (the same host and path) are only
+    compared once. The longest mapped URL wins, and a URL is only replaced where it is not just the
+    start of a longer URL (unless the mapped URL ends in a separator such as "/").
+    """
+
+    def __init__(self, mapping: Dict[str, str]) -> None:
+        self.mapping = {old: new for old, new in mapping.items() if old and old != new}
+        self.pattern: Optional["re.Pattern[str]"] = None
+        # every mapped URL contains this; strings without it are skipped without running the regex
+        self.prefix = os.path.commonprefix(list(self.mapping))
+        if self.mapping:
+            trie: Dict[str, Any] = {}
+            for old in self.mapping:
+                node = trie
+                for ch in old:
+                    node = node.setdefault(ch, {})
+                node[""] = True
+            self.pattern = re.compile(_URL_BEFORE + _trie_regex(trie) + rf"(?:(?<=[/?#&=])|{_URL_AFTER})")
+
+    def __len__(self) -> int:
+        return len(self.mapping)
+
+    def sub(self, text: str, counts: Counter) -> str:
+        """Rewrite one string, adding the number of replacements per old URL to counts."""
+        if self.pattern is None or self.prefix not in text:
+            return text
+
+        def replace(m: "re.Match[str]") -> str:
+            old = m.group(0)
+            counts[old] += 1
+            return self.mapping[old]
+
+        return self.pattern.sub(replace, text)
+
+    def rewrite(self, value: Any, counts: Counter) -> Any:
+        """
+        Rewrite every string in a JSON-like value (dict keys are left alone).
+        Containers are copied only where something changed; otherwise the same object is returned.
+        """
+        if isinstance(value, str):
+            return self.sub(value, counts)
+        if isinstance(value, dict):
+            out = None
+            for k, v in value.items():
+                nv = self.rewrite(v, counts)
+                if nv is not v:
+                    if out is None:
+                        out = dict(value)
+                    out[k] = nv
+            return value if out is None else out
+        if isinstance(value, list):
+            items = None
+            for i, v in enumerate(value):
+                nv = self.rewrite(v, counts)
+                if nv is not v:
+                    if items is None:
+                        items = list(value)
+                    items[i] = nv
+            return value if items is None else items
+        return value
+
+    def tally(self) -> "UrlRewriteTally":
+        return UrlRewriteTally(self)
+
+
+class UrlRewriteTally:
+    """
+    A rewrite function for the exporters: call it on values, read the per-URL counts afterwards.
+    Safe to share between the threads of a batch export.
+    """
+
+    def __init__(self, rewriter: UrlRewriter) -> None:
+        self.rewriter = rewriter
+        self.counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def __call__(self, value: Any) -> Any:
+        local: Counter = Counter()
+        out = self.rewriter.rewrite(value, local)
+        if local:
+            with self._lock:
+                self.counts.update(local)
+        return out
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def summary(self, limit: int = 10) -> str:
+        """'<n> URL replacement(s): old → new ×k; ...' with the most frequent URLs first."""
+        if not self.counts:
+            return "No URLs rewritten."
+        parts = [f"{old} → {self.rewriter.mapping[old]} ×{n}" for old, n in self.counts.most_common(limit)]
+        more = len(self.counts) - limit
+        if more > 0:
+            parts.append(f"and {more} more")
+        return f"{self.total} URL replacement(s): " + "; ".join(parts)
+
+
+def _trie_regex(node: Dict[str, Any]) -> str:
+    """Regex for the strings in a character trie; single-child chains are emitted as one literal."""
+    alternatives: List[str] = []
+    for ch in sorted(k for k in node if k):
+        literal = [ch]
+        child = node[ch]
+        while "" not in child and len(child) == 1:
+            (nxt, child), = child.items()
+            literal.append(nxt)
+        alternatives.append(re.escape("".join(literal)) + _trie_regex(child))
+    if not alternatives:
+        return ""
+    body = alternatives[0] if len(alternatives) == 1 else "(?:" + "|".join(alternatives) + ")"
+    # greedy: the longer URL is tried before the one ending here
+    return f"(?:{body})?" if "" in node else body
+
+
+def load_url_map(path: Path) -> Dict[str, str]:
+    """Read a {"old url": "new url"} JSON map. Raises ValueError for anything else."""
+    try:
+        data = codec.loads(Path(path).read_bytes())
+    except json.JSONDecodeError as ex:
+        raise ValueError(f"Invalid URL map {path}: {ex}") from ex
+    if not isinstance(data, dict) or not all(isinstance(k, str) and isinstance(v, str) for k, v in data.items()):
+        raise ValueError(f"Invalid URL map {path}: expected an object of old URL -> new URL strings")
+    return data
+
+
+_cache: Dict[str, Tuple[Tuple[int, int], UrlRewriter]] = {}
+_cache_lock = threading.Lock()
+
+
+def get_url_rewriter(path: Path) -> UrlRewriter:
+    """Compiled UrlRewriter for a map file, recompiled only when the file changes."""
+    path = Path(path)
+    st = path.stat()
+    stamp = (st.st_mtime_ns, st.st_size)
+    key = str(path.resolve())
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+    rewriter = UrlRewriter(load_url_map(path))
+    with _cache_lock:
+        _cache[key] = (stamp, rewriter)
+    return rewriter
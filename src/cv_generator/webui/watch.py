@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from flask import Flask
+
+from .models import db, upgrade_schema
+from .cv_io import FileImportResult, import_cv_files, record_import_history
+
+logger = logging.getLogger(__name__)
+
+# (st_mtime_ns, st_size) - cheap change signal; content hashes decide what is really re-imported
+FileStat = Tuple[int, int]
+
+
+class CVDirectoryWatcher:
+    """
+    Poll a directory of CV JSON files and import the ones that changed.
+
+    An index of (mtime, size) per file is kept in memory. A changed file is imported once it
+    has been stable for `debounce` seconds, and files that settle in the same tick are imported
+    as one batch. On the first poll every file counts as changed; import_cv_files skips files
+    whose content hash already matches, so a restart only imports real edits.
+    """
+
+    def __init__(self, app: Flask, cvs_dir: Path, *, interval: float = 0.5, debounce: float = 0.3) -> None:
+        self.app = app
+        self.cvs_dir = cvs_dir
+        self.interval = interval
+        self.debounce = debounce
+        self._index: Dict[Path, FileStat] = {}
+        self._pending: Dict[Path, Tuple[FileStat, float]] = {}  # path -> (stat, last change time)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _scan(self) -> Dict[Path, FileStat]:
+        snapshot: Dict[Path, FileStat] = {}
+        if not self.cvs_dir.exists():
+            return snapshot
+        for p in self.cvs_dir.glob("*.json"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue  # removed between glob and stat
+            snapshot[p] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def poll_once(self) -> List[FileImportResult]:
+        """Scan once and import files that changed and have settled. Returns the import results."""
+        now = time.monotonic()
+        snapshot = self._scan()
+
+        for p in list(self._index):
+            if p not in snapshot:
+                del self._index[p]
+                self._pending.pop(p, None)
+
+        for p, st in snapshot.items():
+            if self._index.get(p) == st:
+                self._pending.pop(p, None)
+                continue
+            pending = self._pending.get(p)
+            if pending is None or pending[0] != st:
+                self._pending[p] = (st, now)
+
+        ready = sorted(p for p, (_, changed_at) in self._pending.items() if now - changed_at >= self.debounce)
+        if not ready:
+            return []
+
+        with self.app.app_context():
+            results = import_cv_files(
+                [(p.name, p) for p in ready],
+                import_mode="merge",
+                max_workers=self.app.config.get("IMPORT_WORKERS"),
+            )
+            if any(not r.skipped for r in results):
+                record_import_history(results)
+
+        for p in ready:
+            # index even failed files so a broken file is retried only after it changes again
+            self._index[p] = self._pending.pop(p)[0]
+        for r in results:
+            if r.error is not None:
+                logger.warning(f"Watch import of {r.filename} failed: {r.error}")
+            elif not r.skipped:
+                logger.info(f"Watch imported {r.filename} as {r.resume_key} [{r.lang_code}]")
+        return results
+
+    def run_forever(self) -> None:
+        with self.app.app_context():
+            db.create_all()
+            upgrade_schema()
+        logger.info(f"Watching {self.cvs_dir} for CV changes")
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception:
+                logger.exception("CV watcher poll failed")
+            self._stop.wait(self.interval)
+
+    def start(self) -> "CVDirectoryWatcher":
+        """Run the watcher on a daemon thread."""
+        self._thread = threading.Thread(target=self.run_forever, name="cvgen-watch", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def start_cv_watcher(app: Flask, **kwargs) -> CVDirectoryWatcher:
+    """Start watching <repo_root>/data/cvs in a background thread of the given app."""
+    cvs_dir = Path(app.config["REPO_ROOT"]) / "data" / "cvs"
+    watcher = CVDirectoryWatcher(app, cvs_dir, **kwargs).start()
+    app.extensions["cvgen_watcher"] = watcher
+    return watcher
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+from cv_generator.webui.app import create_app  # noqa: E402
+from cv_generator.webui.models import db, upgrade_schema  # noqa: E402
+
+
+@pytest.fixture
+def repo_root(tmp_path: Path) -> Path:
+    """A repo layout with two of the sample CVs in data/cvs."""
+    cvs = tmp_path / "data" / "cvs"
+    cvs.mkdir(parents=True)
+    for name in ("mahsa.json", "ramin_en.json"):
+        shutil.copy(REPO_ROOT / "data" / "cvs" / name, cvs / name)
+    return tmp_path
+
+
+@pytest.fixture
+def app(repo_root: Path):
+    app = create_app(repo_root=repo_root)
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False, JOBS_INLINE=True, IMPORT_WORKERS=1)
+    with app.app_context():
+        db.create_all()
+        upgrade_schema()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from cv_generator.webui.models import CVVariant, EntityTag, PersonEntity, Tag
+
+
+def _counts(app):
+    with app.app_context():
+        return Tag.query.count(), EntityTag.query.count()
+
+
+def test_delete_all_tags_then_reimport_restores_tags(app, client):
+    client.post("/import/from-disk")
+    tags, links = _counts(app)
+    assert tags > 0 and links > 0
+
+    client.post("/tags", data={"action": "delete_all_tags"})
+    assert _counts(app) == (0, 0)
+    with app.app_context():
+        assert all(v.content_hash is None and not v.section_hashes for v in CVVariant.query)
+
+    client.post("/import/from-disk")
+    assert _counts(app) == (tags, links)
+
+
+def test_detach_then_reimport_reattaches(app):
+    from cv_generator.webui.cv_io import import_cv_files
+    from cv_generator.webui.models import db
+    from cv_generator.webui.tagging import detach_tag
+
+    path = Path(app.config["REPO_ROOT"]) / "data" / "cvs" / "mahsa.json"
+    with app.app_context():
+        import_cv_files([("mahsa.json", path)])
+        person = PersonEntity.query.filter_by(slug="mahsa").one()
+        link = EntityTag.query.filter_by(person_id=person.id).first()
+        key = (link.person_id, link.section, link.stable_id, link.tag_id)
+        assert detach_tag(*key)
+        db.session.commit()
+        assert CVVariant.query.filter_by(person_id=person.id).one().content_hash is None
+
+        result = import_cv_files([("mahsa.json", path)])[0]
+        assert not result.skipped and link.section not in result.skipped_sections
+        assert EntityTag.query.filter_by(person_id=key[0], section=key[1], stable_id=key[2], tag_id=key[3]).count() == 1
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import pytest
+
+from cv_generator.webui.models import Tag, db
+from cv_generator.webui.tag_query import And, Not, Or, TagRef, _tokenize, parse_tag_query
+
+
+@pytest.fixture
+def tags(app):
+    with app.app_context():
+        db.session.add_all([Tag(slug="ml"), Tag(slug="bio"), Tag(slug="x")])
+        db.session.commit()
+        yield {t.slug: t.id for t in Tag.query}
+
+
+@pytest.mark.parametrize("text, kinds", [
+    ("ml&bio|x", ["TERM", "AND", "TERM", "OR", "TERM"]),
+    ("ml&&bio||x", ["TERM", "AND", "TERM", "OR", "TERM"]),
+    ("!ml", ["NOT", "TERM"]),
+])
+def test_tokenize_inline_operators(text, kinds):
+    assert [kind for kind, _ in _tokenize(text)] == kinds
+
+
+def test_parse_inline_and(app, tags):
+    with app.app_context():
+        expr = parse_tag_query("ml&bio", "en")
+    assert isinstance(expr, And) and [c.tag_id for c in expr.children] == [tags["ml"], tags["bio"]]
+
+
+def test_parse_inline_or(app, tags):
+    with app.app_context():
+        expr = parse_tag_query("ml|bio", "en")
+    assert isinstance(expr, Or) and [c.tag_id for c in expr.children] == [tags["ml"], tags["bio"]]
+
+
+def test_parse_inline_not(app, tags):
+    with app.app_context():
+        expr = parse_tag_query("!ml", "en")
+    assert isinstance(expr, Not) and isinstance(expr.child, TagRef) and expr.child.tag_id == tags["ml"]
+
+
+def test_parse_inline_precedence(app, tags):
+    with app.app_context():
+        assert str(parse_tag_query("ml&!bio|x", "en")) == str(parse_tag_query("(ml AND NOT bio) OR x", "en"))